@@ -0,0 +1,240 @@
+"""Сквозной бенчмарк `TTSave.download()` против локального сервера из `stub_server.py`.
+
+Запуск без сети и без браузера (HTTP-путь):
+
+    python benchmarks/bench_download.py --items 200 --workers 8 --output bench.json
+
+Через Web Driver (нужен сертификат для HTTPS, например самоподписанный):
+
+    python benchmarks/bench_download.py --browser --cert cert.pem --key key.pem
+
+Сравнение с прошлым результатом (код выхода 1 при регрессии):
+
+    python benchmarks/bench_download.py --baseline bench.json --tolerance 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import StubServer, host_resolver_rules, mount_stub, page_url, short_url  # noqa: E402
+from ttsave.__version__ import __version__  # noqa: E402
+from ttsave.resolver import URLResolver  # noqa: E402
+from ttsave.session import create_session  # noqa: E402
+from ttsave.metrics import Metrics  # noqa: E402
+from ttsave.scheduler import TransferScheduler  # noqa: E402
+from ttsave.ttsave import TTSave  # noqa: E402
+from ttsave.utils import Utils  # noqa: E402
+
+STAGES: Tuple[str, ...] = ("resolve", "extract", "transfer", "total")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 0.50),
+        "p90": percentile(values, 0.90),
+        "p99": percentile(values, 0.99),
+        "max": max(values, default=0.0),
+    }
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    # На Linux ru_maxrss в КиБ, на macOS в байтах.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def workload(items: int, mix: Dict[str, int], short_links: bool) -> List[str]:
+    """Список ссылок с уникальными ID, чтобы ни один файл не был пропущен как уже скачанный."""
+    kinds: List[str] = [kind for kind, weight in mix.items() for _ in range(weight)]
+    urls: List[str] = []
+    for number in range(items):
+        kind = kinds[number % len(kinds)]
+        item_id = 7_000_000_000 + number
+        urls.append(short_url(kind, item_id) if short_links else page_url(kind, item_id))
+    return urls
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix: Dict[str, int] = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in ("video", "photo", "music"):
+            raise argparse.ArgumentTypeError(f"unknown content type: {kind}")
+        mix[kind] = int(weight or 1)
+    return mix
+
+
+def run(args: argparse.Namespace) -> Dict:
+    download_dir: str = tempfile.mkdtemp(prefix="ttsave-bench-")
+    media_sizes = {"video": args.video_size, "photo": args.photo_size, "audio": args.audio_size}
+    server = StubServer(media_sizes, certfile=args.cert, keyfile=args.key).start()
+
+    session = create_session(pool_size=args.workers * args.max_workers)
+    mount_stub(session, server.base_url, pool_size=args.workers * args.max_workers)
+    if args.cert:
+        session.verify = False
+    resolver = URLResolver(session, Utils(debug_mode=False), cache=None)
+
+    pool = None
+    driver_class = options = None
+    metrics = Metrics()
+    if args.browser:
+        from selenium import webdriver
+        from ttsave.lean import LeanProfile
+        from ttsave.pool import DriverPool
+        driver_class = webdriver.Chrome
+        options = webdriver.ChromeOptions()
+        for argument in host_resolver_rules(server):
+            options.add_argument(argument)
+        pool = DriverPool(driver_class, options, download_dir, size=args.workers,
+                          lean=None if args.no_lean else LeanProfile())
+        pool.warm()
+
+    def download(url: str) -> Tuple[Dict[str, float], Optional[str], int]:
+        started = time.monotonic()
+        try:
+            with TTSave(url=url, driver_class=driver_class, options=options, download_dir=download_dir,
+                        pool=pool, use_http=not args.browser, session=session,
+                        max_workers=args.max_workers, resolver=resolver, observers=[metrics]) as ttsave:
+                result = ttsave.download()
+                timings = dict(ttsave.timings)
+        except Exception as e:
+            return {"total": time.monotonic() - started}, str(e), 0
+        timings["total"] = time.monotonic() - started
+        return timings, None, sum(os.path.getsize(path) for path in result["files"])
+
+    urls = workload(args.items, args.mix, args.short_links)
+    stages: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    errors: List[str] = []
+    total_bytes = 0
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            for timings, error, size in executor.map(download, urls):
+                if error is not None:
+                    errors.append(error)
+                    continue
+                total_bytes += size
+                for stage in STAGES:
+                    stages[stage].append(timings.get(stage, 0.0))
+    finally:
+        elapsed = time.monotonic() - started
+        if pool is not None:
+            pool.close()
+        session.close()
+        server.stop()
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+    completed = len(urls) - len(errors)
+    return {
+        "ttsave_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "items": args.items,
+            "workers": args.workers,
+            "max_workers": args.max_workers,
+            "mix": args.mix,
+            "browser": args.browser,
+            "short_links": args.short_links,
+            "lean": args.browser and not args.no_lean,
+            "media_sizes": media_sizes,
+        },
+        "elapsed": elapsed,
+        "completed": completed,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "items_per_s": completed / elapsed if elapsed else 0.0,
+        "mb_per_s": total_bytes / (1024 * 1024) / elapsed if elapsed else 0.0,
+        "bytes": total_bytes,
+        "page_bytes": metrics.snapshot()["page_bytes"],
+        "page_blocked": metrics.snapshot()["page_blocked"],
+        "requests": {name: value for name, value in TransferScheduler.shared().stats().items() if name != "hosts"},
+        "stages": {stage: summarize(values) for stage, values in stages.items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def regressions(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Метрики, которые ухудшились относительно `baseline` больше чем на `tolerance`."""
+    found: List[str] = []
+    for metric in ("items_per_s", "mb_per_s"):
+        if report[metric] < baseline[metric] * (1 - tolerance):
+            found.append(f"{metric}: {baseline[metric]:.2f} -> {report[metric]:.2f}")
+    for stage in STAGES:
+        before = baseline["stages"].get(stage, {}).get("p90", 0.0)
+        after = report["stages"][stage]["p90"]
+        if before and after > before * (1 + tolerance):
+            found.append(f"{stage} p90: {before * 1000:.1f}ms -> {after * 1000:.1f}ms")
+    if report["peak_rss_mb"]["self"] > baseline["peak_rss_mb"]["self"] * (1 + tolerance):
+        found.append(f"peak RSS: {baseline['peak_rss_mb']['self']:.1f}MB -> {report['peak_rss_mb']['self']:.1f}MB")
+    return found
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark TTSave.download() against a local TikTok stand-in.")
+    parser.add_argument("--items", type=int, default=100, help="Number of URLs to download.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent downloads (and browsers with --browser).")
+    parser.add_argument("--max-workers", type=int, default=4, help="Concurrent files per download (TTSave max_workers).")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("video=6,photo=3,music=1"),
+                        help="Content mix as type=weight pairs.")
+    parser.add_argument("--short-links", action="store_true", help="Use vm.tiktok.com short links to exercise the resolver.")
+    parser.add_argument("--video-size", type=int, default=2 * 1024 * 1024, help="Video file size in bytes.")
+    parser.add_argument("--photo-size", type=int, default=256 * 1024, help="Photo slide size in bytes.")
+    parser.add_argument("--audio-size", type=int, default=512 * 1024, help="Audio file size in bytes.")
+    parser.add_argument("--browser", action="store_true", help="Extract through Chrome instead of the embedded JSON.")
+    parser.add_argument("--no-lean", action="store_true",
+                        help="Load pages with every resource; compare page_bytes with a lean run to see bytes saved.")
+    parser.add_argument("--cert", help="TLS certificate for the stand-in server (required with --browser).")
+    parser.add_argument("--key", help="TLS private key for the stand-in server.")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression against --baseline.")
+    args = parser.parse_args(argv)
+    if args.browser and not args.cert:
+        parser.error("--browser needs --cert and --key: Chrome only reaches www.tiktok.com over HTTPS")
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Проверка времени импорта через `python -X importtime`.
+
+Каждая строка импорта запускается в отдельном процессе несколько раз; берется
+лучший результат за вычетом модулей, которые интерпретатор загружает сам.
+Бюджет задан долей времени `import requests` на той же машине, поэтому проверка
+не зависит от скорости машины. Код выхода 1, если время превышает бюджет или
+загружен запрещенный модуль.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --budget-scale 1.5 --output import.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Импорт, с которым сравниваются бюджеты.
+REFERENCE: str = "import requests"
+
+# Строка импорта -> (бюджет в долях времени REFERENCE, модули, которые она не должна загружать).
+CASES: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    "import ttsave": (0.15, ("selenium", "requests", "colorama", "aiohttp")),
+    "from ttsave import TTSave": (0.6, ("selenium", "requests", "colorama", "aiohttp")),
+    "from ttsave import TTSaveEngine": (0.6, ("selenium", "requests", "colorama", "aiohttp")),
+    "from ttsave import AsyncTTSave": (1.0, ("selenium", "requests", "colorama", "aiohttp")),
+    "from ttsave.urls import classify_url": (0.15, ("selenium", "requests", "colorama", "aiohttp")),
+}
+
+
+def importtime(statement: str) -> Dict[str, Tuple[int, int]]:
+    """Модули верхнего уровня из вывода `-X importtime`: имя -> (self, cumulative) в микросекундах."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue
+        # Первый пробел — разделитель, остальные обозначают вложенность импорта.
+        modules[name.rstrip()[1:]] = (int(own), int(cumulative))
+    return modules
+
+
+def measure(statement: str, baseline: Set[str]) -> Tuple[float, List[str]]:
+    """Время импорта в миллисекундах и список загруженных модулей без учета `baseline`."""
+    modules = importtime(statement)
+    loaded: List[str] = [name.strip() for name in modules if name.strip() not in baseline]
+    top_level: int = sum(
+        cumulative for name, (_, cumulative) in modules.items()
+        if not name.startswith(" ") and name not in baseline
+    )
+    return top_level / 1000, loaded
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check ttsave import time against a budget.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per statement; the fastest one is reported.")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every budget.")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file.")
+    args = parser.parse_args(argv)
+
+    baseline: Set[str] = {name.strip() for name in importtime("pass")}
+    reference: float = min(measure(REFERENCE, baseline)[0] for _ in range(args.runs))
+    print(f"{reference:8.1f}ms  reference: {REFERENCE}")
+    report: Dict[str, Dict] = {"reference": {"statement": REFERENCE, "ms": reference}}
+    failures: List[str] = []
+    for statement, (share, forbidden) in CASES.items():
+        runs = [measure(statement, baseline) for _ in range(args.runs)]
+        best, loaded = min(runs, key=lambda run: run[0])
+        budget: float = share * reference * args.budget_scale
+        leaked = sorted({name.split(".")[0] for name in loaded} & set(forbidden))
+        report[statement] = {"ms": best, "budget_ms": budget, "modules": len(loaded), "forbidden_loaded": leaked}
+        status = "ok"
+        if best > budget:
+            failures.append(f"{statement}: {best:.1f}ms > {budget:.1f}ms")
+            status = "OVER BUDGET"
+        if leaked:
+            failures.append(f"{statement}: imported {', '.join(leaked)}")
+            status = "FORBIDDEN IMPORT"
+        print(f"{best:8.1f}ms / {budget:6.1f}ms  {len(loaded):4d} modules  {status:16s} {statement}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""Локальный сервер, который отдает страницы и медиа в том же виде, что и TikTok.
+
+Страницы содержат и встроенное JSON-состояние (для HTTP-пути), и элементы
+с селекторами из `ttsave.dom.SELECTORS` (для Web Driver). Медиафайлы
+синтетические: заданного размера и с корректным Content-Length. Байт на
+позиции `i` равен `i % 256` (см. `media_bytes`), поэтому склеенный из частей
+файл можно сравнить с оригиналом. Медиа отдаются с ETag и поддержкой `Range`
+и `If-Range`, а обрыв соединения и ответ не с того байта включаются через
+атрибуты `StubServer`.
+"""
+import html
+import json
+import re
+import ssl
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+USERNAME: str = "bench"
+MEDIA_SIZES: Dict[str, int] = {
+    "video": 2 * 1024 * 1024,
+    "photo": 256 * 1024,
+    "audio": 512 * 1024,
+}
+PHOTO_SLIDES: int = 3
+MUSIC_CLIPS: int = 30
+
+VIDEO_RE = re.compile(r"^/@[\w.]+/video/(\d+)$")
+PHOTO_RE = re.compile(r"^/@[\w.]+/photo/(\d+)$")
+MUSIC_RE = re.compile(r"^/music/[\w%-]+-(\d+)$")
+MEDIA_RE = re.compile(r"^/media/(video|photo|audio)/([\w.-]+)$")
+SHORT_RE = re.compile(r"^/([vpm])(\d+)/?$")
+RANGE_RE = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+SHORT_TARGETS: Dict[str, str] = {
+    "v": "https://www.tiktok.com/@" + USERNAME + "/video/{id}",
+    "p": "https://www.tiktok.com/@" + USERNAME + "/photo/{id}",
+    "m": "https://www.tiktok.com/music/bench-sound-{id}",
+}
+
+CHUNK_SIZE: int = 64 * 1024
+# Блок со сдвигом до 255 байт: из него вырезается любой участок длиной до CHUNK_SIZE.
+PATTERN: bytes = bytes(range(256)) * (CHUNK_SIZE // 256 + 1)
+
+
+def media_bytes(size: int, start: int = 0) -> bytes:
+    """Содержимое синтетического медиафайла размером `size` начиная с байта `start`."""
+    return b"".join(PATTERN[pos % 256:pos % 256 + min(CHUNK_SIZE, size - pos)]
+                    for pos in range(start, size, CHUNK_SIZE))
+
+
+def page_url(content_type: str, item_id: int) -> str:
+    if content_type == "music":
+        return SHORT_TARGETS["m"].format(id=item_id)
+    return SHORT_TARGETS[content_type[0]].format(id=item_id)
+
+
+def short_url(content_type: str, item_id: int) -> str:
+    return f"https://vm.tiktok.com/{content_type[0]}{item_id}/"
+
+
+def _state_script(scope: Dict) -> str:
+    state = json.dumps({"__DEFAULT_SCOPE__": scope})
+    return f'<script id="__UNIVERSAL_DATA_FOR_REHYDRATION__" type="application/json">{state}</script>'
+
+
+def _music(item_id: int, media: str) -> Dict:
+    return {
+        "id": str(item_id),
+        "title": "bench sound",
+        "authorName": USERNAME,
+        "playUrl": f"{media}/media/audio/{item_id}.mp3",
+        "coverLarge": f"{media}/media/photo/cover-{item_id}.jpg",
+    }
+
+
+def _shared_markup(description: str, item_id: int) -> str:
+    return (
+        f'<meta property="og:description" content="{html.escape(description)}">'
+        f'<span class="css-1c7urt-SpanUniqueId evv7pft1">{USERNAME}</span>'
+        f'<a class="epjbyn1 css-v80f7r-StyledLink-StyledLink er1vbsz0" '
+        f'href="https://www.tiktok.com/music/bench-sound-{item_id}">bench sound</a>'
+    )
+
+
+def video_page(item_id: int, media: str) -> str:
+    description = f"Bench video {item_id}"
+    item = {
+        "id": str(item_id),
+        "desc": description,
+        "author": {"uniqueId": USERNAME},
+        "video": {"playAddr": f"{media}/media/video/{item_id}.mp4"},
+        "music": _music(item_id, media),
+    }
+    return (
+        "<html><head>" + _shared_markup(description, item_id) + "</head><body>"
+        f'<video src="{item["video"]["playAddr"]}"></video>'
+        + _state_script({"webapp.video-detail": {"itemInfo": {"itemStruct": item}}})
+        + "</body></html>"
+    )
+
+
+def photo_page(item_id: int, media: str) -> str:
+    description = f"Bench photo {item_id}"
+    slides = [f"{media}/media/photo/{item_id}-{slide}.jpg" for slide in range(PHOTO_SLIDES)]
+    item = {
+        "id": str(item_id),
+        "desc": description,
+        "author": {"uniqueId": USERNAME},
+        "imagePost": {"images": [{"imageURL": {"urlList": [slide]}} for slide in slides]},
+        "music": _music(item_id, media),
+    }
+    images = "".join(f'<img class="css-brxox6-ImgPhotoSlide e10jea832" src="{slide}">' for slide in slides)
+    return (
+        "<html><head>" + _shared_markup(description, item_id) + "</head><body>"
+        + images + f'<audio src="{item["music"]["playUrl"]}"></audio>'
+        + _state_script({"webapp.video-detail": {"itemInfo": {"itemStruct": item}}})
+        + "</body></html>"
+    )
+
+
+def music_page(item_id: int, media: str) -> str:
+    music = _music(item_id, media)
+    clips = [{"id": str(item_id * 1000 + clip), "author": {"uniqueId": USERNAME}} for clip in range(MUSIC_CLIPS)]
+    detail = {
+        "music": music,
+        "author": {"uniqueId": USERNAME},
+        "stats": {"videoCount": MUSIC_CLIPS},
+        "itemList": clips,
+    }
+    links = "".join(
+        f'<a class="css-1wrhn5c-AMetaCaptionLine eih2qak0" '
+        f'href="https://www.tiktok.com/@{USERNAME}/video/{clip["id"]}">clip</a>'
+        for clip in clips
+    )
+    cover = music["coverLarge"].split(":", 1)[1]
+    return (
+        "<html><body>"
+        f'<a class="css-22xkqc-StyledLink er1vbsz0" href="https://www.tiktok.com/@{USERNAME}">{USERNAME}</a>'
+        f'<strong style="font-weight: normal;">{MUSIC_CLIPS} videos</strong>'
+        f'<div class="css-uur1tb-DivMusicCardContainer ervjp3i1" style="background-image: url({cover});"></div>'
+        f'<video src="{music["playUrl"]}"></video>'
+        + links
+        + _state_script({"webapp.music-detail": {"musicInfo": detail}})
+        + "</body></html>"
+    )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StubServer"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _media(self, kind: str, size: int) -> None:
+        requested: Optional[str] = self.headers.get("Range")
+        if_range: Optional[str] = self.headers.get("If-Range")
+        with self.server.lock:
+            etag: str = self.server.etag
+            drop_after: Optional[int] = self.server.drop_after
+            if self.command != "HEAD":
+                self.server.drop_after = None
+        start, end, status = 0, size - 1, 200
+        match = RANGE_RE.match(requested or "")
+        if match and (if_range is None or if_range == etag):
+            start = int(match.group(1))
+            if start >= size:
+                self.server.log_media(requested, 416)
+                self._send(416, headers={"Content-Range": f"bytes */{size}"})
+                return
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            status = 206
+            if self.server.misplace_ranges:
+                start = 0
+        self.server.log_media(requested, status)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        pos, sent = start, 0
+        while pos <= end:
+            length = min(CHUNK_SIZE, end - pos + 1)
+            if drop_after is not None:
+                length = min(length, drop_after - sent)
+                if length <= 0:
+                    # Обрыв посреди тела: клиент получает меньше, чем обещает Content-Length.
+                    self.close_connection = True
+                    break
+            self.wfile.write(PATTERN[pos % 256:pos % 256 + length])
+            pos += length
+            sent += length
+        with self.server.lock:
+            self.server.bytes_served += sent
+
+    def do_GET(self) -> None:
+        parts = urlsplit(self.path)
+        path = parts.path
+        media = self.server.media_base
+
+        match = SHORT_RE.match(path)
+        if match:
+            self._send(301, headers={"Location": SHORT_TARGETS[match.group(1)].format(id=match.group(2))})
+            return
+        match = MEDIA_RE.match(path)
+        if match:
+            size = parse_qs(parts.query).get("size")
+            self._media(match.group(1), int(size[0]) if size else self.server.media_sizes[match.group(1)])
+            return
+        for pattern, render in ((VIDEO_RE, video_page), (PHOTO_RE, photo_page), (MUSIC_RE, music_page)):
+            match = pattern.match(path)
+            if match:
+                body = render(int(match.group(1)), media).encode("utf-8")
+                self._send(200, body, {"Content-Type": "text/html; charset=utf-8"})
+                return
+        self._send(404)
+
+    do_HEAD = do_GET
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, media_sizes: Optional[Dict[str, int]] = None, certfile: Optional[str] = None, keyfile: Optional[str] = None):
+        """Сервер на случайном порту 127.0.0.1.
+
+        Args:
+            media_sizes (Optional[Dict[str, int]], optional): Размеры синтетических медиафайлов по виду (`video`, `photo`, `audio`).
+            certfile (Optional[str], optional): Сертификат для HTTPS. Нужен только для режима с браузером.
+            keyfile (Optional[str], optional): Ключ сертификата.
+        """
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.media_sizes: Dict[str, int] = {**MEDIA_SIZES, **(media_sizes or {})}
+        self.lock: threading.Lock = threading.Lock()
+        self.bytes_served: int = 0
+        self.etag: str = '"stub-1"'
+        # Оборвать соединение после стольких байт тела следующего ответа с медиа.
+        self.drop_after: Optional[int] = None
+        # Отвечать на любой Range частью с первого байта.
+        self.misplace_ranges: bool = False
+        self.media_requests: List[Tuple[Optional[str], int]] = []
+        scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.socket = context.wrap_socket(self.socket, server_side=True)
+            scheme = "https"
+        self.base_url: str = f"{scheme}://127.0.0.1:{self.server_address[1]}"
+        self.media_base: str = self.base_url
+        self._thread: Optional[threading.Thread] = None
+
+    def log_media(self, requested: Optional[str], status: int) -> None:
+        """Запоминает заголовок `Range` и код ответа каждого запроса медиа в `media_requests`."""
+        with self.lock:
+            self.media_requests.append((requested, status))
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="ttsave-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class LocalAdapter(HTTPAdapter):
+    def __init__(self, base_url: str, **kwargs):
+        """Перенаправляет запросы к доменам TikTok на локальный сервер, сохраняя путь и query."""
+        self.base_url: str = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        parts = urlsplit(request.url)
+        request.url = self.base_url + parts.path + (f"?{parts.query}" if parts.query else "")
+        return super().send(request, **kwargs)
+
+
+def mount_stub(session: requests.Session, base_url: str, pool_size: int = 10) -> None:
+    """Подключает к сессии `LocalAdapter` для www.tiktok.com и vm.tiktok.com."""
+    adapter = LocalAdapter(base_url, pool_connections=pool_size, pool_maxsize=pool_size)
+    for host in ("https://www.tiktok.com/", "https://vm.tiktok.com/"):
+        session.mount(host, adapter)
+
+
+def host_resolver_rules(server: StubServer) -> Tuple[str, str]:
+    """Аргументы Chrome, которые направляют домены TikTok на локальный сервер."""
+    port = server.server_address[1]
+    return (
+        f"--host-resolver-rules=MAP www.tiktok.com 127.0.0.1:{port}, MAP vm.tiktok.com 127.0.0.1:{port}",
+        "--ignore-certificate-errors",
+    )
@@ -9,6 +9,11 @@ def install_requires():
     with open('requirements.txt', 'r', encoding='utf-8') as f:
         return f.readlines()
 
+# Без extras ставится только HTTP-путь (requests); selenium нужен для запасного пути через браузер.
+BROWSER_REQUIRES = ['selenium==4.23.1']
+CLI_REQUIRES = BROWSER_REQUIRES + ['click', 'click-shell', 'rich', 'pyyaml']
+ASYNC_REQUIRES = ['aiohttp>=3.9']
+
 setup(
     name='ttsave',
     version=__version__,
@@ -22,6 +27,12 @@ setup(
     packages=find_packages(),
     py_modules=['ttsave_cli'],
     install_requires=install_requires(),
+    extras_require={
+        'browser': BROWSER_REQUIRES,
+        'cli': CLI_REQUIRES,
+        'async': ASYNC_REQUIRES,
+        'all': BROWSER_REQUIRES + CLI_REQUIRES + ASYNC_REQUIRES,
+    },
     entry_points={
         'console_scripts': [
             'ttsave=ttsave_cli:cli',
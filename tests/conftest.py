@@ -0,0 +1,26 @@
+import os
+import sys
+from typing import Iterator
+import pytest
+import requests
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from stub_server import StubServer, mount_stub  # noqa: E402
+
+
+@pytest.fixture
+def stub() -> Iterator[StubServer]:
+    """Локальный сервер из `benchmarks/stub_server.py` на случайном порту."""
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def session(stub: StubServer) -> Iterator[requests.Session]:
+    """Сессия, запросы которой к доменам TikTok уходят на `stub`."""
+    with requests.Session() as session:
+        mount_stub(session, stub.base_url)
+        yield session
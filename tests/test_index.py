@@ -0,0 +1,70 @@
+import os
+import pytest
+from stub_server import page_url
+from ttsave.cache import ContentCache
+from ttsave.index import DownloadIndex
+from ttsave.resolver import URLResolver
+from ttsave.ttsave import TTSave
+from ttsave.utils import Utils
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DownloadIndex(str(tmp_path / "index.sqlite3"))
+    yield index
+    index.close()
+
+
+def download(session, url: str, download_dir: str, **kwargs):
+    resolver = URLResolver(session, Utils(debug_mode=False))
+    with TTSave(url=url, driver_class=None, options=None, download_dir=download_dir,
+                session=session, resolver=resolver, **kwargs) as ttsave:
+        return ttsave.download()
+
+
+def test_index_hit_skips_extraction_and_transfer(stub, session, index, tmp_path):
+    url = page_url("video", 1)
+    first = download(session, url, str(tmp_path), index=index)
+    requests_made = len(stub.media_requests)
+
+    assert download(session, url, str(tmp_path), index=index) == first
+    assert len(stub.media_requests) == requests_made
+    assert "video:1" in index
+
+
+def test_index_entry_with_changed_file_is_dropped(stub, session, index, tmp_path):
+    url = page_url("video", 1)
+    [path] = download(session, url, str(tmp_path), index=index)["files"]
+    with open(path, "ab") as f:
+        f.write(b"tail")
+
+    assert index.get("video:1") is None
+    assert "video:1" not in index
+
+
+def test_name_taken_by_another_item_gets_the_id(stub, session, index, tmp_path):
+    # У обеих дорожек один автор, поэтому и одно имя файла.
+    [first] = download(session, page_url("music", 1), str(tmp_path), index=index)["files"]
+    [second] = download(session, page_url("music", 2), str(tmp_path), index=index)["files"]
+
+    assert os.path.basename(first) == "bench.mp3"
+    assert os.path.basename(second) == "bench_2.mp3"
+    assert index.owner(first) == "music:1"
+    assert index.owner(second) == "music:2"
+
+
+def test_cache_hit_places_the_track_without_a_transfer(stub, session, tmp_path):
+    cache = ContentCache(str(tmp_path / "cache"))
+    try:
+        os.makedirs(tmp_path / "a")
+        os.makedirs(tmp_path / "b")
+        [first] = download(session, page_url("music", 1), str(tmp_path / "a"), cache=cache)["files"]
+        requests_made = len(stub.media_requests)
+        [second] = download(session, page_url("music", 1), str(tmp_path / "b"), cache=cache)["files"]
+
+        assert len(stub.media_requests) == requests_made
+        with open(first, "rb") as f, open(second, "rb") as g:
+            assert f.read() == g.read()
+        assert cache.stats()["hits"] == 1
+    finally:
+        cache.close()
@@ -0,0 +1,84 @@
+import os
+import pytest
+from stub_server import page_url, short_url
+from ttsave import resolver as resolver_module
+from ttsave.resolver import RedirectCache, URLResolver
+from ttsave.utils import Utils
+
+
+class Clock:
+    def __init__(self):
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(resolver_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = RedirectCache(str(tmp_path / "redirects.sqlite3"), ttl=60, max_entries=10)
+    yield cache
+    cache.close()
+
+
+def test_entry_expires_after_ttl(cache, clock):
+    cache.put("https://vm.tiktok.com/v1/", page_url("video", 1))
+    clock.now += 59
+    assert cache.get("https://vm.tiktok.com/v1/") == page_url("video", 1)
+    clock.now += 2
+    assert cache.get("https://vm.tiktok.com/v1/") is None
+
+
+def test_least_recently_used_entries_are_evicted(cache, clock):
+    for item in range(10):
+        clock.now += 1
+        cache.put(short_url("video", item), page_url("video", item))
+    clock.now += 1
+    assert cache.get(short_url("video", 0)) is not None
+
+    clock.now += 1
+    cache.put(short_url("video", 10), page_url("video", 10))
+
+    # Сверх лимита удаляются давно не использованные записи с запасом до 90% лимита.
+    assert cache.get(short_url("video", 0)) == page_url("video", 0)
+    assert cache.get(short_url("video", 1)) is None
+    assert cache.get(short_url("video", 2)) is None
+    assert cache.get(short_url("video", 3)) == page_url("video", 3)
+
+
+def test_database_is_created_on_first_use(tmp_path):
+    path = tmp_path / "cache" / "redirects.sqlite3"
+    cache = RedirectCache(str(path))
+    try:
+        assert not os.path.exists(path.parent)
+        cache.put("https://vm.tiktok.com/v1/", page_url("video", 1))
+        assert os.path.exists(path)
+    finally:
+        cache.close()
+
+
+def test_unwritable_location_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = RedirectCache(str(blocker / "ttsave" / "redirects.sqlite3"))
+    try:
+        with pytest.warns(RuntimeWarning):
+            cache.put("https://vm.tiktok.com/v1/", page_url("video", 1))
+        assert cache.get("https://vm.tiktok.com/v1/") == page_url("video", 1)
+    finally:
+        cache.close()
+
+
+def test_resolver_follows_redirects_and_caches_them(stub, session, cache):
+    resolver = URLResolver(session, Utils(debug_mode=False), cache)
+
+    assert resolver.resolve(short_url("music", 7)) == page_url("music", 7)
+    assert cache.get(short_url("music", 7)) == page_url("music", 7)
+    assert resolver.resolve(page_url("video", 1)) == page_url("video", 1)
@@ -0,0 +1,90 @@
+import os
+import pytest
+import requests
+from stub_server import media_bytes
+from ttsave import transfer
+from ttsave.transfer import IncompleteTransferError, partial_paths, resume_to_file
+
+SIZE: int = 1_000_000
+DROP: int = 300_000
+
+
+@pytest.fixture
+def url(stub) -> str:
+    return f"{stub.base_url}/media/video/1.mp4?size={SIZE}"
+
+
+def interrupt(stub, session, url: str, file_path: str, partial_dir: str) -> int:
+    """Обрывает первую загрузку и возвращает размер сохраненной части."""
+    stub.drop_after = DROP
+    with pytest.raises(requests.RequestException):
+        resume_to_file(session, url, file_path, partial_dir)
+    part_path, _ = partial_paths(partial_dir, file_path)
+    # Неполный последний блок iter_content теряется вместе с исключением.
+    done: int = os.path.getsize(part_path)
+    assert 0 < done <= DROP
+    assert not os.path.exists(file_path)
+    return done
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_resume_requests_only_the_rest(stub, session, url, tmp_path):
+    file_path, partial_dir = str(tmp_path / "video.mp4"), str(tmp_path / ".ttsave-partial")
+    done = interrupt(stub, session, url, file_path, partial_dir)
+
+    assert resume_to_file(session, url, file_path, partial_dir) == SIZE
+    assert stub.media_requests[-1] == (f"bytes={done}-", 206)
+    assert read(file_path) == media_bytes(SIZE)
+    assert os.listdir(partial_dir) == []
+    assert transfer._part_locks == {}
+
+
+def test_changed_etag_restarts_from_zero(stub, session, url, tmp_path):
+    file_path, partial_dir = str(tmp_path / "video.mp4"), str(tmp_path / ".ttsave-partial")
+    done = interrupt(stub, session, url, file_path, partial_dir)
+    stub.etag = '"stub-2"'
+
+    assert resume_to_file(session, url, file_path, partial_dir) == SIZE
+    assert stub.media_requests[-1] == (f"bytes={done}-", 200)
+    assert read(file_path) == media_bytes(SIZE)
+
+
+def test_misplaced_range_discards_the_partial(stub, session, url, tmp_path):
+    file_path, partial_dir = str(tmp_path / "video.mp4"), str(tmp_path / ".ttsave-partial")
+    interrupt(stub, session, url, file_path, partial_dir)
+    stub.misplace_ranges = True
+
+    with pytest.raises(IncompleteTransferError):
+        resume_to_file(session, url, file_path, partial_dir)
+    assert not any(os.path.exists(path) for path in partial_paths(partial_dir, file_path))
+    assert not os.path.exists(file_path)
+
+    assert resume_to_file(session, url, file_path, partial_dir) == SIZE
+    assert stub.media_requests[-1] == (None, 200)
+    assert read(file_path) == media_bytes(SIZE)
+
+
+def test_segments_are_joined_in_order(stub, session, url, tmp_path, monkeypatch):
+    monkeypatch.setattr(transfer, "SEGMENT_MIN_SIZE", 1024)
+    file_path, partial_dir = str(tmp_path / "video.mp4"), str(tmp_path / ".ttsave-partial")
+
+    assert resume_to_file(session, url, file_path, partial_dir, segments=4) == SIZE
+    assert sorted(status for _, status in stub.media_requests) == [206] * 5
+    assert read(file_path) == media_bytes(SIZE)
+    assert os.listdir(partial_dir) == []
+
+
+def test_complete_partial_is_not_downloaded_again(stub, session, url, tmp_path):
+    file_path, partial_dir = str(tmp_path / "video.mp4"), str(tmp_path / ".ttsave-partial")
+    done = interrupt(stub, session, url, file_path, partial_dir)
+    part_path, _ = partial_paths(partial_dir, file_path)
+    with open(part_path, "ab") as f:
+        f.write(media_bytes(SIZE, done))
+
+    assert resume_to_file(session, url, file_path, partial_dir) == SIZE
+    assert stub.media_requests[-1] == (f"bytes={SIZE}-", 416)
+    assert read(file_path) == media_bytes(SIZE)
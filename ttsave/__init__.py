@@ -1,3 +1,46 @@
-from ttsave.ttsave import TTSave
+from typing import TYPE_CHECKING
 
-__all__ = ["TTSave"]
+if TYPE_CHECKING:
+    from ttsave.ttsave import TTSave
+    from ttsave.pool import DriverPool
+    from ttsave.engine import TTSaveEngine
+    from ttsave.async_ttsave import AsyncTTSave
+    from ttsave.index import DownloadIndex
+    from ttsave.metrics import Metrics, Observer, JSONLogObserver
+
+# Модули загружаются при первом обращении к имени, чтобы `import ttsave`
+# не тянул requests и selenium в процессы, которым они не нужны.
+_EXPORTS = {
+    "TTSave": "ttsave.ttsave",
+    "DriverPool": "ttsave.pool",
+    "TTSaveEngine": "ttsave.engine",
+    "AsyncTTSave": "ttsave.async_ttsave",
+    "DownloadIndex": "ttsave.index",
+    "Metrics": "ttsave.metrics",
+    "Observer": "ttsave.metrics",
+    "JSONLogObserver": "ttsave.metrics",
+    "TTSaveServer": "ttsave.server",
+    "ProcessEngine": "ttsave.workers",
+    "TransferScheduler": "ttsave.scheduler",
+    "ContentCache": "ttsave.cache",
+    "DriverSupervisor": "ttsave.supervisor",
+    "Sink": "ttsave.sinks",
+    "FileObjectSink": "ttsave.sinks",
+    "CallbackSink": "ttsave.sinks",
+    "AsyncCallbackSink": "ttsave.sinks",
+}
+
+__all__ = ["TTSave", "TTSaveEngine", "AsyncTTSave", "DriverPool", "DownloadIndex", "Metrics", "Observer", "JSONLogObserver", "TTSaveServer", "ProcessEngine", "TransferScheduler", "ContentCache", "DriverSupervisor", "Sink", "FileObjectSink", "CallbackSink", "AsyncCallbackSink"]
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'ttsave' has no attribute '{name}'")
+    import importlib
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
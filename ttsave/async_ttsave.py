@@ -0,0 +1,315 @@
+from __future__ import annotations
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Type, Union
+from ttsave.exceptions import CONTENT_ERRORS, DownloadError, SingleFileSinkError, UnsupportedURLError, URLNotProvidedError
+from ttsave.extractor import extract_info
+from ttsave.lean import LeanProfile
+from ttsave.metrics import Observer, Tracer
+from ttsave.pool import DriverPool
+from ttsave.results import build_metadata, build_result, media_jobs
+from ttsave.session import DEFAULT_HEADERS, create_session
+from ttsave.transfer import CHUNK_SIZE, is_downloaded
+from ttsave.ttsave import TTSave
+from ttsave.urls import classify_url
+from ttsave.utils import Utils
+
+if TYPE_CHECKING:
+    import aiohttp
+    from selenium import webdriver
+    from ttsave.sinks import Sink
+
+WRITE_BUFFER_SIZE: int = 1024 * 1024
+
+DownloadResult = Tuple[str, Optional[Dict[str, Union[str, List[str]]]], Optional[Exception]]
+
+class AsyncTTSave:
+    def __init__(self, driver_class: Type[webdriver.Chrome], options: webdriver.ChromeOptions, download_dir: str, debug_mode: bool = False, driver_path: str = None, pool_size: int = 2, max_concurrency: int = 32, max_workers: int = 4, timeout: Optional[float] = None, timeouts: Optional[Dict[str, float]] = None, observers: Optional[List[Observer]] = None, lean: Optional[LeanProfile] = None):
+        """Асинхронный загрузчик для использования внутри event loop (например, в Telegram ботах).
+
+        Страницы и медиафайлы скачиваются через `aiohttp`, не блокируя event loop.
+        Если данные не удалось получить из HTML страницы, работа с Web Driver
+        выполняется в отдельном пуле потоков размером `pool_size`.
+
+        Args:
+            driver_class (Type[webdriver.Chrome]): Класс Web Driver (например, Chrome или Firefox).
+            options (webdriver.ChromeOptions): Опции для Web Driver.
+            download_dir (str): Папка для загрузки контента.
+            debug_mode (bool, optional): Режим отладки. По умолчанию False.
+            driver_path (str, optional): Путь к исполняемому файлу Web Driver.
+            pool_size (int, optional): Количество веб-драйверов и потоков для работы с ними. По умолчанию 2.
+            max_concurrency (int, optional): Максимальное количество одновременных загрузок. По умолчанию 32.
+            max_workers (int, optional): Количество файлов одной загрузки, которые скачиваются одновременно. По умолчанию 4.
+            timeout (Optional[float], optional): Таймаут одной загрузки в секундах по умолчанию. По умолчанию без ограничения.
+            timeouts (Optional[Dict[str, float]], optional): Таймауты ожидания элементов для Web Driver (см. `TTSave`).
+            observers (Optional[List[Observer]], optional): Получатели замеров этапов (см. `ttsave.metrics`).
+            lean (Optional[LeanProfile], optional): Облегченный профиль браузера для драйверов пула (см. `ttsave.lean`).
+
+        Examples:
+            >>> async with AsyncTTSave(webdriver.Chrome, webdriver.ChromeOptions(), "/path/to/download") as ttsave:
+            >>>     result = await ttsave.download("https://www.tiktok.com/@example/video/1234567890", timeout=60)
+            >>>     async for url, result, error in ttsave.download_many(urls):
+            >>>         print(url, result or error)
+        """
+        self.driver_class: Type[webdriver.Chrome] = driver_class
+        self.options: webdriver.ChromeOptions = options
+        self.download_dir: str = download_dir
+        self.debug_mode: bool = debug_mode
+        self.driver_path = driver_path
+        self.max_concurrency: int = max_concurrency
+        self.max_workers: int = max(1, max_workers)
+        self.timeout: Optional[float] = timeout
+        self.timeouts: Optional[Dict[str, float]] = timeouts
+
+        self.tracer: Tracer = Tracer(observers)
+        self.utils: Utils = Utils(debug_mode=debug_mode)
+        self.debug_out: callable = self.utils.debug_out
+        self.clear_file_name: callable = self.utils.clear_file_name
+
+        self.pool: DriverPool = DriverPool(driver_class, options, download_dir, size=pool_size,
+                                           debug_mode=debug_mode, driver_path=driver_path, lean=lean)
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=pool_size,
+                                                                thread_name_prefix="ttsave-driver")
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._driver_session = create_session(pool_size=pool_size)
+
+    async def _client(self) -> "aiohttp.ClientSession":
+        if self._session is None:
+            try:
+                import aiohttp
+            except ImportError as e:
+                raise ImportError("AsyncTTSave requires aiohttp: pip install ttsave[async]") from e
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency * self.max_workers)
+            self._session = aiohttp.ClientSession(headers=DEFAULT_HEADERS, connector=connector)
+        return self._session
+
+    async def download(self, url: str, timeout: Optional[float] = None, sink: Optional[Sink] = None) -> Optional[Dict[str, Union[str, List[str]]]]:
+        """Загружает контент по ссылке и возвращает тот же словарь, что и `TTSave.download()`.
+
+        Задачу можно отменить через `task.cancel()`. Работа Web Driver в потоке при этом
+        не прерывается, но ее результат отбрасывается, а драйвер возвращается в пул.
+
+        Args:
+            url (str): Ссылка на TikTok видео, фото или музыку.
+            timeout (Optional[float], optional): Таймаут загрузки в секундах. По умолчанию используется `self.timeout`.
+            sink (Optional[Sink], optional): Куда передавать медиа вместо `download_dir` (см. `TTSave` и `ttsave.sinks`).
+
+        Raises:
+            asyncio.TimeoutError: Если загрузка не завершилась за `timeout` секунд.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        async with self._semaphore:
+            if timeout is None:
+                return await self._download(url, sink)
+            return await asyncio.wait_for(self._download(url, sink), timeout)
+
+    async def download_many(self, urls: Iterable[str], timeout: Optional[float] = None) -> AsyncIterator[DownloadResult]:
+        """Загружает контент по нескольким ссылкам, отдавая результаты по мере готовности.
+
+        Одновременно выполняется не больше `max_concurrency` загрузок. Если перестать
+        итерировать генератор, незавершенные загрузки отменяются.
+
+        Yields:
+            Tuple[str, Optional[Dict], Optional[Exception]]: Ссылка, результат и ошибка (одно из двух всегда None).
+        """
+        urls = iter(urls)
+        pending: Dict[asyncio.Task, str] = {}
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.max_concurrency:
+                    try:
+                        url = next(urls)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[asyncio.ensure_future(self.download(url, timeout))] = url
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = pending.pop(task)
+                    try:
+                        yield url, task.result(), None
+                    except Exception as e:
+                        yield url, None, e
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def fetch_metadata(self, url: str, timeout: Optional[float] = None) -> Dict:
+        """Возвращает данные о контенте без скачивания медиа (см. `TTSave.fetch_metadata`).
+
+        Args:
+            url (str): Ссылка на TikTok видео, фото или музыку.
+            timeout (Optional[float], optional): Таймаут в секундах. По умолчанию используется `self.timeout`.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        async with self._semaphore:
+            if timeout is None:
+                return await self._fetch_metadata(url)
+            return await asyncio.wait_for(self._fetch_metadata(url), timeout)
+
+    async def _fetch_metadata(self, url: str) -> Dict:
+        url, content_type, info = await self._info(url)
+        return build_metadata(info, url, self.clear_file_name)
+
+    async def _download(self, url: str, sink: Optional[Sink] = None) -> Dict[str, Union[str, List[str]]]:
+        url, content_type, info = await self._info(url)
+        try:
+            jobs: List[Tuple[str, str]] = media_jobs(info, self.clear_file_name)
+            if sink is not None:
+                streamed: List[Dict] = await self._stream_many(jobs, sink)
+                return {**build_result(info, [], url), "streamed": streamed}
+            files: List[str] = await self._save_many(jobs)
+            return build_result(info, files, url)
+        except Exception as e:
+            raise CONTENT_ERRORS[content_type](str(e), self.utils)
+
+    async def _info(self, url: str) -> Tuple[str, str, Dict]:
+        """Загружает страницу и возвращает канонический URL, тип контента и данные о нем."""
+        if not url:
+            raise URLNotProvidedError(self.utils)
+        client = await self._client()
+        with self.tracer.span("page.fetch", url=url):
+            async with client.get(url) as response:
+                response.raise_for_status()
+                page: str = await response.text()
+                url = str(response.url)
+        content_type: Optional[str] = classify_url(url)
+        if content_type is None:
+            raise UnsupportedURLError(url, self.utils)
+
+        info: Optional[Dict] = extract_info(page, url, content_type, self.utils)
+        if info is None:
+            loop = asyncio.get_running_loop()
+            info = await loop.run_in_executor(self._executor, self._extract_with_driver, url, content_type)
+        return url, content_type, info
+
+    def _extract_with_driver(self, url: str, content_type: str) -> Dict:
+        with TTSave(url=url, driver_class=self.driver_class, options=self.options,
+                    download_dir=self.download_dir, debug_mode=self.debug_mode,
+                    driver_path=self.driver_path, pool=self.pool, timeouts=self.timeouts,
+                    use_http=False, session=self._driver_session,
+                    observers=self.tracer.observers) as ttsave:
+            try:
+                return ttsave._extract(content_type)
+            except Exception as e:
+                raise CONTENT_ERRORS[content_type](str(e), self.utils)
+
+    async def _save_many(self, jobs: List[Tuple[str, str]]) -> List[str]:
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def save(url: str, file_name: str) -> str:
+            async with semaphore:
+                return await self._save_content(url, file_name)
+
+        return list(await asyncio.gather(*(save(url, file_name) for url, file_name in jobs)))
+
+    async def _stream_many(self, jobs: List[Tuple[str, str]], sink: Sink) -> List[Dict]:
+        if sink.single and len(jobs) > 1:
+            raise SingleFileSinkError(sink.name, len(jobs), self.utils)
+        if not sink.concurrent:
+            return [await self._stream_content(url, file_name, sink) for url, file_name in jobs]
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def stream(url: str, file_name: str) -> Dict:
+            async with semaphore:
+                return await self._stream_content(url, file_name, sink)
+
+        return list(await asyncio.gather(*(stream(url, file_name) for url, file_name in jobs)))
+
+    async def _stream_content(self, url: str, file_name: str, sink: Sink) -> Dict:
+        """Передает медиафайл в `sink` и возвращает его описание для `streamed`."""
+        client = await self._client()
+        stream = sink.open(file_name, url)
+        written: int = 0
+        try:
+            with self.tracer.span("transfer", url=url, sink=sink.name) as span:
+                started: float = time.monotonic()
+                async with client.get(url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        await stream.awrite(chunk)
+                        written += len(chunk)
+                    expected: Optional[int] = response.content_length
+                    if response.headers.get("Content-Encoding", "identity") != "identity":
+                        expected = None
+                if expected is not None and written != expected:
+                    raise IOError(f"Content-Length mismatch: expected {expected} bytes, got {written}")
+                if span:
+                    elapsed: float = time.monotonic() - started
+                    span.set(bytes=written, throughput=written / elapsed if elapsed else 0.0)
+            details: Optional[Dict] = await stream.aclose()
+        except BaseException as e:
+            await stream.aabort(e)
+            if isinstance(e, Exception):
+                raise DownloadError(file_name, str(e), self.utils)
+            raise
+        self.debug_out(f"File streamed to {sink.name}: {file_name} ({written} bytes)")
+        return {"file_name": file_name, "url": url, "bytes": written, "sink": sink.name, **(details or {})}
+
+    async def _save_content(self, url: str, file_name: str) -> str:
+        file_path: str = f"{self.download_dir}/{self.clear_file_name(file_name)}"
+        if is_downloaded(file_path):
+            self.debug_out(f"File already exists: {file_path}")
+            return file_path
+        client = await self._client()
+        loop = asyncio.get_running_loop()
+        fd, temp_path = tempfile.mkstemp(dir=self.download_dir, prefix=".ttsave-", suffix=".part")
+        try:
+            written: int = 0
+            with self.tracer.span("transfer", url=url, file=file_path) as span:
+                started: float = time.monotonic()
+                with os.fdopen(fd, "wb") as f:
+                    # Запись на диск блокирует, поэтому блоки копятся и пишутся в потоке, не останавливая event loop.
+                    buffer: List[bytes] = []
+                    buffered: int = 0
+                    async with client.get(url) as response:
+                        response.raise_for_status()
+                        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                            buffer.append(chunk)
+                            buffered += len(chunk)
+                            written += len(chunk)
+                            if buffered >= WRITE_BUFFER_SIZE:
+                                await loop.run_in_executor(None, f.writelines, buffer)
+                                buffer, buffered = [], 0
+                        await loop.run_in_executor(None, f.writelines, buffer)
+                        expected: Optional[int] = response.content_length
+                        if response.headers.get("Content-Encoding", "identity") != "identity":
+                            expected = None
+                if expected is not None and written != expected:
+                    raise IOError(f"Content-Length mismatch: expected {expected} bytes, got {written}")
+                os.replace(temp_path, file_path)
+                if span:
+                    elapsed: float = time.monotonic() - started
+                    span.set(bytes=written, throughput=written / elapsed if elapsed else 0.0)
+        except BaseException as e:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            if isinstance(e, Exception):
+                raise DownloadError(file_name, str(e), self.utils)
+            raise
+        self.debug_out(f"File saved: {file_path} ({written} bytes)")
+        return file_path
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.pool.close)
+        self._executor.shutdown(wait=False)
+        self._driver_session.close()
+
+    async def __aenter__(self) -> "AsyncTTSave":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
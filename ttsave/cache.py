@@ -0,0 +1,156 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+# ioctl FICLONE из linux/fs.h: копия файла, которая делит блоки с оригиналом (Btrfs, XFS).
+FICLONE: int = 0x40049409
+
+
+def url_key(url: str) -> str:
+    """Ключ медиа по ссылке без параметров запроса: подпись CDN меняется, а объект тот же."""
+    parts = urlsplit(url)
+    return f"url:{parts.netloc}{parts.path}"
+
+
+def _reflink(source: str, target: str) -> None:
+    import fcntl
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def place_file(source: str, target: str) -> str:
+    """Создает `target` с содержимым `source` без копирования данных, если это возможно.
+
+    Сначала пробует жесткую ссылку, затем reflink (FICLONE), и только потом обычную копию.
+    Файл появляется под итоговым именем атомарно.
+
+    Returns:
+        str: Способ: `hardlink`, `reflink` или `copy`.
+    """
+    temp_path: str = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            os.link(source, temp_path)
+            method = "hardlink"
+        except OSError:
+            try:
+                _reflink(source, temp_path)
+                method = "reflink"
+            except (OSError, ImportError):
+                shutil.copyfile(source, temp_path)
+                method = "copy"
+        os.replace(temp_path, target)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return method
+
+
+class ContentCache:
+    def __init__(self, directory: str, max_bytes: int = 2 * 1024 ** 3):
+        """Общий кеш медиафайлов на диске с ограничением по размеру и вытеснением давно не использованных (LRU).
+
+        Одна и та же музыка встречается в тысячах видео и слайдшоу, поэтому ее дорожка
+        хранится один раз по ключу `music:<id>` (см. `ttsave.urls.item_key`), а остальные
+        файлы — по ссылке без подписи (`url_key`). При попадании файл появляется в
+        `download_dir` как жесткая ссылка или reflink на объект кеша, без передачи и без
+        копии на диске. Чтобы это работало, кеш должен быть на той же файловой системе,
+        что и `download_dir`; иначе файл копируется.
+
+        Args:
+            directory (str): Папка кеша. Индекс хранится в `index.sqlite3`, файлы — в `objects`.
+            max_bytes (int, optional): Максимальный суммарный размер файлов в кеше в байтах. По умолчанию 2 ГБ.
+
+        Examples:
+            >>> cache = ContentCache(os.path.join("/path/to/download", ".ttsave-cache"), max_bytes=5 * 1024 ** 3)
+            >>> engine = TTSaveEngine(..., cache=cache)
+            >>> print(cache.stats())
+        """
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self.objects_dir: str = os.path.join(directory, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock: threading.Lock = threading.Lock()
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"), check_same_thread=False, timeout=30)
+        self._counts: Dict[str, int] = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0, "bytes_saved": 0}
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, name TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+
+    def _object_path(self, name: str) -> str:
+        return os.path.join(self.objects_dir, name)
+
+    def get(self, key: str, target: str) -> Optional[str]:
+        """Если `key` есть в кеше, создает `target` из кешированного файла и возвращает способ (`hardlink`, `reflink`, `copy`), иначе None."""
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT name, size FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._connection.execute("UPDATE entries SET used = ? WHERE key = ?", (time.time(), key))
+        if row is None:
+            with self._lock:
+                self._counts["misses"] += 1
+            return None
+        name, size = row
+        try:
+            method = place_file(self._object_path(name), target)
+        except FileNotFoundError:
+            with self._lock, self._connection:
+                self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._counts["misses"] += 1
+            return None
+        with self._lock:
+            self._counts["hits"] += 1
+            self._counts["bytes_saved"] += size
+        return method
+
+    def put(self, key: str, source: str) -> None:
+        """Добавляет скачанный файл в кеш (жесткой ссылкой, если возможно) и вытесняет старые записи сверх `max_bytes`."""
+        size: int = os.path.getsize(source)
+        if size > self.max_bytes:
+            return
+        name: str = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        place_file(source, self._object_path(name))
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (key, name, size, used) VALUES (?, ?, ?, ?)",
+                (key, name, size, time.time()))
+            self._counts["stored"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        total: int = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, name, size in self._connection.execute(
+                "SELECT key, name, size FROM entries ORDER BY used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                os.remove(self._object_path(name))
+            except OSError:
+                pass
+            total -= size
+            self._counts["evicted"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий и промахов, сэкономленные байты и текущий размер кеша."""
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes, **self._counts}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,131 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Поля, которые читаются со страницы через Web Driver, по типу контента.
+# css: CSS-селектор; attr: свойство элемента (`text` — видимый текст);
+# all: собрать значения всех найденных элементов; optional: не ждать появления поля.
+SELECTORS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "video": {
+        "video_url": {"css": "video", "attr": "src"},
+        "description": {"css": "meta[property='og:description']", "attr": "content"},
+        "author_username": {"css": ".css-1c7urt-SpanUniqueId.evv7pft1", "attr": "text"},
+        "music_uri": {"css": ".epjbyn1.css-v80f7r-StyledLink-StyledLink.er1vbsz0", "attr": "href"},
+    },
+    "photo": {
+        "description": {"css": "meta[property='og:description']", "attr": "content"},
+        "photo_urls": {"css": ".css-brxox6-ImgPhotoSlide.e10jea832", "attr": "src", "all": True},
+        "author_username": {"css": ".css-1c7urt-SpanUniqueId.evv7pft1", "attr": "text"},
+        "music_uri": {"css": ".epjbyn1.css-v80f7r-StyledLink-StyledLink.er1vbsz0", "attr": "href"},
+        "audio_url": {"css": "audio", "attr": "src"},
+    },
+    "music": {
+        "author_name": {"css": ".css-22xkqc-StyledLink.er1vbsz0", "attr": "text"},
+        "author_url": {"css": ".css-22xkqc-StyledLink.er1vbsz0", "attr": "href"},
+        "clip_count": {"css": "strong[style='font-weight: normal;']", "attr": "text"},
+        "clips": {"css": ".css-1wrhn5c-AMetaCaptionLine.eih2qak0", "attr": "href", "all": True, "optional": True},
+        "thumb_style": {"css": ".css-uur1tb-DivMusicCardContainer.ervjp3i1", "attr": "style"},
+        "music_url": {"css": "video", "attr": "src"},
+    },
+}
+
+# Ссылки на видео и фото в сетке профиля.
+PROFILE_ITEMS_CSS: str = "a[href*='/video/'], a[href*='/photo/']"
+
+EXTRACT_SCRIPT: str = """
+const table = arguments[0];
+const read = (element, attr) => {
+    if (attr === 'text') {
+        return (element.innerText || element.textContent || '').trim();
+    }
+    const value = element[attr];
+    return typeof value === 'string' ? value : element.getAttribute(attr);
+};
+const fields = {};
+for (const [field, spec] of Object.entries(table)) {
+    if (spec.all) {
+        fields[field] = Array.from(document.querySelectorAll(spec.css))
+            .map((element) => read(element, spec.attr))
+            .filter(Boolean);
+    } else {
+        const element = document.querySelector(spec.css);
+        fields[field] = element ? read(element, spec.attr) : null;
+    }
+}
+return fields;
+"""
+
+
+def fields_ready(content_type: str, fields: List[str]) -> Callable:
+    """Условие ожидания: за один вызов скрипта читает все поля `content_type`
+    и возвращает их, когда все поля из `fields` не пустые."""
+    table = SELECTORS[content_type]
+
+    def condition(driver):
+        values: Dict[str, Any] = driver.execute_script(EXTRACT_SCRIPT, table)
+        if all(values.get(field) for field in fields):
+            return values
+        return False
+    return condition
+
+
+def required_fields(content_type: str) -> List[str]:
+    return [field for field, spec in SELECTORS[content_type].items() if not spec.get("optional")]
+
+# Отдает ссылки, которые еще не были прочитаны, помечает их
+# и прокручивает страницу вниз, чтобы TikTok подгрузил следующую порцию.
+HARVEST_SCRIPT: str = """
+const css = arguments[0];
+const hrefs = [];
+for (const element of document.querySelectorAll(css)) {
+    if (element.hasAttribute('data-ttsave-seen')) {
+        continue;
+    }
+    element.setAttribute('data-ttsave-seen', '1');
+    if (element.href) {
+        hrefs.push(element.href);
+    }
+}
+window.scrollTo(0, document.documentElement.scrollHeight);
+return hrefs;
+"""
+
+
+def new_links(css: str) -> Callable:
+    """Условие ожидания: возвращает новые ссылки, как только они появились на странице."""
+    def condition(driver):
+        return driver.execute_script(HARVEST_SCRIPT, css) or False
+    return condition
+
+
+def harvest_links(driver, css: str, stall_timeout: float, limit: Optional[int] = None, deadline: Optional[float] = None, dedupe_window: int = 100_000) -> Iterator[str]:
+    """Прокручивает страницу и отдает новые ссылки из элементов `css` по мере подгрузки.
+
+    Останавливается после `limit` ссылок, после `deadline` (по `time.monotonic()`)
+    или если за `stall_timeout` секунд не появилось ни одной новой ссылки.
+    Дубли отсеиваются по последним `dedupe_window` ссылкам.
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+    seen: OrderedDict = OrderedDict()
+    yielded: int = 0
+    while limit is None or yielded < limit:
+        stall: float = stall_timeout
+        if deadline is not None:
+            stall = min(stall, deadline - time.monotonic())
+            if stall <= 0:
+                return
+        try:
+            batch: List[str] = WebDriverWait(driver, stall, poll_frequency=0.25).until(new_links(css))
+        except TimeoutException:
+            return
+        for url in batch:
+            if url in seen:
+                continue
+            seen[url] = None
+            if len(seen) > dedupe_window:
+                seen.popitem(last=False)
+            yield url
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
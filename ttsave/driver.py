@@ -0,0 +1,97 @@
+from __future__ import annotations
+import copy
+from typing import TYPE_CHECKING, Any, Dict, Optional, Type
+from ttsave.lean import PERFORMANCE_LOG, LeanProfile
+from ttsave.supervisor import owner_argument
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+def import_webdriver():
+    """Импортирует `selenium.webdriver`, который нужен только если данные не удалось получить без браузера."""
+    try:
+        from selenium import webdriver
+    except ImportError as e:
+        raise ImportError("WebDriver support requires selenium: pip install ttsave[browser]") from e
+    return webdriver
+
+
+def create_driver(driver_class: Type[webdriver.Chrome], options: webdriver.ChromeOptions, download_dir: str, debug_mode: bool = False, driver_path: str = None, lean: Optional[LeanProfile] = None) -> webdriver.Chrome:
+    """Запуск нового экземпляра Web Driver с настройками TTSave.
+
+    Опции копируются перед изменением, поэтому один и тот же объект `options`
+    можно использовать для запуска нескольких драйверов. Chrome запускается с
+    аргументом `ttsave.supervisor.OWNER_ARG`, чтобы браузеры упавшего процесса
+    можно было найти и завершить.
+
+    Args:
+        driver_class (Type[webdriver.Chrome]): Класс Web Driver (например, Chrome или Firefox).
+        options (webdriver.ChromeOptions): Опции для Web Driver.
+        download_dir (str): Папка для загрузки контента.
+        debug_mode (bool, optional): Режим отладки. Если выключен, браузер запускается в headless режиме.
+        driver_path (str, optional): Путь к исполняемому файлу Web Driver.
+        lean (Optional[LeanProfile], optional): Облегченный профиль: не загружать картинки, шрифты, медиа и сторонние скрипты.
+
+    Returns:
+        webdriver.Chrome: Запущенный экземпляр Web Driver.
+    """
+    options = copy.deepcopy(options)
+    webdriver = import_webdriver()
+    lean_prefs: Dict[str, Any] = lean.apply_options(options, driver_class == webdriver.Chrome) if lean else {}
+    if driver_class == webdriver.Chrome:
+        prefs: Dict[str, Any] = {
+            "download.default_directory": download_dir,
+            **lean_prefs,
+        }
+        options.add_experimental_option("prefs", prefs)
+        options.add_argument(owner_argument())
+        # События сети для `page_weight`: в отличие от Resource Timing, в них есть размер ресурсов с других доменов.
+        options.set_capability("goog:loggingPrefs", {PERFORMANCE_LOG: "ALL"})
+    if driver_class == webdriver.Firefox:
+        profile = webdriver.FirefoxProfile()
+        profile.set_preference("browser.download.folderList", 2)
+        profile.set_preference("browser.download.manager.showWhenStarting", False)
+        profile.set_preference("browser.download.dir", download_dir)
+        profile.set_preference("browser.helperApps.neverAsk.saveToDisk", "video/mp4")
+
+    if not debug_mode:
+        options.add_argument("--headless")
+    else:
+        options.add_argument("--start-maximized")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--mute-audio")
+    options.add_argument("--disable-dev-shm-usage")
+
+    driver = driver_class(options=options, service=driver_path)
+    if lean:
+        lean.apply_driver(driver)
+    return driver
+
+
+def reset_driver(driver: webdriver.Chrome) -> None:
+    """Сброс состояния драйвера перед повторным использованием.
+
+    Закрывает лишние вкладки, очищает cookies и хранилища страницы
+    и переходит на `about:blank`.
+    """
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+    if hasattr(driver, "execute_cdp_cmd"):
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    else:
+        driver.delete_all_cookies()
+    try:
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    except Exception:
+        pass
+    driver.get("about:blank")
+    try:
+        # Журнал копится, пока его не прочитают, а у драйвера из пула замеры могут быть выключены.
+        driver.get_log(PERFORMANCE_LOG)
+    except Exception:
+        pass
@@ -0,0 +1,173 @@
+from __future__ import annotations
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+from ttsave.pool import DriverPool
+from ttsave.session import create_session
+from ttsave.resolver import RedirectCache, URLResolver
+from ttsave.scheduler import TransferScheduler
+from ttsave.supervisor import DriverSupervisor
+from ttsave.index import DownloadIndex
+from ttsave.cache import ContentCache
+from ttsave.metrics import Observer
+from ttsave.lean import LeanProfile
+from ttsave.transfer import PARTIAL_DIR, remove_stale_partials
+from ttsave.ttsave import TTSave
+from ttsave.utils import Utils
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from ttsave.sinks import Sink
+
+DownloadResult = Tuple[str, Optional[Dict[str, Union[str, List[str]]]], Optional[Exception]]
+
+
+class TTSaveEngine:
+    def __init__(self, driver_class: Type[webdriver.Chrome], options: webdriver.ChromeOptions, download_dir: str, pool_size: int = 2, debug_mode: bool = False, driver_path: str = None, warm: bool = False, use_http: bool = True, max_workers: int = 4, index: Optional[DownloadIndex] = None, observers: Optional[List[Observer]] = None, lean: Optional[LeanProfile] = None, scheduler: Optional[TransferScheduler] = None, resume: bool = True, segments: int = 1, cache: Optional[ContentCache] = None, supervisor: Optional[DriverSupervisor] = None):
+        """Долгоживущий загрузчик, который держит пул прогретых веб-драйверов.
+
+        В отличие от `TTSave`, движок не привязан к одной ссылке: драйвер берется из пула
+        на время загрузки и возвращается обратно, поэтому запуск браузера
+        не повторяется для каждой ссылки.
+
+        Args:
+            driver_class (Type[webdriver.Chrome]): Класс Web Driver (например, Chrome или Firefox).
+            options (webdriver.ChromeOptions): Опции для Web Driver.
+            download_dir (str): Папка для загрузки контента.
+            pool_size (int, optional): Количество драйверов в пуле и одновременных загрузок. По умолчанию 2.
+            debug_mode (bool, optional): Режим отладки. По умолчанию False.
+            driver_path (str, optional): Путь к исполняемому файлу Web Driver.
+            warm (bool, optional): Запустить все драйверы сразу при создании движка. По умолчанию False.
+            use_http (bool, optional): Сначала пытаться получить данные без браузера (см. `TTSave`). По умолчанию True.
+            max_workers (int, optional): Количество файлов одной загрузки, которые скачиваются одновременно. По умолчанию 4.
+            index (Optional[DownloadIndex], optional): Индекс скачанного контента, общий для всех загрузок (см. `TTSave`).
+            observers (Optional[List[Observer]], optional): Получатели замеров этапов всех загрузок (см. `ttsave.metrics`).
+            lean (Optional[LeanProfile], optional): Облегченный профиль браузера для драйверов пула (см. `ttsave.lean`).
+            scheduler (Optional[TransferScheduler], optional): Лимиты по хостам и повторы запросов для всех загрузок (см. `ttsave.scheduler`). По умолчанию `TransferScheduler.shared()`.
+            resume (bool, optional): Продолжать недокачанные файлы запросами `Range` (см. `TTSave`). Недокачанные файлы старше недели удаляются при создании движка. По умолчанию True.
+            segments (int, optional): На сколько частей делить большие файлы (см. `TTSave`). По умолчанию 1.
+            cache (Optional[ContentCache], optional): Общий кеш музыки для всех загрузок (см. `ttsave.cache`).
+            supervisor (Optional[DriverSupervisor], optional): Ограничение времени одной загрузки и памяти драйверов пула; зависшие и разросшиеся драйверы заменяются (см. `ttsave.supervisor`).
+
+        Examples:
+            >>> with TTSaveEngine(webdriver.Chrome, webdriver.ChromeOptions(), "/path/to/download", pool_size=4) as engine:
+            >>>     result = engine.download("https://www.tiktok.com/@example/video/1234567890")
+            >>>     for url, result, error in engine.download_many(urls):
+            >>>         print(url, result or error)
+        """
+        self.driver_class: Type[webdriver.Chrome] = driver_class
+        self.options: webdriver.ChromeOptions = options
+        self.download_dir: str = download_dir
+        self.debug_mode: bool = debug_mode
+        self.driver_path = driver_path
+        self.use_http: bool = use_http
+        self.max_workers: int = max_workers
+        self.index: Optional[DownloadIndex] = index
+        self.observers: List[Observer] = list(observers or [])
+        self.scheduler: TransferScheduler = scheduler or TransferScheduler.shared()
+        self.resume: bool = resume
+        self.segments: int = segments
+        self.cache: Optional[ContentCache] = cache
+
+        self.utils: Utils = Utils(debug_mode=debug_mode)
+        self.debug_out: callable = self.utils.debug_out
+
+        self.pool: DriverPool = DriverPool(driver_class, options, download_dir, size=pool_size,
+                                           debug_mode=debug_mode, driver_path=driver_path, lean=lean,
+                                           supervisor=supervisor)
+        self.supervisor: DriverSupervisor = self.pool.supervisor
+        self.session = create_session(pool_size=pool_size * max_workers)
+        self.resolver: URLResolver = URLResolver(self.session, self.utils, RedirectCache.shared(), scheduler=self.scheduler)
+        if resume:
+            remove_stale_partials(os.path.join(download_dir, PARTIAL_DIR))
+        if warm:
+            self.pool.warm()
+
+    def _ttsave(self, url: str, sink: Optional[Sink] = None) -> TTSave:
+        return TTSave(
+            url=url,
+            driver_class=self.driver_class,
+            options=self.options,
+            download_dir=self.download_dir,
+            debug_mode=self.debug_mode,
+            driver_path=self.driver_path,
+            pool=self.pool,
+            use_http=self.use_http,
+            session=self.session,
+            max_workers=self.max_workers,
+            resolver=self.resolver,
+            index=self.index,
+            observers=self.observers,
+            scheduler=self.scheduler,
+            resume=self.resume,
+            segments=self.segments,
+            cache=self.cache,
+            sink=sink
+        )
+
+    def download(self, url: str, sink: Optional[Sink] = None) -> Optional[Dict[str, Union[str, List[str]]]]:
+        """Загружает контент по одной ссылке, используя драйвер из пула.
+
+        Если указан `sink`, медиа передается в него, а не в `download_dir` (см. `ttsave.sinks`).
+        """
+        with self._ttsave(url, sink) as ttsave:
+            return ttsave.download()
+
+    def fetch_metadata(self, url: str) -> Dict:
+        """Возвращает данные о контенте без скачивания медиа (см. `TTSave.fetch_metadata`)."""
+        with self._ttsave(url) as ttsave:
+            return ttsave.fetch_metadata()
+
+    def iter_music_clips(self, url: str, limit: Optional[int] = None, timeout: Optional[float] = None) -> Iterator[str]:
+        """Отдает ссылки на клипы со страницы музыки по мере подгрузки (см. `TTSave.iter_music_clips`)."""
+        with self._ttsave(url) as ttsave:
+            yield from ttsave.iter_music_clips(limit=limit, timeout=timeout)
+
+    def download_many(self, urls: Iterable[str], workers: Optional[int] = None, metadata_only: bool = False) -> Iterator[DownloadResult]:
+        """Загружает контент по нескольким ссылкам параллельно.
+
+        Ссылки читаются из `urls` по мере освобождения исполнителей, поэтому
+        можно передавать генератор на тысячи элементов.
+
+        Args:
+            urls (Iterable[str]): Ссылки на TikTok контент.
+            workers (Optional[int], optional): Количество одновременных загрузок. По умолчанию равно размеру пула.
+            metadata_only (bool, optional): Только получить данные о контенте через `fetch_metadata()`, не скачивая медиа. По умолчанию False.
+
+        Yields:
+            Tuple[str, Optional[Dict], Optional[Exception]]: Ссылка, результат `download()` и ошибка
+            (одно из двух всегда None) в порядке завершения.
+        """
+        workers = workers or self.pool.size
+        task = self.fetch_metadata if metadata_only else self.download
+        urls = iter(urls)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending: Dict[Future, str] = {}
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < workers * 2:
+                    try:
+                        url = next(urls)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(task, url)] = url
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = pending.pop(future)
+                    try:
+                        yield url, future.result(), None
+                    except Exception as e:
+                        yield url, None, e
+
+    def close(self) -> None:
+        self.pool.close()
+        self.session.close()
+
+    def __enter__(self) -> "TTSaveEngine":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -47,3 +47,29 @@ class MusicDownloadError(_TTSaveError):
     """Ошибка при загрузке музыки."""
     def __init__(self, message: str, utils: Utils):
         super().__init__(f"Ошибка при загрузке музыки: {message}", utils)
+
+class DriverPoolTimeoutError(_TTSaveError):
+    """Ошибка: в пуле нет свободного веб-драйвера."""
+    def __init__(self, timeout: float, utils: Utils):
+        super().__init__(f"Не удалось получить веб-драйвер из пула за {timeout} с", utils)
+
+class DriverPoolClosedError(_TTSaveError):
+    """Ошибка: пул веб-драйверов закрыт."""
+    def __init__(self, utils: Utils):
+        super().__init__("Пул веб-драйверов закрыт", utils)
+
+class SingleFileSinkError(_TTSaveError):
+    """Ошибка: контент из нескольких файлов нельзя записать в один поток."""
+    def __init__(self, sink_name: str, count: int, utils: Utils):
+        super().__init__(f"Получатель {sink_name} принимает только один файл, а контент состоит из {count}", utils)
+
+class WorkerError(_TTSaveError):
+    """Ошибка в процессе-исполнителе."""
+    def __init__(self, message: str, utils: Utils):
+        super().__init__(f"Ошибка в процессе-исполнителе: {message}", utils)
+
+CONTENT_ERRORS = {
+    "video": VideoDownloadError,
+    "photo": PhotoDownloadError,
+    "music": MusicDownloadError,
+}
@@ -0,0 +1,181 @@
+from __future__ import annotations
+import html
+import json
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from urllib.parse import quote
+from ttsave.scheduler import TransferScheduler
+from ttsave.utils import Utils
+
+if TYPE_CHECKING:
+    import requests
+
+STATE_SCRIPT_RE = re.compile(
+    r'<script[^>]*id="(__UNIVERSAL_DATA_FOR_REHYDRATION__|SIGI_STATE)"[^>]*>(.*?)</script>', re.S)
+OG_DESCRIPTION_RE = re.compile(
+    r'<meta[^>]*property="og:description"[^>]*content="([^"]*)"', re.S)
+ITEM_ID_RE = re.compile(r"/(?:video|photo)/([0-9]+)")
+
+
+def parse_state(page: str) -> Optional[Dict[str, Any]]:
+    """Достает JSON-состояние, которое TikTok встраивает в HTML страницы.
+
+    Returns:
+        Optional[Dict[str, Any]]: Состояние страницы или None, если скрипт с состоянием не найден.
+    """
+    match = STATE_SCRIPT_RE.search(page)
+    if not match:
+        return None
+    return json.loads(match.group(2))
+
+
+def parse_og_description(page: str) -> Optional[str]:
+    match = OG_DESCRIPTION_RE.search(page)
+    return html.unescape(match.group(1)) if match else None
+
+
+def music_page_url(music: Dict[str, Any]) -> str:
+    """Собирает ссылку на страницу музыки так же, как она выглядит в ссылке на видео."""
+    slug = re.sub(r"[^\w]+", "-", music.get("title") or "original sound").strip("-")
+    return f"https://www.tiktok.com/music/{quote(slug)}-{music['id']}"
+
+
+def _item_struct(state: Dict[str, Any], url: str) -> Dict[str, Any]:
+    if "__DEFAULT_SCOPE__" in state:
+        return state["__DEFAULT_SCOPE__"]["webapp.video-detail"]["itemInfo"]["itemStruct"]
+    item_id = ITEM_ID_RE.search(url).group(1)
+    return state["ItemModule"][item_id]
+
+
+def _author_username(item: Dict[str, Any]) -> str:
+    author = item["author"]
+    return author["uniqueId"] if isinstance(author, dict) else author
+
+
+def video_info(state: Dict[str, Any], page: str, url: str) -> Dict[str, Any]:
+    item = _item_struct(state, url)
+    video = item["video"]
+    video_url: str = video.get("playAddr") or video["downloadAddr"]
+    return {
+        "type": "video",
+        "author_username": _author_username(item),
+        "description": parse_og_description(page) or item["desc"],
+        "video_url": video_url,
+        "music_uri": music_page_url(item["music"]),
+    }
+
+
+def photo_info(state: Dict[str, Any], page: str, url: str) -> Dict[str, Any]:
+    item = _item_struct(state, url)
+    photo_urls: List[str] = []
+    for image in item["imagePost"]["images"]:
+        photo_url: str = image["imageURL"]["urlList"][0]
+        if photo_url not in photo_urls:
+            photo_urls.append(photo_url)
+    if not photo_urls:
+        raise ValueError("no photo slides in page state")
+    return {
+        "type": "photo",
+        "author_username": _author_username(item),
+        "description": parse_og_description(page) or item["desc"],
+        "photo_urls": photo_urls,
+        "audio_url": item["music"]["playUrl"],
+        "music_uri": music_page_url(item["music"]),
+    }
+
+
+def music_info(state: Dict[str, Any], page: str, url: str) -> Dict[str, Any]:
+    if "__DEFAULT_SCOPE__" in state:
+        detail = state["__DEFAULT_SCOPE__"]["webapp.music-detail"]["musicInfo"]
+    else:
+        detail = state["MusicModule"]["musicInfo"]
+    music = detail["music"]
+    author = detail.get("author") or {}
+    author_id: str = author.get("uniqueId") or music["authorName"]
+    clips: List[str] = [
+        f"https://www.tiktok.com/@{_author_username(item)}/video/{item['id']}"
+        for item in detail.get("itemList", [])
+    ]
+    return {
+        "type": "music",
+        "author": {
+            "url": f"https://www.tiktok.com/@{author_id}",
+            "name": music["authorName"],
+        },
+        "thumb_url": music.get("coverLarge") or music.get("coverMedium") or music["coverThumb"],
+        "clip_count": int(detail["stats"]["videoCount"]),
+        "clips": clips,
+        "music_url": music["playUrl"],
+    }
+
+
+PARSERS = {
+    "video": video_info,
+    "photo": photo_info,
+    "music": music_info,
+}
+
+
+def extract_info(page: str, url: str, content_type: str, utils: Utils) -> Optional[Dict[str, Any]]:
+    """Разбирает HTML страницы и возвращает данные о контенте или None, если состояние не подходит.
+
+    Args:
+        page (str): HTML страницы.
+        url (str): Канонический URL страницы.
+        content_type (str): Тип контента: `video`, `photo` или `music`.
+        utils (Utils): Утилиты для отладки.
+    """
+    try:
+        state = parse_state(page)
+        if state is None:
+            utils.debug_out(f"No embedded state found on page: {url}")
+            return None
+        info = PARSERS[content_type](state, page, url)
+        utils.debug_out(f"Extracted {content_type} info from embedded state: {url}")
+        return info
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+        utils.debug_out(f"HTTP extraction failed, falling back to WebDriver: {e!r}")
+        return None
+
+
+class HTTPExtractor:
+    def __init__(self, session: requests.Session, utils: Utils, timeout: float = 15, scheduler: Optional[TransferScheduler] = None):
+        """Извлечение данных о контенте из HTML страницы без запуска браузера.
+
+        Args:
+            session (requests.Session): Сессия для запросов. Cookies страницы остаются в ней и используются при загрузке медиа.
+            utils (Utils): Утилиты для отладки.
+            timeout (float, optional): Таймаут запроса страницы в секундах. По умолчанию 15.
+            scheduler (Optional[TransferScheduler], optional): Лимиты и повторы запросов по хостам (см. `ttsave.scheduler`). Если не указан, запрос выполняется один раз.
+        """
+        self.session: requests.Session = session
+        self.utils: Utils = utils
+        self.timeout: float = timeout
+        self.scheduler: Optional[TransferScheduler] = scheduler
+
+    def _get(self, url: str) -> requests.Response:
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def fetch(self, url: str) -> requests.Response:
+        if self.scheduler is None:
+            return self._get(url)
+        return self.scheduler.call(url, lambda: self._get(url))
+
+    def extract(self, url: str, content_type: str, page: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Возвращает данные о контенте или None, если их не удалось получить из состояния страницы.
+
+        Args:
+            url (str): Канонический URL страницы.
+            content_type (str): Тип контента: `video`, `photo` или `music`.
+            page (Optional[str], optional): Уже загруженный HTML страницы. Если не указан, страница запрашивается.
+        """
+        if page is None:
+            import requests
+            try:
+                page = self.fetch(url).text
+            except requests.RequestException as e:
+                self.utils.debug_out(f"Page request failed, falling back to WebDriver: {e!r}")
+                return None
+        return extract_info(page, url, content_type, self.utils)
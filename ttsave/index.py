@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadIndex:
+    def __init__(self, path: str):
+        """Локальный индекс скачанного контента в SQLite.
+
+        Записи хранятся по ключу из `ttsave.urls.item_key` (числовой ID видео, фото
+        или музыки) вместе с результатом `download()` и путями, размерами и SHA-256
+        файлов. Повторный запрос того же контента возвращается из индекса без
+        запуска браузера и без сетевых запросов.
+
+        Args:
+            path (str): Путь к файлу базы данных.
+
+        Examples:
+            >>> index = DownloadIndex(DownloadIndex.default_path("/path/to/download"))
+            >>> ttsave = TTSave(..., index=index)
+        """
+        self.path: str = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock: threading.Lock = threading.Lock()
+        self._connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "key TEXT PRIMARY KEY, url TEXT NOT NULL, result TEXT NOT NULL, created REAL NOT NULL)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "key TEXT NOT NULL, position INTEGER NOT NULL, path TEXT NOT NULL, "
+                "size INTEGER NOT NULL, sha256 TEXT NOT NULL, PRIMARY KEY (key, position))")
+
+    @staticmethod
+    def default_path(download_dir: str) -> str:
+        return os.path.join(download_dir, ".ttsave-index.sqlite3")
+
+    def _files_valid(self, files: List[tuple], verify: bool) -> bool:
+        for path, size, sha256 in files:
+            try:
+                if os.path.getsize(path) != size:
+                    return False
+                if verify and file_sha256(path) != sha256:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def get(self, key: str, verify: bool = False) -> Optional[Dict[str, Any]]:
+        """Возвращает сохраненный результат или None.
+
+        Всегда проверяется, что файлы существуют и их размер не изменился.
+        Запись, которая не прошла проверку, удаляется из индекса.
+
+        Args:
+            key (str): Ключ контента.
+            verify (bool, optional): Дополнительно пересчитать SHA-256 файлов. По умолчанию False.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT result FROM items WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            files = self._connection.execute(
+                "SELECT path, size, sha256 FROM files WHERE key = ? ORDER BY position", (key,)).fetchall()
+        if not self._files_valid(files, verify):
+            self.remove(key)
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, url: str, result: Dict[str, Any]) -> None:
+        """Сохраняет результат `download()` вместе с размерами и контрольными суммами файлов."""
+        files = [
+            (key, position, path, os.path.getsize(path), file_sha256(path))
+            for position, path in enumerate(result.get("files", []))
+        ]
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM files WHERE key = ?", (key,))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO items (key, url, result, created) VALUES (?, ?, ?, ?)",
+                (key, url, json.dumps(result, ensure_ascii=False), time.time()))
+            self._connection.executemany(
+                "INSERT INTO files (key, position, path, size, sha256) VALUES (?, ?, ?, ?, ?)", files)
+
+    def owner(self, file_path: str) -> Optional[str]:
+        """Ключ контента, среди файлов которого записан `file_path`, или None."""
+        with self._lock:
+            row = self._connection.execute("SELECT key FROM files WHERE path = ?", (file_path,)).fetchone()
+        return row[0] if row is not None else None
+
+    def remove(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM files WHERE key = ?", (key,))
+            self._connection.execute("DELETE FROM items WHERE key = ?", (key,))
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
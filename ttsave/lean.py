@@ -0,0 +1,167 @@
+from __future__ import annotations
+import json
+from fnmatch import fnmatch
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+FONT_PATTERNS: List[str] = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"]
+IMAGE_PATTERNS: List[str] = ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.heic"]
+# Медиа CDN TikTok: сегменты видео, которые плеер начинает качать сразу после загрузки страницы.
+MEDIA_PATTERNS: List[str] = ["*.mp4*", "*.m4a*", "*.mp3*", "*.m3u8*", "*/video/tos/*", "*mime_type=video*"]
+THIRD_PARTY_PATTERNS: List[str] = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*analytics.tiktok.com*",
+    "*mon.tiktokv.com*",
+    "*mcs.tiktokw.us*",
+    "*sf16-website-login.neutral.ttwstatic.com*",
+]
+
+# Журнал Chrome с событиями CDP Network, по которому считается вес страницы.
+PERFORMANCE_LOG: str = "performance"
+
+# Суммарный размер ресурсов страницы по Resource Timing API, если журнала нет.
+PAGE_WEIGHT_SCRIPT: str = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+let bytes = 0;
+for (const entry of entries) {
+    bytes += entry.transferSize || 0;
+}
+return {bytes: bytes, resources: entries.length};
+"""
+
+
+class LeanProfile:
+    def __init__(self, block_images: bool = True, block_fonts: bool = True, block_media: bool = True, block_third_party: bool = True, block: Optional[Iterable[str]] = None, allow: Optional[Iterable[str]] = None, page_load_strategy: str = "eager"):
+        """Облегченный профиль браузера: страница загружается без ресурсов, которые TTSave не читает.
+
+        Нужны только атрибуты элементов (`src`, `href`, текст), поэтому картинки, шрифты,
+        медиа и сторонние скрипты не скачиваются. Атрибуты `src` при этом остаются на месте.
+        Для Chrome блокировка выполняется через CDP `Network.setBlockedURLs`; для Firefox
+        отключаются только картинки, шрифты и автозагрузка медиа через настройки профиля.
+
+        Args:
+            block_images (bool, optional): Не загружать картинки. По умолчанию True.
+            block_fonts (bool, optional): Не загружать шрифты. По умолчанию True.
+            block_media (bool, optional): Не загружать видео и аудио, которые плеер начинает качать сам. По умолчанию True.
+            block_third_party (bool, optional): Не загружать аналитику и рекламные скрипты. По умолчанию True.
+            block (Optional[Iterable[str]], optional): Дополнительные шаблоны URL для блокировки (`*` — любая строка).
+            allow (Optional[Iterable[str]], optional): Шаблоны URL, которые нужно загружать, даже если они попадают под блокировку. Шаблон блокировки удаляется, если он совпадает с шаблоном из `allow`.
+            page_load_strategy (str, optional): Стратегия загрузки страницы Web Driver. `eager` не ждет картинок и подресурсов. По умолчанию `eager`.
+
+        Examples:
+            >>> lean = LeanProfile(allow=["*.webp"], block=["*cdn.example.com*"])
+            >>> engine = TTSaveEngine(webdriver.Chrome, webdriver.ChromeOptions(), "/path/to/download", lean=lean)
+        """
+        self.block_images: bool = block_images
+        self.block_fonts: bool = block_fonts
+        self.block_media: bool = block_media
+        self.block_third_party: bool = block_third_party
+        self.block: List[str] = list(block or [])
+        self.allow: List[str] = list(allow or [])
+        self.page_load_strategy: str = page_load_strategy
+
+    def blocked_urls(self) -> List[str]:
+        """Шаблоны URL для `Network.setBlockedURLs` без тех, что разрешены через `allow`."""
+        patterns: List[str] = []
+        if self.block_images:
+            patterns += IMAGE_PATTERNS
+        if self.block_fonts:
+            patterns += FONT_PATTERNS
+        if self.block_media:
+            patterns += MEDIA_PATTERNS
+        if self.block_third_party:
+            patterns += THIRD_PARTY_PATTERNS
+        patterns += self.block
+        return [
+            pattern for pattern in dict.fromkeys(patterns)
+            if not any(fnmatch(pattern, allowed) or fnmatch(allowed, pattern) for allowed in self.allow)
+        ]
+
+    def chrome_prefs(self) -> Dict[str, Any]:
+        prefs: Dict[str, Any] = {}
+        if self.block_images and not self._allowed(IMAGE_PATTERNS):
+            prefs["profile.managed_default_content_settings.images"] = 2
+        return prefs
+
+    def firefox_prefs(self) -> Dict[str, Any]:
+        prefs: Dict[str, Any] = {}
+        if self.block_images and not self._allowed(IMAGE_PATTERNS):
+            prefs["permissions.default.image"] = 2
+        if self.block_fonts:
+            prefs["browser.display.use_document_fonts"] = 0
+            prefs["gfx.downloadable_fonts.enabled"] = False
+        if self.block_media:
+            prefs["media.autoplay.default"] = 5
+            prefs["media.preload.default"] = 0
+            prefs["media.preload.auto"] = 0
+        return prefs
+
+    def _allowed(self, patterns: List[str]) -> bool:
+        return any(fnmatch(pattern, allowed) or fnmatch(allowed, pattern)
+                   for pattern in patterns for allowed in self.allow)
+
+    def apply_options(self, options: webdriver.ChromeOptions, is_chrome: bool) -> Dict[str, Any]:
+        """Настраивает опции до запуска браузера и возвращает настройки профиля Chrome для слияния с `prefs`."""
+        options.page_load_strategy = self.page_load_strategy
+        if is_chrome:
+            prefs: Dict[str, Any] = self.chrome_prefs()
+            if prefs:
+                options.add_argument("--blink-settings=imagesEnabled=false")
+            return prefs
+        for name, value in self.firefox_prefs().items():
+            options.set_preference(name, value)
+        return {}
+
+    def apply_driver(self, driver: webdriver.Chrome) -> None:
+        """Включает блокировку URL через CDP в уже запущенном Chrome."""
+        if not hasattr(driver, "execute_cdp_cmd"):
+            return
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.blocked_urls()})
+
+
+def _network_weight(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    weight: Dict[str, Any] = {"bytes": 0, "resources": 0, "blocked": 0, "source": "network"}
+    for entry in entries:
+        try:
+            message: Dict[str, Any] = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        params: Dict[str, Any] = message.get("params", {})
+        if message.get("method") == "Network.loadingFinished":
+            weight["bytes"] += int(params.get("encodedDataLength", 0))
+            weight["resources"] += 1
+        elif message.get("method") == "Network.loadingFailed" and params.get("blockedReason"):
+            weight["blocked"] += 1
+    return weight
+
+
+def page_weight(driver: webdriver.Chrome) -> Dict[str, Any]:
+    """Сколько байт и ресурсов загрузила страница и сколько запросов заблокировано.
+
+    В Chrome вес считается по событиям CDP Network из журнала `performance` (его
+    включает `create_driver`): `encodedDataLength` учитывает и ресурсы CDN с других
+    доменов, а `blocked` — запросы, отмененные `Network.setBlockedURLs`. Журнал
+    очищается при чтении, поэтому учитываются события после прошлого вызова.
+
+    Без журнала (Firefox, удаленный драйвер) используется Resource Timing API.
+    Для ресурсов с других доменов без `Timing-Allow-Origin` он отдает размер 0,
+    поэтому `bytes` учитывает только ресурсы домена страницы, а `blocked` равен 0.
+    Источник указан в ключе `source`: `network` или `resource-timing`.
+    """
+    try:
+        return _network_weight(driver.get_log(PERFORMANCE_LOG))
+    except Exception:
+        pass
+    try:
+        weight: Dict[str, Any] = driver.execute_script(PAGE_WEIGHT_SCRIPT) or {"bytes": 0, "resources": 0}
+    except Exception:
+        weight = {"bytes": 0, "resources": 0}
+    return {**weight, "blocked": 0, "source": "resource-timing"}
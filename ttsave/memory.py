@@ -0,0 +1,126 @@
+import os
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_PAGE_SIZE: int = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _proc_parents() -> Dict[int, int]:
+    parents: Dict[int, int] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Имя процесса в скобках может содержать пробелы, поэтому поля считаются после последней ")".
+        fields = stat[stat.rfind(")") + 2:].split()
+        parents[int(name)] = int(fields[1])
+    return parents
+
+
+def _proc_rss(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def descendants(pid: int) -> List[int]:
+    """PID всех потомков процесса (Web Driver, Chrome и его подпроцессы)."""
+    if psutil is not None:
+        try:
+            return [child.pid for child in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+    if not os.path.isdir("/proc"):
+        return []
+    children: Dict[int, List[int]] = {}
+    for child, parent in _proc_parents().items():
+        children.setdefault(parent, []).append(child)
+    found: List[int] = []
+    stack: List[int] = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def command_lines() -> Dict[int, List[str]]:
+    """Аргументы командной строки всех процессов, которые видны текущему пользователю."""
+    if psutil is not None:
+        found: Dict[int, List[str]] = {}
+        for process in psutil.process_iter(["cmdline"]):
+            if process.info["cmdline"]:
+                found[process.pid] = process.info["cmdline"]
+        return found
+    if not os.path.isdir("/proc"):
+        return {}
+    found = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/cmdline", "rb") as f:
+                args = f.read().split(b"\0")
+        except OSError:
+            continue
+        if args and args[0]:
+            found[int(name)] = [arg.decode("utf-8", "replace") for arg in args if arg]
+    return found
+
+
+def parent(pid: int) -> Optional[int]:
+    """PID родителя процесса или None, если процесс уже завершился."""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).ppid()
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    return int(stat[stat.rfind(")") + 2:].split()[1])
+
+
+def rss(pids: Iterable[int]) -> int:
+    """Суммарный резидентный объем памяти процессов в байтах. Завершившиеся процессы пропускаются."""
+    total: int = 0
+    for pid in pids:
+        if psutil is not None:
+            try:
+                total += psutil.Process(pid).memory_info().rss
+            except psutil.Error:
+                pass
+        else:
+            total += _proc_rss(pid)
+    return total
+
+
+def tree_rss(pid: int) -> int:
+    """Память процесса вместе со всеми потомками в байтах."""
+    return rss([pid, *descendants(pid)])
+
+
+def available_memory() -> Optional[int]:
+    """Сколько памяти можно выделить без вытеснения в swap, в байтах. None, если узнать нельзя."""
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
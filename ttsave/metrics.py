@@ -0,0 +1,197 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Span:
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """Замер одного этапа работы: имя, время начала, длительность и атрибуты.
+
+        Args:
+            name (str): Имя этапа, например `driver.start`, `page.load`, `url.resolve`, `element.wait` или `transfer`.
+            attributes (Optional[Dict[str, Any]], optional): Дополнительные данные (URL, размер в байтах и т.д.).
+        """
+        self.name: str = name
+        self.attributes: Dict[str, Any] = attributes or {}
+        self.started: float = time.time()
+        self.duration: float = 0.0
+        self.error: Optional[str] = None
+        self._monotonic: float = time.monotonic()
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        self.duration = time.monotonic() - self._monotonic
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span": self.name,
+            "started": self.started,
+            "duration": self.duration,
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+class Observer:
+    """Получатель замеров. Переопределите `on_span`, чтобы отправлять их в свою систему мониторинга."""
+
+    def on_span(self, span: Span) -> None:
+        pass
+
+
+class CallbackObserver(Observer):
+    def __init__(self, callback):
+        """Вызывает `callback(span)` для каждого завершенного замера."""
+        self.callback = callback
+
+    def on_span(self, span: Span) -> None:
+        self.callback(span)
+
+
+class JSONLogObserver(Observer):
+    def __init__(self, stream: Optional[IO[str]] = None):
+        """Пишет каждый замер отдельной JSON-строкой в `stream` (по умолчанию stderr)."""
+        self.stream: IO[str] = stream or sys.stderr
+        self._lock: threading.Lock = threading.Lock()
+
+    def on_span(self, span: Span) -> None:
+        line: str = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets: Sequence[float] = buckets
+        self.counts: List[int] = [0] * len(buckets)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+class Metrics(Observer):
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Счетчики и гистограммы длительностей по замерам, с экспортом в формате Prometheus или JSON.
+
+        - `ttsave_span_duration_seconds{span=...}` — гистограмма длительности этапов;
+        - `ttsave_spans_total{span=...,status=ok|error}` — количество этапов;
+        - `ttsave_transfer_bytes_total` — сколько байт медиа скачано, в файлы и в `sink`;
+        - `ttsave_page_bytes_total` — сколько байт загрузил браузер вместе со страницами (см. `ttsave.lean.page_weight`);
+        - `ttsave_page_blocked_requests_total` — сколько запросов страниц заблокировал `LeanProfile`.
+
+        Examples:
+            >>> metrics = Metrics()
+            >>> engine = TTSaveEngine(..., observers=[metrics])
+            >>> print(metrics.to_prometheus())
+        """
+        self.buckets: Sequence[float] = tuple(buckets)
+        self._lock: threading.Lock = threading.Lock()
+        self._histograms: Dict[str, _Histogram] = {}
+        self._spans: Dict[Tuple[str, str], int] = {}
+        self._transfer_bytes: int = 0
+        self._page_bytes: int = 0
+        self._page_blocked: int = 0
+
+    def on_span(self, span: Span) -> None:
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = _Histogram(self.buckets)
+            histogram.observe(span.duration)
+            key = (span.name, "error" if span.error else "ok")
+            self._spans[key] = self._spans.get(key, 0) + 1
+            if span.name == "transfer":
+                self._transfer_bytes += span.attributes.get("bytes", 0)
+            elif span.name == "page.load":
+                self._page_bytes += span.attributes.get("bytes", 0)
+                self._page_blocked += span.attributes.get("blocked", 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Текущие значения в виде словаря, пригодного для `json.dumps`."""
+        with self._lock:
+            return {
+                "spans": {
+                    name: {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "errors": self._spans.get((name, "error"), 0),
+                        "buckets": dict(zip((str(bound) for bound in self.buckets), histogram.counts)),
+                    }
+                    for name, histogram in self._histograms.items()
+                },
+                "transfer_bytes": self._transfer_bytes,
+                "page_bytes": self._page_bytes,
+                "page_blocked": self._page_blocked,
+            }
+
+    def to_prometheus(self) -> str:
+        """Текстовый формат экспозиции Prometheus."""
+        lines: List[str] = [
+            "# HELP ttsave_span_duration_seconds Duration of TTSave stages.",
+            "# TYPE ttsave_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                for bound, count in zip(self.buckets, histogram.counts):
+                    lines.append(f'ttsave_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+                lines.append(f'ttsave_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'ttsave_span_duration_seconds_sum{{span="{name}"}} {histogram.sum}')
+                lines.append(f'ttsave_span_duration_seconds_count{{span="{name}"}} {histogram.count}')
+            lines.append("# HELP ttsave_spans_total Number of finished TTSave stages.")
+            lines.append("# TYPE ttsave_spans_total counter")
+            for (name, status), count in sorted(self._spans.items()):
+                lines.append(f'ttsave_spans_total{{span="{name}",status="{status}"}} {count}')
+            lines.append("# HELP ttsave_transfer_bytes_total Bytes transferred by media downloads.")
+            lines.append("# TYPE ttsave_transfer_bytes_total counter")
+            lines.append(f"ttsave_transfer_bytes_total {self._transfer_bytes}")
+            lines.append("# HELP ttsave_page_bytes_total Bytes loaded by the browser for TikTok pages.")
+            lines.append("# TYPE ttsave_page_bytes_total counter")
+            lines.append(f"ttsave_page_bytes_total {self._page_bytes}")
+            lines.append("# HELP ttsave_page_blocked_requests_total Page requests blocked by the lean profile.")
+            lines.append("# TYPE ttsave_page_blocked_requests_total counter")
+            lines.append(f"ttsave_page_blocked_requests_total {self._page_blocked}")
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    def __init__(self, observers: Optional[Sequence[Observer]] = None):
+        """Создает замеры и передает их наблюдателям. Без наблюдателей замеры не создаются."""
+        self.observers: List[Observer] = list(observers or [])
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Замеряет блок `with`. Если блок завершился исключением, оно записывается в `error` и пробрасывается дальше.
+
+        Examples:
+            >>> with tracer.span("transfer", url=url) as span:
+            >>>     size = stream_to_file(...)
+            >>>     if span:
+            >>>         span.set(bytes=size)
+        """
+        if not self.observers:
+            yield None
+            return
+        span = Span(name, attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.finish()
+            for observer in self.observers:
+                observer.on_span(span)
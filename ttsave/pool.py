@@ -0,0 +1,151 @@
+from __future__ import annotations
+import queue
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, List, Optional, Type
+from ttsave.driver import create_driver, reset_driver
+from ttsave.lean import LeanProfile
+from ttsave.supervisor import DriverSupervisor
+from ttsave.exceptions import DriverPoolClosedError, DriverPoolTimeoutError
+from ttsave.utils import Utils
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+class DriverPool:
+    def __init__(self, driver_class: Type[webdriver.Chrome], options: webdriver.ChromeOptions, download_dir: str, size: int = 2, debug_mode: bool = False, driver_path: str = None, lean: Optional[LeanProfile] = None, supervisor: Optional[DriverSupervisor] = None):
+        """Пул "прогретых" веб-драйверов, которые переиспользуются между загрузками.
+
+        Драйверы запускаются лениво, при первой выдаче, но не более `size` штук.
+        После возврата в пул драйвер сбрасывается (cookies, хранилища, `about:blank`),
+        поэтому холодный старт браузера оплачивается один раз на весь пул.
+
+        Args:
+            driver_class (Type[webdriver.Chrome]): Класс Web Driver (например, Chrome или Firefox).
+            options (webdriver.ChromeOptions): Опции для Web Driver.
+            download_dir (str): Папка для загрузки контента.
+            size (int, optional): Максимальное количество драйверов в пуле. По умолчанию 2.
+            debug_mode (bool, optional): Режим отладки. По умолчанию False.
+            driver_path (str, optional): Путь к исполняемому файлу Web Driver.
+            lean (Optional[LeanProfile], optional): Облегченный профиль браузера для всех драйверов пула (см. `ttsave.lean`).
+            supervisor (Optional[DriverSupervisor], optional): Ограничения времени задачи и памяти драйверов (см. `ttsave.supervisor`). Зависшие и разросшиеся драйверы заменяются новыми. По умолчанию `DriverSupervisor.shared()`.
+
+        Examples:
+            >>> pool = DriverPool(webdriver.Chrome, webdriver.ChromeOptions(), "/path/to/download", size=4)
+            >>> with pool.driver() as driver:
+            >>>     driver.get("https://www.tiktok.com/")
+            >>> pool.close()
+        """
+        self.driver_class: Type[webdriver.Chrome] = driver_class
+        self.options: webdriver.ChromeOptions = options
+        self.download_dir: str = download_dir
+        self.size: int = size
+        self.debug_mode: bool = debug_mode
+        self.driver_path = driver_path
+        self.lean: Optional[LeanProfile] = lean
+        self.supervisor: DriverSupervisor = supervisor or DriverSupervisor.shared()
+
+        self.utils: Utils = Utils(debug_mode=debug_mode)
+        self.debug_out: callable = self.utils.debug_out
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(size)
+        self._drivers: List[webdriver.Chrome] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._closed: bool = False
+
+    def _create(self) -> webdriver.Chrome:
+        driver = create_driver(self.driver_class, self.options, self.download_dir,
+                               self.debug_mode, self.driver_path, self.lean)
+        self.supervisor.register(driver)
+        with self._lock:
+            self._drivers.append(driver)
+            started = len(self._drivers)
+        self.debug_out(f"Pool: WebDriver started ({started}/{self.size}).")
+        return driver
+
+    def _discard(self, driver: webdriver.Chrome) -> None:
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        if self.supervisor.unregister(driver):
+            return
+        try:
+            driver.quit()
+        except Exception as e:
+            self.debug_out(f"Pool: WebDriver quit failed: {e}")
+
+    def warm(self, count: Optional[int] = None) -> None:
+        """Заранее запускает драйверы, чтобы первые загрузки не ждали старта браузера."""
+        with self._lock:
+            missing = min(count or self.size, self.size) - len(self._drivers)
+        for _ in range(max(missing, 0)):
+            self._idle.put(self._create())
+
+    def acquire(self, timeout: Optional[float] = None) -> webdriver.Chrome:
+        """Выдает свободный драйвер, запуская новый, если пул еще не заполнен.
+
+        Raises:
+            DriverPoolClosedError: Если пул уже закрыт.
+            DriverPoolTimeoutError: Если за `timeout` секунд не освободился ни один драйвер.
+        """
+        if self._closed:
+            raise DriverPoolClosedError(self.utils)
+        if not self._slots.acquire(timeout=timeout):
+            raise DriverPoolTimeoutError(timeout, self.utils)
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._create()
+        except Exception:
+            self._slots.release()
+            raise
+        self.supervisor.begin(driver)
+        return driver
+
+    def release(self, driver: webdriver.Chrome, discard: bool = False) -> None:
+        """Возвращает драйвер в пул. Драйвер, который не удалось сбросить, завершенный или разросшийся, закрывается."""
+        try:
+            reason = self.supervisor.end(driver)
+            if reason is not None:
+                self.debug_out(f"Pool: WebDriver replaced ({reason}).")
+                discard = True
+            if not discard and not self._closed:
+                try:
+                    reset_driver(driver)
+                except Exception as e:
+                    self.debug_out(f"Pool: WebDriver reset failed, discarding: {e}")
+                    discard = True
+            if discard or self._closed:
+                self._discard(driver)
+            else:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None) -> Iterator[webdriver.Chrome]:
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self) -> None:
+        """Закрывает все свободные драйверы. Выданные драйверы закрываются при возврате."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+        self.debug_out("Pool closed.")
+
+    def __enter__(self) -> "DriverPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
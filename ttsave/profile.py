@@ -0,0 +1,157 @@
+import json
+import os
+import queue
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+from ttsave.dom import PROFILE_ITEMS_CSS, harvest_links
+from ttsave.transfer import is_downloaded
+from ttsave.urls import URL_PATTERNS, classify_url, item_key
+
+if TYPE_CHECKING:
+    from ttsave.ttsave import TTSave
+
+_DONE = object()
+
+
+class ProfileDownloader:
+    def __init__(self, ttsave: "TTSave", username: str, workers: int = 4, queue_size: int = 64, checkpoint_path: Optional[str] = None, limit: Optional[int] = None):
+        """Загрузка всех публикаций со страницы профиля `@user`.
+
+        Один поток прокручивает профиль через Web Driver и складывает ссылки на
+        публикации в ограниченную очередь, а `workers` потоков параллельно их
+        скачивают. Если загрузчики не успевают, прокрутка приостанавливается.
+
+        Скачанные публикации записываются в файл контрольной точки в `download_dir`,
+        поэтому прерванную загрузку можно продолжить: публикации, файлы которых уже
+        на месте, повторно не скачиваются.
+
+        Args:
+            ttsave (TTSave): Загрузчик со страницей профиля. Его сессия, пул драйверов, индекс и настройки используются для каждой публикации.
+            username (str): Имя пользователя без `@`.
+            workers (int, optional): Количество публикаций, которые скачиваются одновременно. По умолчанию 4.
+            queue_size (int, optional): Максимальное количество ссылок, ожидающих загрузки. По умолчанию 64.
+            checkpoint_path (Optional[str], optional): Путь к файлу контрольной точки. По умолчанию `.ttsave-profile-<user>.jsonl` в `download_dir`.
+            limit (Optional[int], optional): Максимальное количество публикаций. По умолчанию все.
+
+        Examples:
+            >>> with TTSave("https://www.tiktok.com/@example", ...) as ttsave:
+            >>>     result = ProfileDownloader(ttsave, "example", workers=8).run()
+        """
+        self.ttsave: "TTSave" = ttsave
+        self.username: str = username
+        self.workers: int = max(1, workers)
+        self.limit: Optional[int] = limit
+        self.checkpoint_path: str = checkpoint_path or os.path.join(
+            ttsave.download_dir, f".ttsave-profile-{username}.jsonl")
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock: threading.Lock = threading.Lock()
+        self._done: Dict[str, Dict[str, Any]] = {}
+        self._items: List[Dict[str, Any]] = []
+        self._errors: List[Dict[str, str]] = []
+        self._skipped: int = 0
+
+    def _load_checkpoint(self) -> None:
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    result = record["result"]
+                    if all(is_downloaded(path) for path in result.get("files", [])):
+                        self._done[record["key"]] = result
+        except FileNotFoundError:
+            pass
+        self.ttsave.debug_out(f"Checkpoint has {len(self._done)} completed items: {self.checkpoint_path}")
+
+    def _record(self, key: str, url: str, result: Dict[str, Any]) -> None:
+        line: str = json.dumps({"key": key, "url": url, "result": result}, ensure_ascii=False)
+        with self._lock:
+            self._items.append(result)
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _owned(self, url: str) -> bool:
+        """Ссылки в сетке могут вести на чужие публикации (репосты, рекомендации)."""
+        content_type: Optional[str] = classify_url(url)
+        if content_type not in ("video", "photo"):
+            return False
+        return URL_PATTERNS[content_type].match(url).group(1) == self.username
+
+    def _produce(self) -> None:
+        seen: Set[str] = set()
+        try:
+            self.ttsave._ensure_driver()
+            for url in harvest_links(self.ttsave.driver, PROFILE_ITEMS_CSS, self.ttsave.timeouts["profile"]):
+                # Прокрутка профиля — много задач подряд: срок драйвера отсчитывается от последней новой ссылки.
+                self.ttsave.supervisor.renew(self.ttsave.driver)
+                url = url.split("?")[0]
+                if not self._owned(url):
+                    continue
+                key: str = item_key(url)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if key in self._done:
+                    with self._lock:
+                        self._items.append(self._done[key])
+                        self._skipped += 1
+                else:
+                    self._queue.put(url)
+                if self.limit is not None and len(seen) >= self.limit:
+                    break
+            self.ttsave.debug_out(f"Profile enumeration finished: {len(seen)} items")
+        except Exception as e:
+            with self._lock:
+                self._errors.append({"url": self.ttsave.url, "error": str(e)})
+        finally:
+            for _ in range(self.workers):
+                self._queue.put(_DONE)
+
+    def _consume(self) -> None:
+        while True:
+            url = self._queue.get()
+            if url is _DONE:
+                return
+            try:
+                with self.ttsave._spawn(url) as ttsave:
+                    result = ttsave.download()
+                self._record(item_key(url), url, result)
+            except Exception as e:
+                with self._lock:
+                    self._errors.append({"url": url, "error": str(e)})
+
+    def run(self) -> Dict[str, Any]:
+        """Скачивает публикации профиля и возвращает сводный результат.
+
+        Ошибка загрузки одной публикации не прерывает остальные: она попадает в `errors`.
+
+        Returns:
+            Dict[str, Any]: Словарь с ключами `type` (`profile`), `author_username`,
+            `files` (все файлы всех публикаций), `items` (результаты `download()` по
+            каждой публикации), `skipped` (сколько публикаций взято из контрольной
+            точки), `errors` и `url`.
+        """
+        self._load_checkpoint()
+        threads: List[threading.Thread] = [
+            threading.Thread(target=self._consume, name=f"ttsave-profile-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            self._produce()
+        finally:
+            for thread in threads:
+                thread.join()
+        return {
+            "type": "profile",
+            "author_username": self.username,
+            "files": [path for item in self._items for path in item.get("files", [])],
+            "items": self._items,
+            "skipped": self._skipped,
+            "errors": self._errors,
+            "url": self.ttsave.url,
+        }
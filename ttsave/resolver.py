@@ -0,0 +1,177 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urljoin
+from ttsave.scheduler import TransferScheduler
+from ttsave.urls import is_canonical
+from ttsave.utils import Utils
+
+if TYPE_CHECKING:
+    import requests
+
+
+def default_cache_dir() -> str:
+    """Папка для кешей TTSave: `$XDG_CACHE_HOME/ttsave` или `~/.cache/ttsave`."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ttsave")
+
+
+class RedirectCache:
+    _shared: Optional["RedirectCache"] = None
+    _shared_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 100_000):
+        """Кеш коротких ссылок (vm.tiktok.com и т.п.) на канонические URL в SQLite.
+
+        База открывается при первом обращении, поэтому файл не создается, пока не
+        встретится короткая ссылка. Если папку или файл создать нельзя (только для
+        чтения, нет домашней папки), кеш с предупреждением работает в памяти.
+
+        Args:
+            path (str): Путь к файлу базы данных.
+            ttl (float, optional): Время жизни записи в секундах. По умолчанию 7 дней.
+            max_entries (int, optional): Максимальное количество записей. При превышении удаляются давно не использованные. По умолчанию 100000.
+        """
+        self.path: str = path
+        self.ttl: float = ttl
+        self.max_entries: int = max_entries
+        self._lock: threading.Lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None:
+            return self._connection
+        connection: Optional[sqlite3.Connection] = None
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._create(connection)
+        except (OSError, sqlite3.Error) as e:
+            if connection is not None:
+                connection.close()
+            warnings.warn(f"Кеш редиректов {self.path} недоступен ({e}), используется кеш в памяти.", RuntimeWarning)
+            connection = sqlite3.connect(":memory:", check_same_thread=False)
+            self._create(connection)
+        self._connection = connection
+        return connection
+
+    @staticmethod
+    def _create(connection: sqlite3.Connection) -> None:
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS redirects ("
+                "url TEXT PRIMARY KEY, target TEXT NOT NULL, created REAL NOT NULL, used REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS redirects_used ON redirects (used)")
+
+    @classmethod
+    def shared(cls) -> "RedirectCache":
+        """Общий для процесса кеш в `default_cache_dir()`."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(os.path.join(default_cache_dir(), "redirects.sqlite3"))
+            return cls._shared
+
+    def get(self, url: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            row = connection.execute(
+                "SELECT target, created FROM redirects WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                connection.execute("DELETE FROM redirects WHERE url = ?", (url,))
+                return None
+            connection.execute("UPDATE redirects SET used = ? WHERE url = ?", (now, url))
+            return row[0]
+
+    def put(self, url: str, target: str) -> None:
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO redirects (url, target, created, used) VALUES (?, ?, ?, ?)",
+                (url, target, now, now))
+            count = connection.execute("SELECT COUNT(*) FROM redirects").fetchone()[0]
+            if count > self.max_entries:
+                # Удаляем с запасом, чтобы не чистить кеш на каждой вставке.
+                excess = count - int(self.max_entries * 0.9)
+                connection.execute(
+                    "DELETE FROM redirects WHERE url IN "
+                    "(SELECT url FROM redirects ORDER BY used LIMIT ?)", (excess,))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class URLResolver:
+    def __init__(self, session: requests.Session, utils: Utils, cache: Optional[RedirectCache] = None, max_redirects: int = 10, timeout: float = 10, scheduler: Optional[TransferScheduler] = None):
+        """Приведение коротких ссылок к каноническому URL без загрузки страниц.
+
+        Переходит по заголовкам `Location`, не читая тело ответа, и останавливается,
+        как только URL становится ссылкой на видео, фото или музыку.
+
+        Args:
+            session (requests.Session): Сессия для запросов.
+            utils (Utils): Утилиты для отладки.
+            cache (Optional[RedirectCache], optional): Кеш редиректов. Если не указан, результаты не кешируются.
+            max_redirects (int, optional): Максимальное количество переходов. По умолчанию 10.
+            timeout (float, optional): Таймаут одного запроса в секундах. По умолчанию 10.
+            scheduler (Optional[TransferScheduler], optional): Лимиты и повторы запросов по хостам (см. `ttsave.scheduler`). Если указан, ответы с кодами из `retry_statuses` повторяются, а после последней попытки вызывают `requests.HTTPError`.
+        """
+        self.session: requests.Session = session
+        self.utils: Utils = utils
+        self.cache: Optional[RedirectCache] = cache
+        self.max_redirects: int = max_redirects
+        self.timeout: float = timeout
+        self.scheduler: Optional[TransferScheduler] = scheduler
+
+    def _request(self, url: str) -> requests.Response:
+        response = self.session.head(url, allow_redirects=False, timeout=self.timeout)
+        if response.status_code in (403, 405, 501):
+            # Некоторые серверы не отвечают на HEAD: берем только заголовки GET-ответа.
+            response = self.session.get(url, allow_redirects=False, stream=True, timeout=self.timeout)
+            response.close()
+        if self.scheduler is not None and response.status_code in self.scheduler.retry_statuses:
+            response.raise_for_status()
+        return response
+
+    def _next_location(self, url: str) -> Optional[str]:
+        if self.scheduler is None:
+            response = self._request(url)
+        else:
+            response = self.scheduler.call(url, lambda: self._request(url))
+        if response.is_redirect:
+            return urljoin(url, response.headers["Location"])
+        return None
+
+    def resolve(self, url: str) -> str:
+        """Возвращает канонический URL. Уже канонические ссылки возвращаются без запросов."""
+        if is_canonical(url):
+            return url
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                self.utils.debug_out(f"Redirect cache hit: {url} -> {cached}")
+                return cached
+
+        current = url
+        for _ in range(self.max_redirects):
+            location = self._next_location(current)
+            if location is None:
+                break
+            current = location
+            if is_canonical(current):
+                break
+        self.utils.debug_out(f"Resolved URL: {url} -> {current}")
+
+        if self.cache is not None and is_canonical(current):
+            self.cache.put(url, current)
+        return current
@@ -0,0 +1,85 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from ttsave.cache import url_key
+from ttsave.urls import item_key
+
+
+def media_jobs(info: Dict[str, Any], clear_file_name: Callable[[str], str]) -> List[Tuple[str, str]]:
+    """Список пар (url, имя файла) для всех медиафайлов контента в порядке, в котором они попадают в `files`.
+
+    Args:
+        info (Dict[str, Any]): Данные о контенте, полученные из страницы.
+        clear_file_name (Callable[[str], str]): Функция очистки имени файла.
+    """
+    if info["type"] == "video":
+        return [(info["video_url"], f"{clear_file_name(info['description'])}.mp4")]
+    if info["type"] == "photo":
+        name: str = clear_file_name(info["description"])
+        jobs: List[Tuple[str, str]] = [
+            (photo_url, f"{index}_{name}.jpg")
+            for index, photo_url in enumerate(info["photo_urls"], start=1)
+        ]
+        jobs.append((info["audio_url"], f"{name}.mp3"))
+        return jobs
+    return [(info["music_url"], f"{clear_file_name(info['author']['name'])}.mp3")]
+
+
+def media_cache_keys(info: Dict[str, Any], url: str) -> List[Optional[str]]:
+    """Ключи `ContentCache` для файлов из `media_jobs` в том же порядке. None — файл не кешируется.
+
+    Кешируется только музыка (по ID из `music_uri` или из URL страницы музыки, иначе по ссылке
+    на дорожку): она повторяется между публикациями, а видео и фото уникальны и только
+    вытесняли бы ее из кеша.
+    """
+    if info["type"] == "video":
+        return [None]
+    if info["type"] == "photo":
+        music_key: Optional[str] = item_key(info.get("music_uri") or "")
+        return [None] * len(info["photo_urls"]) + [music_key or url_key(info["audio_url"])]
+    return [item_key(url) or url_key(info["music_url"])]
+
+
+def build_result(info: Dict[str, Any], files: List[str], url: str) -> Dict[str, Union[str, List[str]]]:
+    """Собирает словарь, который возвращает `TTSave.download()`.
+
+    Args:
+        info (Dict[str, Any]): Данные о контенте, полученные из страницы.
+        files (List[str]): Пути к скачанным файлам.
+        url (str): Канонический URL страницы.
+    """
+    if info["type"] == "music":
+        return {
+            "type": "music",
+            "files": files,
+            "author": info["author"],
+            "thumb_url": info["thumb_url"],
+            "clip_count": info["clip_count"],
+            "clips": info["clips"],
+            "url": info["music_url"]
+        }
+    return {
+        "type": info["type"],
+        "author_username": info["author_username"],
+        "files": files,
+        "url": url,
+        "music_uri": info["music_uri"]
+    }
+
+
+def build_metadata(info: Dict[str, Any], url: str, clear_file_name: Callable[[str], str]) -> Dict[str, Any]:
+    """Собирает тот же словарь, что и `build_result`, но без скачивания медиа.
+
+    Вместо `files` в словаре ключ `media`: список словарей с удаленной ссылкой (`url`)
+    и именем файла (`file_name`), под которым медиа было бы сохранено.
+
+    Args:
+        info (Dict[str, Any]): Данные о контенте, полученные из страницы.
+        url (str): Канонический URL страницы.
+        clear_file_name (Callable[[str], str]): Функция очистки имени файла.
+    """
+    result: Dict[str, Any] = build_result(info, [], url)
+    del result["files"]
+    result["media"] = [
+        {"url": media_url, "file_name": file_name}
+        for media_url, file_name in media_jobs(info, clear_file_name)
+    ]
+    return result
@@ -0,0 +1,220 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, Optional, TypeVar
+from urllib.parse import urlsplit
+
+T = TypeVar("T")
+
+RETRY_STATUSES: FrozenSet[int] = frozenset({403, 408, 429, 500, 502, 503, 504})
+# Ответы, которыми CDN TikTok просит сбавить темп: после них лимит параллельности хоста уменьшается вдвое.
+THROTTLE_STATUSES: FrozenSet[int] = frozenset({403, 429, 503})
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Значение заголовка `Retry-After` из ответа, на котором произошла ошибка, в секундах."""
+    response = getattr(error, "response", None)
+    value = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_dropped(error: BaseException) -> bool:
+    """Соединение оборвалось или не установилось: повтор обычно помогает."""
+    import requests
+    from ttsave.transfer import IncompleteTransferError
+    return isinstance(error, (requests.ConnectionError, requests.Timeout,
+                              requests.exceptions.ChunkedEncodingError, IncompleteTransferError))
+
+
+class _Host:
+    def __init__(self, burst: float, limit: float):
+        self.tokens: float = burst
+        self.updated: float = time.monotonic()
+        self.limit: float = limit
+        self.in_flight: int = 0
+        self.paused_until: float = 0.0
+        self.last_decrease: float = 0.0
+        self.counts: Dict[str, int] = {"requests": 0, "ok": 0, "retries": 0, "throttled": 0, "dropped": 0, "failed": 0}
+
+
+class TransferScheduler:
+    _shared: Optional["TransferScheduler"] = None
+    _shared_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None, concurrency: int = 8, min_concurrency: int = 1, max_concurrency: int = 64, retries: int = 4, backoff: float = 0.5, max_backoff: float = 30, retry_statuses: Iterable[int] = RETRY_STATUSES, throttle_statuses: Iterable[int] = THROTTLE_STATUSES):
+        """Планировщик HTTP-запросов к TikTok и его CDN: лимиты по хостам, повторы и адаптивная параллельность.
+
+        Для каждого хоста отдельно:
+        - ведро токенов ограничивает количество запросов в секунду (`rate`, `burst`);
+        - лимит одновременных запросов меняется по AIMD: растет на 1 за каждые `limit`
+          успешных запросов и уменьшается вдвое на ответах из `throttle_statuses`
+          и на оборванных соединениях (не чаще раза в секунду);
+        - ошибки с кодами из `retry_statuses` и оборванные соединения повторяются
+          до `retries` раз с экспоненциальной задержкой со случайным разбросом.
+          Если сервер прислал `Retry-After`, хост ставится на паузу на это время
+          для всех потоков.
+
+        Args:
+            rate (Optional[float], optional): Запросов в секунду на хост. По умолчанию без ограничения.
+            burst (Optional[float], optional): Размер ведра токенов. По умолчанию равен `rate`.
+            concurrency (int, optional): Начальный лимит одновременных запросов на хост. По умолчанию 8.
+            min_concurrency (int, optional): Нижняя граница лимита. По умолчанию 1.
+            max_concurrency (int, optional): Верхняя граница лимита. По умолчанию 64.
+            retries (int, optional): Количество повторов одного запроса. По умолчанию 4.
+            backoff (float, optional): Базовая задержка перед повтором в секундах; удваивается с каждой попыткой. По умолчанию 0.5.
+            max_backoff (float, optional): Максимальная задержка перед повтором в секундах. По умолчанию 30.
+            retry_statuses (Iterable[int], optional): HTTP-коды, при которых запрос повторяется.
+            throttle_statuses (Iterable[int], optional): HTTP-коды, при которых лимит параллельности уменьшается.
+
+        Examples:
+            >>> scheduler = TransferScheduler(rate=20, max_concurrency=32)
+            >>> engine = TTSaveEngine(webdriver.Chrome, webdriver.ChromeOptions(), "/path/to/download", scheduler=scheduler)
+            >>> print(scheduler.stats())
+        """
+        self.rate: Optional[float] = rate
+        self.burst: float = burst or rate or 1
+        self.concurrency: int = concurrency
+        self.min_concurrency: int = max(1, min_concurrency)
+        self.max_concurrency: int = max(self.min_concurrency, max_concurrency)
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        self.retry_statuses: FrozenSet[int] = frozenset(retry_statuses)
+        self.throttle_statuses: FrozenSet[int] = frozenset(throttle_statuses)
+
+        self._hosts: Dict[str, _Host] = {}
+        self._condition: threading.Condition = threading.Condition()
+
+    @classmethod
+    def shared(cls) -> "TransferScheduler":
+        """Общий для процесса планировщик, чтобы параллельные загрузки делили лимиты одних и тех же хостов."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _host(self, host: str) -> _Host:
+        state = self._hosts.get(host)
+        if state is None:
+            limit = min(max(self.concurrency, self.min_concurrency), self.max_concurrency)
+            state = self._hosts[host] = _Host(self.burst, limit)
+        return state
+
+    def _acquire(self, host: str) -> None:
+        with self._condition:
+            state = self._host(host)
+            while True:
+                now = time.monotonic()
+                if self.rate:
+                    state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+                    state.updated = now
+                if state.paused_until > now:
+                    timeout: Optional[float] = state.paused_until - now
+                elif state.in_flight >= int(state.limit):
+                    timeout = None
+                elif self.rate and state.tokens < 1:
+                    timeout = (1 - state.tokens) / self.rate
+                else:
+                    if self.rate:
+                        state.tokens -= 1
+                    state.in_flight += 1
+                    state.counts["requests"] += 1
+                    return
+                self._condition.wait(timeout)
+
+    def _release(self, host: str, error: Optional[BaseException], pause: Optional[float]) -> None:
+        with self._condition:
+            state = self._hosts[host]
+            state.in_flight -= 1
+            now = time.monotonic()
+            if error is None:
+                state.counts["ok"] += 1
+                state.limit = min(self.max_concurrency, state.limit + 1 / state.limit)
+            else:
+                status = error_status(error)
+                dropped = status is None and is_dropped(error)
+                if status in self.throttle_statuses or dropped:
+                    state.counts["dropped" if dropped else "throttled"] += 1
+                    if now - state.last_decrease >= 1:
+                        state.limit = max(self.min_concurrency, state.limit / 2)
+                        state.last_decrease = now
+                if pause:
+                    state.paused_until = max(state.paused_until, now + pause)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """Занимает место в лимитах хоста на время одного запроса без повторов."""
+        host = urlsplit(url).hostname or ""
+        self._acquire(host)
+        try:
+            yield
+        except BaseException as e:
+            self._release(host, e, retry_after(e))
+            raise
+        self._release(host, None, None)
+
+    def is_retryable(self, error: BaseException) -> bool:
+        status = error_status(error)
+        if status is not None:
+            return status in self.retry_statuses
+        return is_dropped(error)
+
+    def call(self, url: str, func: Callable[[], T]) -> T:
+        """Выполняет `func()` (один запрос к `url`) в лимитах хоста и повторяет ее при временных ошибках.
+
+        Raises:
+            Exception: Последняя ошибка `func()`, если повторы закончились или ошибка не временная.
+        """
+        host = urlsplit(url).hostname or ""
+        attempt: int = 0
+        while True:
+            try:
+                with self.slot(url):
+                    return func()
+            except Exception as e:
+                if attempt >= self.retries or not self.is_retryable(e):
+                    with self._condition:
+                        self._host(host).counts["failed"] += 1
+                    raise
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                delay = max(delay, min(retry_after(e) or 0.0, self.max_backoff))
+                attempt += 1
+                with self._condition:
+                    self._host(host).counts["retries"] += 1
+                time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Текущие лимиты и счетчики по хостам и суммарно."""
+        with self._condition:
+            now = time.monotonic()
+            hosts: Dict[str, Dict[str, Any]] = {
+                host: {
+                    "limit": round(state.limit, 2),
+                    "in_flight": state.in_flight,
+                    "paused": max(state.paused_until - now, 0.0),
+                    **state.counts,
+                }
+                for host, state in self._hosts.items()
+            }
+        totals: Dict[str, int] = {}
+        for host_stats in hosts.values():
+            for name in ("requests", "ok", "retries", "throttled", "dropped", "failed", "in_flight"):
+                totals[name] = totals.get(name, 0) + host_stats[name]
+        return {"hosts": hosts, **totals}
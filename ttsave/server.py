@@ -0,0 +1,356 @@
+import json
+import os
+import queue
+import shutil
+import signal
+import socketserver
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from ttsave.engine import TTSaveEngine
+
+QUEUED: str = "queued"
+RUNNING: str = "running"
+DONE: str = "done"
+FAILED: str = "failed"
+
+
+class Job:
+    def __init__(self, url: str, metadata_only: bool = False):
+        """Задача на загрузку одной ссылки."""
+        self.id: str = uuid.uuid4().hex
+        self.url: str = url
+        self.metadata_only: bool = metadata_only
+        self.status: str = QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created: float = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.done: threading.Event = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "url": self.url,
+            "metadata_only": self.metadata_only,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    def __init__(self, engine: TTSaveEngine, workers: Optional[int] = None, queue_size: int = 100, keep_jobs: int = 1000):
+        """Ограниченная очередь задач, которые выполняют потоки с общим `TTSaveEngine`.
+
+        Args:
+            engine (TTSaveEngine): Движок с прогретыми драйверами и HTTP-сессией.
+            workers (Optional[int], optional): Количество одновременно выполняемых задач. По умолчанию размер пула движка.
+            queue_size (int, optional): Сколько задач может ждать в очереди. Сверх этого `submit` отказывает. По умолчанию 100.
+            keep_jobs (int, optional): Сколько завершенных задач хранить для получения результата. По умолчанию 1000.
+        """
+        self.engine: TTSaveEngine = engine
+        self.workers: int = workers or engine.pool.size
+        self.keep_jobs: int = keep_jobs
+        self.started: float = time.time()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        self._counts: Dict[str, int] = {"submitted": 0, "rejected": 0, DONE: 0, FAILED: 0}
+        self._running: int = 0
+        self._draining: bool = False
+        self._threads: List[threading.Thread] = [
+            threading.Thread(target=self._work, name=f"ttsave-job-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def draining(self) -> bool:
+        return self._draining
+
+    def submit(self, url: str, metadata_only: bool = False) -> Optional[Job]:
+        """Ставит ссылку в очередь. Возвращает None, если очередь заполнена или идет остановка."""
+        job = Job(url, metadata_only)
+        with self._lock:
+            if self._draining:
+                self._counts["rejected"] += 1
+                return None
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._counts["rejected"] += 1
+                return None
+            self._jobs[job.id] = job
+            self._counts["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                job.status = RUNNING
+                job.started = time.time()
+                self._running += 1
+            try:
+                if job.metadata_only:
+                    job.result = self.engine.fetch_metadata(job.url)
+                else:
+                    job.result = self.engine.download(job.url)
+                status = DONE
+            except Exception as e:
+                job.error = str(e)
+                status = FAILED
+            with self._lock:
+                job.status = status
+                job.finished = time.time()
+                self._running -= 1
+                self._counts[status] += 1
+                self._evict()
+            job.done.set()
+
+    def _evict(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished is not None]
+        for job_id in finished[:max(len(finished) - self.keep_jobs, 0)]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "running": self._running,
+                "workers": self.workers,
+                "queue_size": self._queue.maxsize,
+                "draining": self._draining,
+                "uptime": time.time() - self.started,
+                "drivers": self.engine.supervisor.stats(),
+                **self._counts,
+            }
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Перестает принимать задачи и ждет завершения уже принятых.
+
+        Returns:
+            bool: True, если все задачи завершились за `timeout`.
+        """
+        with self._lock:
+            first = not self._draining
+            self._draining = True
+        if first:
+            for _ in self._threads:
+                self._queue.put(None)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        return not any(thread.is_alive() for thread in self._threads)
+
+
+class TTSaveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "TTSave"
+    server: "_ServerMixin"
+
+    def log_message(self, format, *args) -> None:
+        self.server.jobs.engine.debug_out(f"serve: {format % args}")
+
+    def address_string(self) -> str:
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self) -> Tuple[List[str], Dict[str, List[str]]]:
+        parts = urlsplit(self.path)
+        return [part for part in parts.path.split("/") if part], parse_qs(parts.query)
+
+    def do_POST(self) -> None:
+        path, _ = self._route()
+        if path != ["jobs"]:
+            self._json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            url = payload["url"]
+            if not isinstance(url, str) or not url:
+                raise ValueError("url must be a non-empty string")
+        except (ValueError, KeyError, TypeError) as e:
+            self._json(400, {"error": f"invalid job: {e}"})
+            return
+        job = self.server.jobs.submit(url, bool(payload.get("metadata_only")))
+        if job is None:
+            reason = "draining" if self.server.jobs.draining else "queue full"
+            self._json(503, {"error": reason}, {"Retry-After": "1"})
+            return
+        self._json(202, {"id": job.id, "status": job.status}, {"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self) -> None:
+        path, query = self._route()
+        if path == ["healthz"]:
+            self._json(200, {"ok": True, "draining": self.server.jobs.draining})
+            return
+        if path == ["stats"]:
+            self._json(200, self.server.jobs.stats())
+            return
+        if len(path) < 2 or path[0] != "jobs":
+            self._json(404, {"error": "not found"})
+            return
+        job = self.server.jobs.get(path[1])
+        if job is None:
+            self._json(404, {"error": "unknown job"})
+            return
+        try:
+            wait = float(query.get("wait", ["0"])[0])
+        except ValueError:
+            self._json(400, {"error": "wait must be a number"})
+            return
+        if wait > 0:
+            job.done.wait(min(wait, self.server.max_wait))
+
+        if len(path) == 2:
+            self._json(200, job.to_dict())
+        elif path[2:] == ["result"]:
+            if job.status == DONE:
+                self._json(200, job.result)
+            elif job.status == FAILED:
+                self._json(500, {"error": job.error})
+            else:
+                self._json(202, {"status": job.status}, {"Retry-After": "1"})
+        elif len(path) == 4 and path[2] == "files":
+            self._send_file(job, path[3])
+        else:
+            self._json(404, {"error": "not found"})
+
+    def _send_file(self, job: Job, position: str) -> None:
+        files: List[str] = (job.result or {}).get("files", [])
+        try:
+            file_path = files[int(position)]
+            size = os.path.getsize(file_path)
+        except (ValueError, IndexError, OSError):
+            self._json(404, {"error": "no such file"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(file_path)}"')
+        self.end_headers()
+        with open(file_path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+
+class _ServerMixin:
+    jobs: JobQueue
+    max_wait: float
+
+
+class _TCPServer(_ServerMixin, ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(_ServerMixin, socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class TTSaveServer:
+    def __init__(self, engine: TTSaveEngine, host: str = "127.0.0.1", port: int = 8765, socket_path: Optional[str] = None, workers: Optional[int] = None, queue_size: int = 100, keep_jobs: int = 1000, max_wait: float = 60):
+        """Долгоживущий процесс, который принимает задачи по локальному HTTP/JSON API.
+
+        Драйверы и HTTP-сессия движка остаются прогретыми между задачами, поэтому
+        клиенту не нужно запускать интерпретатор и браузер на каждую ссылку.
+
+        API:
+            - `POST /jobs` с телом `{"url": ..., "metadata_only": false}` — 202 и `id` задачи, 503 если очередь заполнена;
+            - `GET /jobs/<id>` — статус задачи (`queued`, `running`, `done`, `failed`);
+            - `GET /jobs/<id>/result` — результат `download()` (202 пока задача не завершена);
+            - `GET /jobs/<id>/files/<n>` — содержимое n-го файла результата;
+            - `GET /stats`, `GET /healthz`.
+
+        К запросам задачи можно добавить `?wait=<секунды>`, чтобы дождаться ее завершения.
+
+        Args:
+            engine (TTSaveEngine): Движок, который выполняет задачи. Закрывается в `close()`.
+            host (str, optional): Адрес для TCP. По умолчанию 127.0.0.1.
+            port (int, optional): Порт для TCP. По умолчанию 8765.
+            socket_path (Optional[str], optional): Путь к Unix-сокету. Если указан, `host` и `port` не используются.
+            workers (Optional[int], optional): Количество одновременно выполняемых задач. По умолчанию размер пула движка.
+            queue_size (int, optional): Сколько задач может ждать в очереди. По умолчанию 100.
+            keep_jobs (int, optional): Сколько завершенных задач хранить. По умолчанию 1000.
+            max_wait (float, optional): Максимальное значение `wait` в секундах. По умолчанию 60.
+
+        Examples:
+            >>> engine = TTSaveEngine(webdriver.Chrome, webdriver.ChromeOptions(), "/path/to/download", pool_size=4, warm=True)
+            >>> server = TTSaveServer(engine, port=8765)
+            >>> server.serve_forever()  # Ctrl+C — дождаться текущих задач и остановиться
+        """
+        self.jobs: JobQueue = JobQueue(engine, workers=workers, queue_size=queue_size, keep_jobs=keep_jobs)
+        self.socket_path: Optional[str] = socket_path
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            self.httpd = _UnixServer(socket_path, TTSaveHandler)
+            self.address: str = socket_path
+        else:
+            self.httpd = _TCPServer((host, port), TTSaveHandler)
+            self.address = f"http://{host}:{self.httpd.server_address[1]}"
+        self.httpd.jobs = self.jobs
+        self.httpd.max_wait = max_wait
+        self.drain_timeout: Optional[float] = None
+
+    def serve_forever(self, drain_timeout: Optional[float] = None) -> None:
+        """Обрабатывает запросы до SIGINT/SIGTERM или `shutdown()`, затем корректно останавливается.
+
+        Args:
+            drain_timeout (Optional[float], optional): Сколько секунд ждать принятые задачи при остановке. По умолчанию без ограничения.
+        """
+        self.drain_timeout = drain_timeout
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: self.shutdown())
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self) -> None:
+        """Начинает остановку: новые задачи получают 503, статус и результаты принятых задач
+        по-прежнему доступны, а после их завершения цикл `serve_forever` останавливается."""
+        def stop() -> None:
+            self.jobs.drain(self.drain_timeout)
+            self.httpd.shutdown()
+        threading.Thread(target=stop, name="ttsave-drain", daemon=True).start()
+
+    def close(self) -> None:
+        """Дожидается принятых задач (не дольше `drain_timeout`) и освобождает драйверы и сокет."""
+        drained = self.jobs.drain(self.drain_timeout)
+        if not drained:
+            self.jobs.engine.debug_out("serve: drain timed out, closing with running jobs")
+        self.httpd.server_close()
+        if self.socket_path is not None:
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+        self.jobs.engine.close()
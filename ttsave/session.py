@@ -0,0 +1,32 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_HEADERS: Dict[str, str] = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"),
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://www.tiktok.com/",
+}
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """Создает `requests.Session` с keep-alive пулом соединений и заголовками браузера.
+
+    Args:
+        pool_size (int, optional): Количество соединений, которые держатся открытыми для одного хоста. По умолчанию 10.
+
+    Returns:
+        requests.Session: Сессия, которую можно разделять между загрузками.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
@@ -0,0 +1,191 @@
+import asyncio
+import sys
+from typing import IO, Any, Awaitable, Callable, Dict, Optional
+
+
+class SinkStream:
+    """Получатель байтов одного медиафайла. Блоки передаются в том виде, в каком пришли из сети, без склейки и копий."""
+
+    def write(self, chunk: bytes) -> None:
+        raise NotImplementedError
+
+    async def awrite(self, chunk: bytes) -> None:
+        self.write(chunk)
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        """Файл передан полностью. Возвращенный словарь добавляется к описанию файла в результате."""
+        return None
+
+    def abort(self, error: BaseException) -> None:
+        """Передача файла прервана ошибкой `error`."""
+
+    async def aclose(self) -> Optional[Dict[str, Any]]:
+        return self.close()
+
+    async def aabort(self, error: BaseException) -> None:
+        self.abort(error)
+
+
+class Sink:
+    """Куда отдавать медиа вместо файлов в `download_dir`.
+
+    `open()` вызывается для каждого медиафайла. Если `concurrent` равен False,
+    файлы одной загрузки передаются строго по очереди. Если `single` равен True,
+    получатель принимает только один файл, и загрузка фото со звуком в него
+    завершается ошибкой `SingleFileSinkError`.
+    """
+    name: str = "sink"
+    concurrent: bool = True
+    single: bool = False
+
+    def open(self, file_name: str, url: str) -> SinkStream:
+        raise NotImplementedError
+
+
+class _FileObjectStream(SinkStream):
+    def __init__(self, fileobj: IO[bytes]):
+        self.fileobj: IO[bytes] = fileobj
+
+    def write(self, chunk: bytes) -> None:
+        self.fileobj.write(chunk)
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        self.fileobj.flush()
+        return None
+
+
+class FileObjectSink(Sink):
+    name = "fileobj"
+    concurrent = False
+    single = True
+
+    def __init__(self, fileobj: IO[bytes]):
+        """Пишет медиафайл в объект с методом `write` (файл, сокет, `io.BytesIO`, pipe).
+
+        Файлы в потоке ничем не разделены, поэтому принимается только контент из одного
+        файла: видео или музыка. Для фото используйте `CallbackSink`.
+
+        Args:
+            fileobj (IO[bytes]): Объект, открытый на запись в бинарном режиме.
+
+        Examples:
+            >>> buffer = io.BytesIO()
+            >>> result = engine.download(url, sink=FileObjectSink(buffer))
+        """
+        self.fileobj: IO[bytes] = fileobj
+
+    def open(self, file_name: str, url: str) -> SinkStream:
+        return _FileObjectStream(self.fileobj)
+
+
+class StdoutSink(FileObjectSink):
+    name = "stdout"
+
+    def __init__(self):
+        """Пишет медиа в стандартный вывод, например для `ttsave download <url> --to - | ffmpeg -i - ...`."""
+        super().__init__(sys.stdout.buffer)
+
+
+class _CallbackStream(SinkStream):
+    def __init__(self, sink: "CallbackSink", file_name: str):
+        self.sink: CallbackSink = sink
+        self.file_name: str = file_name
+
+    def write(self, chunk: bytes) -> None:
+        self.sink.on_chunk(self.file_name, chunk)
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        if self.sink.on_done is not None:
+            self.sink.on_done(self.file_name, None)
+        return None
+
+    def abort(self, error: BaseException) -> None:
+        if self.sink.on_done is not None:
+            self.sink.on_done(self.file_name, error)
+
+
+class CallbackSink(Sink):
+    name = "callback"
+
+    def __init__(self, on_chunk: Callable[[str, bytes], None], on_done: Optional[Callable[[str, Optional[BaseException]], None]] = None, concurrent: bool = True):
+        """Отдает блоки медиа в функцию `on_chunk(file_name, chunk)`.
+
+        Args:
+            on_chunk (Callable[[str, bytes], None]): Вызывается для каждого блока. При `concurrent=True` может вызываться из нескольких потоков одновременно для разных файлов.
+            on_done (Optional[Callable[[str, Optional[BaseException]], None]], optional): Вызывается в конце файла с ошибкой или None.
+            concurrent (bool, optional): Разрешить параллельную передачу файлов одной загрузки. По умолчанию True.
+        """
+        self.on_chunk: Callable[[str, bytes], None] = on_chunk
+        self.on_done: Optional[Callable[[str, Optional[BaseException]], None]] = on_done
+        self.concurrent = concurrent
+
+    def open(self, file_name: str, url: str) -> SinkStream:
+        return _CallbackStream(self, file_name)
+
+
+class _AsyncCallbackStream(SinkStream):
+    def __init__(self, sink: "AsyncCallbackSink", file_name: str):
+        self.sink: AsyncCallbackSink = sink
+        self.file_name: str = file_name
+
+    def _run(self, coroutine: Awaitable[None]) -> None:
+        if self.sink.loop is None:
+            raise RuntimeError("AsyncCallbackSink needs an event loop to be used from TTSave or TTSaveEngine")
+        asyncio.run_coroutine_threadsafe(coroutine, self.sink.loop).result()
+
+    def write(self, chunk: bytes) -> None:
+        self._run(self.sink.on_chunk(self.file_name, chunk))
+
+    async def awrite(self, chunk: bytes) -> None:
+        await self.sink.on_chunk(self.file_name, chunk)
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        if self.sink.on_done is not None:
+            self._run(self.sink.on_done(self.file_name, None))
+        return None
+
+    def abort(self, error: BaseException) -> None:
+        if self.sink.on_done is not None:
+            self._run(self.sink.on_done(self.file_name, error))
+
+    async def aclose(self) -> Optional[Dict[str, Any]]:
+        if self.sink.on_done is not None:
+            await self.sink.on_done(self.file_name, None)
+        return None
+
+    async def aabort(self, error: BaseException) -> None:
+        if self.sink.on_done is not None:
+            await self.sink.on_done(self.file_name, error)
+
+
+class AsyncCallbackSink(Sink):
+    name = "async_callback"
+
+    def __init__(self, on_chunk: Callable[[str, bytes], Awaitable[None]], on_done: Optional[Callable[[str, Optional[BaseException]], Awaitable[None]]] = None, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Отдает блоки медиа в корутину `on_chunk(file_name, chunk)`.
+
+        В `AsyncTTSave` корутина ожидается напрямую. В `TTSave` и `TTSaveEngine`, которые
+        работают в потоках, она запускается в `loop`, а передача ждет ее завершения,
+        поэтому медленный получатель притормаживает загрузку, а не копит блоки в памяти.
+
+        Args:
+            on_chunk (Callable[[str, bytes], Awaitable[None]]): Корутина, которая получает каждый блок.
+            on_done (Optional[Callable[[str, Optional[BaseException]], Awaitable[None]]], optional): Корутина, которая вызывается в конце файла с ошибкой или None.
+            loop (Optional[asyncio.AbstractEventLoop], optional): Event loop для вызова из потоков. По умолчанию текущий, если sink создан внутри event loop.
+
+        Examples:
+            >>> async def upload(file_name, chunk):
+            >>>     await uploader.send(chunk)
+            >>> result = await ttsave.download(url, sink=AsyncCallbackSink(upload))
+        """
+        self.on_chunk: Callable[[str, bytes], Awaitable[None]] = on_chunk
+        self.on_done: Optional[Callable[[str, Optional[BaseException]], Awaitable[None]]] = on_done
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = loop
+
+    def open(self, file_name: str, url: str) -> SinkStream:
+        return _AsyncCallbackStream(self, file_name)
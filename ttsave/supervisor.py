@@ -0,0 +1,308 @@
+from __future__ import annotations
+import atexit
+import os
+import signal
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+MB: int = 1024 * 1024
+# Аргумент, которым помечается каждый запущенный TTSave браузер: по нему находятся
+# процессы, которые пережили своего владельца.
+OWNER_ARG: str = "--ttsave-owner"
+KILL_SIGNAL: int = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+_supervisors: "weakref.WeakSet[DriverSupervisor]" = weakref.WeakSet()
+_launched: bool = False
+
+
+def owner_argument() -> str:
+    """Аргумент командной строки браузера с PID текущего процесса."""
+    return f"{OWNER_ARG}={os.getpid()}"
+
+
+def driver_pid(driver: webdriver.Chrome) -> Optional[int]:
+    """PID процесса Web Driver (chromedriver, geckodriver) или None для удаленного драйвера."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _owner(args: List[str]) -> Optional[int]:
+    for arg in args:
+        if arg.startswith(f"{OWNER_ARG}="):
+            try:
+                return int(arg.split("=", 1)[1])
+            except ValueError:
+                return None
+    return None
+
+
+def kill_tree(pid: int) -> int:
+    """Завершает процесс и всех его потомков. Возвращает количество процессов, которым отправлен сигнал."""
+    from ttsave.memory import descendants
+    killed: int = 0
+    for target in [pid, *descendants(pid)]:
+        try:
+            os.kill(target, KILL_SIGNAL)
+            killed += 1
+        except OSError:
+            pass
+    return killed
+
+
+def reap_orphans(owner: Optional[int] = None) -> int:
+    """Завершает браузеры TTSave, владелец которых уже не работает.
+
+    Браузер находится по аргументу `OWNER_ARG` и завершается вместе с потомками
+    и со своим Web Driver, если тот еще висит.
+
+    Args:
+        owner (Optional[int], optional): Завершить браузеры этого процесса, даже если он жив (так процесс убирает за собой при выходе).
+
+    Returns:
+        int: Количество завершенных процессов.
+    """
+    from ttsave.memory import command_lines, parent
+    processes: Dict[int, List[str]] = command_lines()
+    reaped: int = 0
+    for pid, args in processes.items():
+        marked = _owner(args)
+        if marked is None or pid == os.getpid():
+            continue
+        if (marked != owner) if owner is not None else _alive(marked):
+            continue
+        ppid = parent(pid)
+        driver_args = processes.get(ppid, []) if ppid not in (None, 0, 1, marked) else []
+        if driver_args and "driver" in os.path.basename(driver_args[0]):
+            reaped += kill_tree(ppid)
+        else:
+            reaped += kill_tree(pid)
+    return reaped
+
+
+class _Lease:
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver: webdriver.Chrome = driver
+        self.pid: Optional[int] = driver_pid(driver)
+        self.started: Optional[float] = None
+        self.rss: int = 0
+        self.killed: Optional[str] = None
+
+
+class DriverSupervisor:
+    _shared: Optional["DriverSupervisor"] = None
+    _shared_lock: threading.Lock = threading.Lock()
+    _reaped: bool = False
+
+    def __init__(self, deadline: Optional[float] = None, max_rss: Optional[int] = None, kill_rss: Optional[int] = None, poll: float = 1.0, reap: bool = True, debug_mode: bool = False):
+        """Следит за жизнью веб-драйверов: время задачи, память и браузеры, оставшиеся без владельца.
+
+        Задача — это время, пока драйвер выдан из пула (или принадлежит одному `TTSave`).
+        Долгая работа на одной странице (прокрутка профиля или клипов музыки) продлевает
+        срок через `renew()` на каждой новой ссылке, поэтому `deadline` ограничивает
+        не всю прокрутку, а ожидание очередной порции.
+
+        Фоновый поток раз в `poll` секунд проверяет выданные драйверы:
+        - если задача идет дольше `deadline`, дерево процессов драйвера завершается
+          (chromedriver, Chrome и его подпроцессы), зависший `driver.get()` падает
+          с ошибкой, а пул запускает вместо драйвера новый;
+        - если память дерева больше `kill_rss`, драйвер завершается так же.
+        Драйвер, память которого при возврате в пул больше `max_rss`, закрывается
+        и заменяется новым.
+
+        Каждый браузер запускается с аргументом `OWNER_ARG`. При первом запуске
+        браузера завершаются браузеры, владелец которых умер, а при выходе из
+        процесса — все его оставшиеся драйверы.
+
+        Args:
+            deadline (Optional[float], optional): Максимальная длительность задачи в секундах. По умолчанию без ограничения.
+            max_rss (Optional[int], optional): Память драйвера вместе с браузером в МБ, после которой он заменяется при возврате в пул.
+            kill_rss (Optional[int], optional): Память в МБ, при которой драйвер завершается прямо во время задачи.
+            poll (float, optional): Интервал проверок в секундах. По умолчанию 1.
+            reap (bool, optional): Завершать браузеры, оставшиеся от завершившихся процессов. По умолчанию True.
+            debug_mode (bool, optional): Режим отладки. По умолчанию False.
+
+        Examples:
+            >>> supervisor = DriverSupervisor(deadline=120, max_rss=1500)
+            >>> engine = TTSaveEngine(webdriver.Chrome, webdriver.ChromeOptions(), "/path/to/download", supervisor=supervisor)
+            >>> print(supervisor.stats())
+        """
+        from ttsave.utils import Utils
+        self.deadline: Optional[float] = deadline
+        self.max_rss: Optional[int] = max_rss * MB if max_rss else None
+        self.kill_rss: Optional[int] = kill_rss * MB if kill_rss else None
+        self.poll: float = poll
+        self.reap: bool = reap
+
+        self.utils: Utils = Utils(debug_mode=debug_mode)
+        self.debug_out: callable = self.utils.debug_out
+
+        # Ключ — сам объект драйвера: запись держит на него ссылку, и ее нельзя спутать с новым драйвером.
+        self._leases: Dict[webdriver.Chrome, _Lease] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._stopped: threading.Event = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._counts: Dict[str, int] = {"started": 0, "recycled": 0, "killed_deadline": 0, "killed_memory": 0, "reaped": 0}
+        _supervisors.add(self)
+
+    @classmethod
+    def shared(cls) -> "DriverSupervisor":
+        """Общий для процесса супервизор без ограничений: только учет драйверов и уборка браузеров без владельца."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def register(self, driver: webdriver.Chrome) -> None:
+        """Начинает следить за только что запущенным драйвером."""
+        global _launched
+        _launched = True
+        if self.reap and not DriverSupervisor._reaped:
+            DriverSupervisor._reaped = True
+            reaped = reap_orphans()
+            if reaped:
+                self.debug_out(f"Supervisor: reaped {reaped} orphaned browser processes.")
+            with self._lock:
+                self._counts["reaped"] += reaped
+        with self._lock:
+            self._leases[driver] = _Lease(driver)
+            self._counts["started"] += 1
+            if (self.deadline or self.kill_rss) and self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, name="ttsave-supervisor", daemon=True)
+                self._watchdog.start()
+
+    def unregister(self, driver: webdriver.Chrome) -> bool:
+        """Перестает следить за драйвером перед его закрытием.
+
+        Returns:
+            bool: True, если драйвер уже завершен супервизором и `driver.quit()` не нужен.
+        """
+        with self._lock:
+            lease = self._leases.pop(driver, None)
+        return lease is not None and lease.killed is not None
+
+    def begin(self, driver: webdriver.Chrome) -> None:
+        """Отмечает начало задачи на драйвере."""
+        with self._lock:
+            lease = self._leases.get(driver)
+            if lease is not None:
+                lease.started = time.monotonic()
+
+    def renew(self, driver: webdriver.Chrome) -> None:
+        """Начинает отсчет `deadline` заново: драйвер продвинулся, а не завис."""
+        with self._lock:
+            lease = self._leases.get(driver)
+            if lease is not None and lease.started is not None and lease.killed is None:
+                lease.started = time.monotonic()
+
+    def end(self, driver: webdriver.Chrome) -> Optional[str]:
+        """Отмечает конец задачи и решает, можно ли использовать драйвер дальше.
+
+        Returns:
+            Optional[str]: Причина замены драйвера (`deadline`, `memory`) или None, если он исправен.
+        """
+        with self._lock:
+            lease = self._leases.get(driver)
+            if lease is None:
+                return None
+            lease.started = None
+            if lease.killed is not None:
+                return lease.killed
+            pid = lease.pid
+        if self.max_rss is None or pid is None:
+            return None
+        from ttsave.memory import tree_rss
+        size: int = tree_rss(pid)
+        with self._lock:
+            lease.rss = size
+            if size <= self.max_rss:
+                return None
+            self._counts["recycled"] += 1
+        self.debug_out(f"Supervisor: WebDriver uses {size // MB} MB, recycling.")
+        return "memory"
+
+    def _watch(self) -> None:
+        from ttsave.memory import tree_rss
+        while not self._stopped.wait(self.poll):
+            with self._lock:
+                busy = [lease for lease in self._leases.values() if lease.started is not None and lease.killed is None]
+            for lease in busy:
+                if self.deadline and self._expired(lease):
+                    self._kill(lease, "deadline")
+                elif self.kill_rss and lease.pid is not None:
+                    lease.rss = tree_rss(lease.pid)
+                    if lease.rss > self.kill_rss:
+                        self._kill(lease, "memory")
+
+    def _expired(self, lease: _Lease) -> bool:
+        started = lease.started
+        return started is not None and time.monotonic() - started > self.deadline
+
+    def _kill(self, lease: _Lease, reason: str) -> None:
+        with self._lock:
+            # Задача могла закончиться или продлиться после проверки в `_watch`.
+            if lease.started is None or lease.killed is not None:
+                return
+            if reason == "deadline" and not self._expired(lease):
+                return
+            lease.killed = reason
+            self._counts[f"killed_{reason}"] += 1
+        self.debug_out(f"Supervisor: killing WebDriver ({reason}).")
+        if lease.pid is None:
+            try:
+                lease.driver.quit()
+            except Exception:
+                pass
+            return
+        kill_tree(lease.pid)
+        process = getattr(getattr(lease.driver, "service", None), "process", None)
+        if process is not None:
+            try:
+                process.wait(timeout=5)
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Количество драйверов, выданных и завершенных, и их память на момент последней проверки."""
+        with self._lock:
+            return {
+                "drivers": len(self._leases),
+                "busy": sum(1 for lease in self._leases.values() if lease.started is not None),
+                "rss": sum(lease.rss for lease in self._leases.values()),
+                "killed": self._counts["killed_deadline"] + self._counts["killed_memory"],
+                **self._counts,
+            }
+
+    def close(self, kill: bool = False) -> None:
+        """Останавливает проверки. С `kill=True` также завершает все еще открытые драйверы."""
+        self._stopped.set()
+        if not kill:
+            return
+        with self._lock:
+            leases = list(self._leases.values())
+            self._leases.clear()
+        for lease in leases:
+            if lease.pid is not None and lease.killed is None:
+                kill_tree(lease.pid)
+
+
+@atexit.register
+def _cleanup() -> None:
+    for supervisor in list(_supervisors):
+        supervisor.close(kill=True)
+    if _launched:
+        reap_orphans(owner=os.getpid())
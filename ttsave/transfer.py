@@ -0,0 +1,445 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import requests
+    from ttsave.sinks import SinkStream
+
+CHUNK_SIZE: int = 64 * 1024
+TIMEOUT: Tuple[float, float] = (10, 30)
+PARTIAL_DIR: str = ".ttsave-partial"
+# Файлы меньше этого размера скачиваются одним запросом, даже если `segments` > 1.
+SEGMENT_MIN_SIZE: int = 16 * 1024 * 1024
+CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+_part_locks: Dict[str, "_PartLock"] = {}
+_part_locks_lock: threading.Lock = threading.Lock()
+
+
+class _PartLock:
+    def __init__(self):
+        self.lock: threading.Lock = threading.Lock()
+        self.holders: int = 0
+
+
+class IncompleteTransferError(IOError):
+    """Соединение закрылось раньше, чем пришло все тело ответа."""
+
+
+class _ChangedError(IncompleteTransferError):
+    """Файл на сервере изменился, пока он докачивался по частям."""
+
+
+def is_downloaded(file_path: str) -> bool:
+    """Проверяет, что файл уже скачан: он существует и не пустой."""
+    try:
+        return os.path.getsize(file_path) > 0
+    except OSError:
+        return False
+
+
+def _expected_size(response: requests.Response) -> Optional[int]:
+    # При сжатии Content-Length описывает сжатое тело, а iter_content отдает распакованное.
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+    length = response.headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+def stream_to_file(session: requests.Session, url: str, file_path: str, chunk_size: int = CHUNK_SIZE, timeout: Union[float, Tuple[float, float]] = TIMEOUT, max_time: Optional[float] = None, staging_dir: Optional[str] = None, headers: Optional[Dict[str, str]] = None, cookies: Optional[Dict[str, str]] = None) -> int:
+    """Потоково скачивает `url` во временный файл и атомарно переносит его в `file_path`.
+
+    В памяти одновременно находится не больше одного блока, а недокачанный файл
+    никогда не появляется под итоговым именем.
+
+    Args:
+        session (requests.Session): Сессия для запроса.
+        url (str): Ссылка на медиафайл.
+        file_path (str): Итоговый путь к файлу.
+        chunk_size (int, optional): Размер блока чтения в байтах.
+        timeout (Union[float, Tuple[float, float]], optional): Таймаут соединения и чтения блока.
+        max_time (Optional[float], optional): Жесткое ограничение на время всей загрузки в секундах.
+        staging_dir (Optional[str], optional): Папка для временного файла. Должна быть на той же файловой системе, что и `file_path`. По умолчанию папка `file_path`.
+        headers (Optional[Dict[str, str]], optional): Дополнительные заголовки только для этого запроса.
+        cookies (Optional[Dict[str, str]], optional): Cookies только для этого запроса. В сессии они не сохраняются.
+
+    Returns:
+        int: Количество записанных байт.
+
+    Raises:
+        IncompleteTransferError: Если размер записанного файла не совпадает с Content-Length.
+        TimeoutError: Если загрузка не уложилась в `max_time`.
+    """
+    directory: str = staging_dir or os.path.dirname(file_path) or "."
+    deadline: Optional[float] = time.monotonic() + max_time if max_time is not None else None
+    with session.get(url, stream=True, timeout=timeout, headers=headers, cookies=cookies) as response:
+        response.raise_for_status()
+        expected: Optional[int] = _expected_size(response)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".ttsave-", suffix=".part")
+        written: int = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size):
+                    f.write(chunk)
+                    written += len(chunk)
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise TimeoutError(f"transfer exceeded {max_time}s after {written} bytes")
+            if expected is not None and written != expected:
+                raise IncompleteTransferError(f"Content-Length mismatch: expected {expected} bytes, got {written}")
+            os.replace(temp_path, file_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    return written
+
+
+def partial_paths(partial_dir: str, file_path: str) -> Tuple[str, str]:
+    """Пути к недокачанному файлу и его валидаторам. Имя зависит только от `file_path`, а не от URL:
+    подписанные ссылки CDN TikTok меняются, а файл остается тем же."""
+    name: str = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+    return os.path.join(partial_dir, f"{name}.part"), os.path.join(partial_dir, f"{name}.json")
+
+
+@contextmanager
+def _part_lock(part_path: str) -> Iterator[None]:
+    """Исключительный доступ к недокачанному файлу для потоков и процессов, которые делят `download_dir`.
+
+    Файл блокировки удаляется, пока блокировка еще удерживается, поэтому после
+    захвата проверяется, что заблокирован файл, который все еще лежит по этому пути.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    lock_path: str = f"{part_path}.lock"
+    with _part_locks_lock:
+        entry = _part_locks.setdefault(part_path, _PartLock())
+        entry.holders += 1
+    try:
+        with entry.lock:
+            while True:
+                fd: int = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is None:
+                    break
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    if os.stat(lock_path).st_ino == os.fstat(fd).st_ino:
+                        break
+                except FileNotFoundError:
+                    pass
+                os.close(fd)
+            try:
+                yield
+            finally:
+                if fcntl is None:
+                    # Открытый файл в Windows удалить нельзя.
+                    os.close(fd)
+                    _remove(lock_path)
+                else:
+                    _remove(lock_path)
+                    os.close(fd)
+    finally:
+        with _part_locks_lock:
+            entry.holders -= 1
+            if not entry.holders:
+                del _part_locks[part_path]
+
+
+def _validators(response: requests.Response) -> Dict[str, Any]:
+    etag: Optional[str] = response.headers.get("ETag")
+    length: Optional[int] = None
+    match = CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+    if match:
+        length = int(match.group(3)) if match.group(3) != "*" else None
+    elif response.status_code == 200:
+        length = _expected_size(response)
+    return {
+        # Слабый ETag (W/"...") нельзя использовать в If-Range.
+        "etag": etag if etag and not etag.startswith("W/") else None,
+        "last_modified": response.headers.get("Last-Modified"),
+        "length": length,
+    }
+
+
+def _if_range(meta: Dict[str, Any]) -> Optional[str]:
+    return meta.get("etag") or meta.get("last_modified")
+
+
+def _resumable(response: requests.Response, validators: Dict[str, Any]) -> bool:
+    """Докачка возможна, если сервер принимает Range, отдает тело без сжатия и присылает валидатор."""
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return False
+    if response.status_code != 206 and response.headers.get("Accept-Ranges", "").lower() != "bytes":
+        return False
+    return _if_range(validators) is not None and validators["length"] is not None
+
+
+def _read_meta(meta_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: str, meta: Dict[str, Any]) -> None:
+    temp_path = f"{meta_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(temp_path, meta_path)
+
+
+def _remove(*paths: str) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _segment_paths(part_path: str, count: int) -> List[str]:
+    return [f"{part_path}.{index}" for index in range(count)]
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _copy_body(response: requests.Response, f, chunk_size: int, deadline: Optional[float], max_time: Optional[float], written: int) -> int:
+    for chunk in response.iter_content(chunk_size):
+        f.write(chunk)
+        written += len(chunk)
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"transfer exceeded {max_time}s after {written} bytes")
+    return written
+
+
+def _fetch_segment(session: requests.Session, url: str, path: str, start: int, end: int, meta: Dict[str, Any], chunk_size: int, timeout: Union[float, Tuple[float, float]], deadline: Optional[float], max_time: Optional[float], headers: Dict[str, str], cookies: Optional[Dict[str, str]]) -> None:
+    done: int = _size(path)
+    if start + done > end:
+        return
+    request_headers = {**headers, "Range": f"bytes={start + done}-{end}", "If-Range": _if_range(meta)}
+    with session.get(url, stream=True, timeout=timeout, headers=request_headers, cookies=cookies) as response:
+        response.raise_for_status()
+        match = CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+        if response.status_code != 206 or not match or int(match.group(1)) != start + done:
+            raise _ChangedError("file changed on the server while resuming segments")
+        with open(path, "ab") as f:
+            written = _copy_body(response, f, chunk_size, deadline, max_time, done)
+    if written != end - start + 1:
+        raise IncompleteTransferError(f"segment {start}-{end}: expected {end - start + 1} bytes, got {written}")
+
+
+def _fetch_segments(session: requests.Session, url: str, part_path: str, meta_path: str, meta: Dict[str, Any], chunk_size: int, timeout: Union[float, Tuple[float, float]], deadline: Optional[float], max_time: Optional[float], headers: Dict[str, str], cookies: Optional[Dict[str, str]]) -> int:
+    total: int = meta["length"]
+    count: int = meta["segments"]
+    step: int = -(-total // count)
+    ranges: List[Tuple[int, int]] = [(start, min(start + step, total) - 1) for start in range(0, total, step)]
+    paths: List[str] = _segment_paths(part_path, count)[:len(ranges)]
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [executor.submit(_fetch_segment, session, url, path, start, end, meta, chunk_size,
+                                       timeout, deadline, max_time, headers, cookies)
+                       for path, (start, end) in zip(paths, ranges)]
+            for future in futures:
+                future.result()
+    except _ChangedError:
+        _remove(meta_path, *paths)
+        raise
+    with open(part_path, "wb") as out:
+        for path in paths:
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, out, 1024 * 1024)
+    _remove(*paths)
+    return total
+
+
+def _probe(session: requests.Session, url: str, timeout: Union[float, Tuple[float, float]], headers: Dict[str, str], cookies: Optional[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+    """Запрос первого байта: размер файла и валидаторы, если сервер поддерживает Range."""
+    with session.get(url, stream=True, timeout=timeout, headers={**headers, "Range": "bytes=0-0"}, cookies=cookies) as response:
+        response.raise_for_status()
+        validators = _validators(response)
+        if response.status_code != 206 or not _resumable(response, validators):
+            return None
+        return validators
+
+
+def _resume_stream(session: requests.Session, url: str, part_path: str, meta_path: str, meta: Optional[Dict[str, Any]], chunk_size: int, timeout: Union[float, Tuple[float, float]], deadline: Optional[float], max_time: Optional[float], headers: Dict[str, str], cookies: Optional[Dict[str, str]]) -> int:
+    offset: int = _size(part_path) if meta is not None else 0
+    request_headers: Dict[str, str] = dict(headers)
+    if offset:
+        request_headers["Range"] = f"bytes={offset}-"
+        request_headers["If-Range"] = _if_range(meta)
+    with session.get(url, stream=True, timeout=timeout, headers=request_headers, cookies=cookies) as response:
+        if response.status_code == 416 and offset and offset == meta.get("length"):
+            return offset
+        response.raise_for_status()
+        match = CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+        if response.status_code == 206 and (not match or int(match.group(1)) != offset):
+            # Часть не с того байта: дописать ее нельзя, следующая попытка начнет с нуля.
+            _remove(part_path, meta_path)
+            raise _ChangedError(f"server returned {response.headers.get('Content-Range')!r} for a request from byte {offset}")
+        if response.status_code != 206:
+            offset = 0
+        validators = _validators(response)
+        resumable: bool = _resumable(response, validators)
+        if resumable:
+            _write_meta(meta_path, {"url": url, **validators})
+        else:
+            _remove(meta_path)
+        written: int = offset
+        try:
+            with open(part_path, "ab" if offset else "wb") as f:
+                written = _copy_body(response, f, chunk_size, deadline, max_time, offset)
+        except BaseException:
+            if not resumable:
+                _remove(part_path)
+            raise
+    expected: Optional[int] = validators["length"] if resumable else _expected_size(response)
+    if expected is not None and written != expected:
+        if not resumable or written > expected:
+            _remove(part_path, meta_path)
+        raise IncompleteTransferError(f"Content-Length mismatch: expected {expected} bytes, got {written}")
+    return written
+
+
+def resume_to_file(session: requests.Session, url: str, file_path: str, partial_dir: str, chunk_size: int = CHUNK_SIZE, timeout: Union[float, Tuple[float, float]] = TIMEOUT, max_time: Optional[float] = None, headers: Optional[Dict[str, str]] = None, cookies: Optional[Dict[str, str]] = None, segments: int = 1) -> int:
+    """Как `stream_to_file`, но недокачанный файл сохраняется в `partial_dir` и продолжается при следующем вызове.
+
+    Рядом с недокачанным файлом хранятся его валидаторы (ETag, Last-Modified, размер).
+    Повторный вызов для того же `file_path` отправляет `Range` с `If-Range`: если файл
+    на сервере не изменился, скачивается только остаток, иначе загрузка начинается
+    заново. Если сервер не поддерживает Range или не присылает валидаторы,
+    недокачанный файл удаляется, как в `stream_to_file`.
+
+    Args:
+        session (requests.Session): Сессия для запроса.
+        url (str): Ссылка на медиафайл.
+        file_path (str): Итоговый путь к файлу.
+        partial_dir (str): Папка для недокачанных файлов. Должна быть на той же файловой системе, что и `file_path`.
+        chunk_size (int, optional): Размер блока чтения в байтах.
+        timeout (Union[float, Tuple[float, float]], optional): Таймаут соединения и чтения блока.
+        max_time (Optional[float], optional): Жесткое ограничение на время одной попытки в секундах.
+        headers (Optional[Dict[str, str]], optional): Дополнительные заголовки только для этого запроса.
+        cookies (Optional[Dict[str, str]], optional): Cookies только для этого запроса.
+        segments (int, optional): На сколько частей делить файлы от `SEGMENT_MIN_SIZE` байт; части скачиваются параллельно. По умолчанию 1.
+
+    Returns:
+        int: Размер файла в байтах.
+
+    Raises:
+        IncompleteTransferError: Если соединение оборвалось раньше конца файла. Недокачанная часть сохраняется.
+        TimeoutError: Если попытка не уложилась в `max_time`.
+    """
+    os.makedirs(partial_dir, exist_ok=True)
+    part_path, meta_path = partial_paths(partial_dir, file_path)
+    deadline: Optional[float] = time.monotonic() + max_time if max_time is not None else None
+    headers = dict(headers or {})
+    with _part_lock(part_path):
+        meta: Optional[Dict[str, Any]] = _read_meta(meta_path)
+        if meta is None and segments > 1:
+            validators = _probe(session, url, timeout, headers, cookies)
+            if validators is not None and validators["length"] >= SEGMENT_MIN_SIZE:
+                meta = {"url": url, "segments": segments, **validators}
+                _remove(part_path, *_segment_paths(part_path, segments))
+                _write_meta(meta_path, meta)
+        if meta is not None and meta.get("segments"):
+            written = _fetch_segments(session, url, part_path, meta_path, meta, chunk_size,
+                                      timeout, deadline, max_time, headers, cookies)
+        else:
+            written = _resume_stream(session, url, part_path, meta_path, meta, chunk_size,
+                                     timeout, deadline, max_time, headers, cookies)
+        os.replace(part_path, file_path)
+        _remove(meta_path)
+    return written
+
+
+def remove_stale_partials(partial_dir: str, max_age: float = 7 * 24 * 3600) -> int:
+    """Удаляет недокачанные файлы, которые не менялись дольше `max_age` секунд. Возвращает количество удаленных файлов."""
+    removed: int = 0
+    now: float = time.time()
+    try:
+        names = os.listdir(partial_dir)
+    except OSError:
+        return 0
+    for name in names:
+        path = os.path.join(partial_dir, name)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def stream_to_sink(session: requests.Session, url: str, stream: SinkStream, chunk_size: int = CHUNK_SIZE, timeout: Union[float, Tuple[float, float]] = TIMEOUT, max_time: Optional[float] = None, headers: Optional[Dict[str, str]] = None, cookies: Optional[Dict[str, str]] = None, progress: Optional[Dict[str, Any]] = None) -> int:
+    """Передает тело ответа в `stream.write` блоками по мере получения, без записи на диск.
+
+    Переданные байты нельзя забрать обратно, поэтому повтор после обрыва продолжает
+    с того же места: если при повторе передать тот же словарь `progress`, запрос
+    отправляется с `Range` и `If-Range`.
+
+    Args:
+        session (requests.Session): Сессия для запроса.
+        url (str): Ссылка на медиафайл.
+        stream (SinkStream): Получатель байтов (см. `ttsave.sinks`).
+        chunk_size (int, optional): Размер блока чтения в байтах.
+        timeout (Union[float, Tuple[float, float]], optional): Таймаут соединения и чтения блока.
+        max_time (Optional[float], optional): Жесткое ограничение на время одной попытки в секундах.
+        headers (Optional[Dict[str, str]], optional): Дополнительные заголовки только для этого запроса.
+        cookies (Optional[Dict[str, str]], optional): Cookies только для этого запроса.
+        progress (Optional[Dict[str, Any]], optional): Состояние передачи между попытками: сколько байт передано и валидатор ответа.
+
+    Returns:
+        int: Сколько байт передано всего.
+
+    Raises:
+        IncompleteTransferError: Если соединение оборвалось раньше конца файла.
+        IOError: Если часть файла уже передана, а сервер не может продолжить с того же места.
+    """
+    progress = progress if progress is not None else {}
+    offset: int = progress.get("written", 0)
+    request_headers: Dict[str, str] = dict(headers or {})
+    if offset:
+        if progress.get("validator") is None:
+            raise IOError(f"cannot resume after {offset} bytes: server does not support ranges")
+        request_headers["Range"] = f"bytes={offset}-"
+        request_headers["If-Range"] = progress["validator"]
+    deadline: Optional[float] = time.monotonic() + max_time if max_time is not None else None
+    with session.get(url, stream=True, timeout=timeout, headers=request_headers, cookies=cookies) as response:
+        response.raise_for_status()
+        if offset:
+            match = CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+            if response.status_code != 206 or not match or int(match.group(1)) != offset:
+                raise IOError(f"cannot resume after {offset} bytes: file changed on the server")
+        else:
+            validators = _validators(response)
+            progress["validator"] = _if_range(validators) if _resumable(response, validators) else None
+            progress["expected"] = validators["length"] if progress["validator"] else _expected_size(response)
+        for chunk in response.iter_content(chunk_size):
+            stream.write(chunk)
+            progress["written"] = progress.get("written", 0) + len(chunk)
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"transfer exceeded {max_time}s after {progress['written']} bytes")
+    written: int = progress.get("written", 0)
+    expected: Optional[int] = progress.get("expected")
+    if expected is not None and written != expected:
+        raise IncompleteTransferError(f"Content-Length mismatch: expected {expected} bytes, got {written}")
+    return written
@@ -1,30 +1,77 @@
+from __future__ import annotations
 import os
 import re
-import requests
-from typing import Dict, List, Optional, Type, Union
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Type, Union
 from ttsave.utils import Utils
 from ttsave.abc import TTSaveABC
+from ttsave.driver import create_driver
+from ttsave.lean import LeanProfile, page_weight
+from ttsave.pool import DriverPool
+from ttsave.supervisor import DriverSupervisor
+from ttsave.session import create_session
+from ttsave.extractor import HTTPExtractor
+from ttsave.transfer import PARTIAL_DIR, is_downloaded, resume_to_file, stream_to_file, stream_to_sink
+from ttsave.results import build_metadata, build_result, media_cache_keys, media_jobs
+from ttsave.urls import classify_url, item_key, profile_username
+from ttsave.profile import ProfileDownloader
+from ttsave.index import DownloadIndex
+from ttsave.cache import ContentCache
+from ttsave.metrics import Observer, Tracer
+from ttsave.dom import SELECTORS, fields_ready, harvest_links, required_fields
+from ttsave.resolver import RedirectCache, URLResolver
+from ttsave.scheduler import TransferScheduler
 from ttsave.exceptions import (DriverInitializationError, DownloadError, 
                                URLNotProvidedError, WebDriverNotInitializedError, 
                                UnsupportedURLError, VideoDownloadError, 
-                               PhotoDownloadError, MusicDownloadError)
+                               PhotoDownloadError, MusicDownloadError, SingleFileSinkError,
+                               CONTENT_ERRORS)
 import time
 
+if TYPE_CHECKING:
+    import requests
+    from ttsave.sinks import Sink
+    from selenium import webdriver
+
+DEFAULT_TIMEOUTS: Dict[str, float] = {
+    "video": 10,
+    "photo": 10,
+    "music": 10,
+    "clips": 3,
+    "profile": 5,
+    "transfer": 300,
+}
+
+
 class TTSave(TTSaveABC):
-    def __init__(self, url: str, driver_class: Type[webdriver.Chrome], options: webdriver.ChromeOptions, download_dir: str, debug_mode: bool = False, driver_path: str = None):
+    def __init__(self, url: str, driver_class: Type[webdriver.Chrome], options: webdriver.ChromeOptions, download_dir: str, debug_mode: bool = False, driver_path: str = None, pool: Optional[DriverPool] = None, timeouts: Optional[Dict[str, float]] = None, use_http: bool = True, session: Optional[requests.Session] = None, max_workers: int = 4, resolver: Optional[URLResolver] = None, index: Optional[DownloadIndex] = None, verify_index: bool = False, observers: Optional[List[Observer]] = None, lean: Optional[LeanProfile] = None, scheduler: Optional[TransferScheduler] = None, resume: bool = True, segments: int = 1, cache: Optional[ContentCache] = None, sink: Optional[Sink] = None, supervisor: Optional[DriverSupervisor] = None):
         """Инициализация объекта TTSave для загрузки контента из TikTok.
 
         Args:
-            url (str): Ссылка на TikTok видео, фото или музыку.
+            url (str): Ссылка на TikTok видео, фото, музыку или профиль (`https://www.tiktok.com/@user`).
             driver_class (Type[webdriver.Chrome]): Класс Web Driver, который вы хотите использовать (например, Chrome или Firefox).
             options (webdriver.ChromeOptions): Опции для Web Driver.
             download_dir (str): Папка для загрузки контента.
             debug_mode (bool, optional): Режим отладки. По умолчанию False. Если включен, выводится дополнительная информация для отладки.
             driver_path (str, optional): Путь к исполняемому файлу Web Driver (например, путь к `chromedriver`). По умолчанию None. Если не указан, будет использован путь по умолчанию.
+            pool (Optional[DriverPool], optional): Пул драйверов. Если указан, драйвер берется из пула и возвращается в него в `close()` вместо запуска нового браузера.
+            timeouts (Optional[Dict[str, float]], optional): Таймауты ожидания элементов в секундах по типу контента (`video`, `photo`, `music`, `clips`, `profile` — ожидание новых публикаций при прокрутке профиля) и жесткий таймаут загрузки одного файла (`transfer`). Недостающие значения берутся из `DEFAULT_TIMEOUTS`.
+            use_http (bool, optional): Сначала пытаться получить данные из JSON, встроенного в HTML страницы, без запуска браузера. Web Driver запускается только если это не удалось. По умолчанию True.
+            session (Optional[requests.Session], optional): HTTP-сессия для запросов страниц и медиа. По умолчанию создается новая.
+            max_workers (int, optional): Количество файлов, которые скачиваются одновременно (слайды фото и аудио). По умолчанию 4.
+            resolver (Optional[URLResolver], optional): Преобразование коротких ссылок в канонические. По умолчанию используется общий для процесса кеш редиректов на диске.
+            index (Optional[DownloadIndex], optional): Индекс скачанного контента. Если контент с тем же ID уже есть в индексе и его файлы на месте, результат возвращается сразу, без браузера и сети.
+            verify_index (bool, optional): Пересчитывать контрольные суммы файлов из индекса перед возвратом результата. По умолчанию False.
+            observers (Optional[List[Observer]], optional): Получатели замеров этапов: запуск драйвера (`driver.start`), загрузка страницы (`page.load`), разбор ссылки (`url.resolve`), получение данных (`extract`), ожидание элементов (`element.wait`) и загрузка файлов (`transfer`). См. `ttsave.metrics`. У `page.load` в атрибутах есть `bytes`, `resources` и `blocked` — вес страницы и заблокированные запросы (см. `ttsave.lean.page_weight`).
+            lean (Optional[LeanProfile], optional): Облегченный профиль браузера, если драйвер запускается без пула (см. `ttsave.lean`).
+            scheduler (Optional[TransferScheduler], optional): Лимиты по хостам, повторы при 403/429/5xx и оборванных соединениях для запросов страниц и медиа. По умолчанию общий для процесса `TransferScheduler.shared()`.
+            resume (bool, optional): Хранить недокачанные файлы в `download_dir/.ttsave-partial` и продолжать их запросами `Range`, если сервер это поддерживает (см. `ttsave.transfer.resume_to_file`). По умолчанию True.
+            segments (int, optional): На сколько частей делить большие файлы при `resume=True`; части скачиваются параллельно. По умолчанию 1.
+            cache (Optional[ContentCache], optional): Общий кеш музыки. Дорожка, которая уже есть в кеше, не скачивается, а появляется в `download_dir` жесткой ссылкой или reflink (см. `ttsave.cache`).
+            sink (Optional[Sink], optional): Куда передавать медиа вместо файлов в `download_dir`: объект с `write`, функция, корутина или stdout (см. `ttsave.sinks`). В результате `download()` тогда пустой `files` и ключ `streamed` с описанием переданных файлов. Индекс и кеш не используются; публикации профиля по-прежнему сохраняются на диск.
+            supervisor (Optional[DriverSupervisor], optional): Ограничения времени и памяти собственного драйвера (см. `ttsave.supervisor`). С `pool` используется супервизор пула. По умолчанию `DriverSupervisor.shared()`.
 
         Examples:
             >>> ttsave = TTSave(
@@ -40,9 +87,23 @@ class TTSave(TTSaveABC):
             download_dir (str): Путь к папке для загрузки файлов.
             driver_path (str): Путь к исполняемому файлу Web Driver, если он указан.
             debug_mode (bool): Флаг, указывающий, включен ли режим отладки.
-            driver (Optional[webdriver.Chrome]): Экземпляр Web Driver, инициализированный при создании.
-            wait (Optional[WebDriverWait]): Экземпляр WebDriverWait для ожидания элементов на странице.
+            driver (Optional[webdriver.Chrome]): Экземпляр Web Driver. Запускается при первом обращении к странице через браузер: после проверки индекса и попытки получить данные по HTTP.
+            pool (Optional[DriverPool]): Пул драйверов, из которого взят `driver`.
+            timeouts (Dict[str, float]): Таймауты ожидания элементов по типу контента.
+            wait_times (Dict[str, float]): Фактическое время каждого ожидания в секундах за последнюю загрузку.
+            timings (Dict[str, float]): Время этапов последней загрузки в секундах: `resolve`, `extract` и `transfer`.
+            staging_dir (Optional[str]): Временная папка текущей загрузки внутри `download_dir`. При `resume=False` файлы скачиваются в нее и атомарно переносятся на место.
+            partial_dir (Optional[str]): Папка недокачанных файлов при `resume=True`. Сохраняется между загрузками.
+            cache (Optional[ContentCache]): Общий кеш музыки.
+            sink (Optional[Sink]): Получатель медиа вместо `download_dir`.
+            supervisor (DriverSupervisor): Учет драйвера, ограничения времени задачи и памяти.
             utils (Utils): Утилиты для отладки и обработки файлов.
+            session (requests.Session): HTTP-сессия для запросов страниц и медиа.
+            extractor (HTTPExtractor): Извлечение данных из HTML страницы без браузера.
+            resolver (URLResolver): Преобразование коротких ссылок в канонические.
+            index (Optional[DownloadIndex]): Индекс скачанного контента.
+            tracer (Tracer): Отправка замеров этапов наблюдателям из `observers`.
+            scheduler (TransferScheduler): Планировщик HTTP-запросов (см. `ttsave.scheduler`).
 
         Raises:
             ValueError: Если `url` не является допустимым URL.
@@ -52,272 +113,488 @@ class TTSave(TTSaveABC):
         self.download_dir: str = download_dir
         self.driver_path = driver_path
         self.debug_mode: bool = debug_mode
+        self.pool: Optional[DriverPool] = pool
+        self.timeouts: Dict[str, float] = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.wait_times: Dict[str, float] = {}
+        self.timings: Dict[str, float] = {}
+        self.use_http: bool = use_http
+        self.driver_class: Type[webdriver.Chrome] = driver_class
+        self.options: webdriver.ChromeOptions = options
+        self.max_workers: int = max(1, max_workers)
 
         self.utils: Utils = Utils(debug_mode=debug_mode)
         self.debug_out: callable = self.utils.debug_out
         self.clear_file_name: callable = self.utils.clear_file_name
 
         self.driver: Optional[webdriver.Chrome] = None
-        self.wait: Optional[WebDriverWait] = None
-
-        self.initialize_driver(driver_class, options)
+        self.staging_dir: Optional[str] = None
+        self.partial_dir: Optional[str] = os.path.join(download_dir, PARTIAL_DIR) if resume else None
+        self.segments: int = max(1, segments)
+        self.cache: Optional[ContentCache] = cache
+        self.sink: Optional[Sink] = sink
+        self.supervisor: DriverSupervisor = pool.supervisor if pool is not None else supervisor or DriverSupervisor.shared()
+        self._streamed: Dict[str, Dict] = {}
+
+        self.scheduler: TransferScheduler = scheduler or TransferScheduler.shared()
+        self.session: requests.Session = session or create_session(pool_size=self.max_workers)
+        self.extractor: HTTPExtractor = HTTPExtractor(self.session, self.utils, scheduler=self.scheduler)
+        self.resolver: URLResolver = resolver or URLResolver(self.session, self.utils, RedirectCache.shared(),
+                                                             scheduler=self.scheduler)
+        self.index: Optional[DownloadIndex] = index
+        self.verify_index: bool = verify_index
+        self.tracer: Tracer = Tracer(observers)
+        self.lean: Optional[LeanProfile] = lean
 
     def initialize_driver(self, driver_class: Type[webdriver.Chrome], options: webdriver.ChromeOptions) -> None:
         try:
-            if driver_class == webdriver.Chrome:
-                prefs: Dict[str, str] = {
-                    "download.default_directory": self.download_dir,
-                }
-                options.add_experimental_option("prefs", prefs)
-            if driver_class == webdriver.Firefox:
-                profile = webdriver.FirefoxProfile()
-                profile.set_preference("browser.download.folderList", 2)
-                profile.set_preference("browser.download.manager.showWhenStarting", False)
-                profile.set_preference("browser.download.dir", self.download_dir)
-                profile.set_preference("browser.helperApps.neverAsk.saveToDisk", "video/mp4")         
-
-            if not self.debug_mode:
-                options.add_argument("--headless")
-            else:
-                options.add_argument("--start-maximized")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--mute-audio")
-            options.add_argument("--disable-dev-shm-usage")
-            
-            self.driver = driver_class(options=options, service=self.driver_path)
-            self.driver.get(self.url)
-            self.wait = WebDriverWait(self.driver, 10)
+            with self.tracer.span("driver.start", pooled=self.pool is not None):
+                if self.pool is not None:
+                    self.driver = self.pool.acquire()
+                else:
+                    self.driver = create_driver(driver_class, options, self.download_dir,
+                                                self.debug_mode, self.driver_path, self.lean)
+                    self.supervisor.register(self.driver)
+                    self.supervisor.begin(self.driver)
+            with self.tracer.span("page.load", url=self.url) as span:
+                self.driver.get(self.url)
+                if span:
+                    span.set(**page_weight(self.driver))
             self.debug_out("WebDriver initialized and page loaded.")
             self.debug_out("TTSave initialized.")
         except Exception as e:
-            raise DriverInitializationError(f"Error initializing the driver: {str(e)}")
+            self._quit_driver()
+            raise DriverInitializationError(f"Error initializing the driver: {str(e)}", self.utils)
 
-    def _download_file(self, video_file_name: str) -> None:
+    def _ensure_driver(self) -> None:
+        if not self.driver:
+            self.initialize_driver(self.driver_class, self.options)
+        if not self.driver:
+            raise WebDriverNotInitializedError(self.utils)
+
+    def _wait_for(self, name: str, condition: callable, content_type: str):
+        """Ждет выполнения `condition` с таймаутом для `content_type` и запоминает время ожидания."""
+        from selenium.webdriver.support.ui import WebDriverWait
+        timeout: float = self.timeouts[content_type]
+        started: float = time.monotonic()
         try:
-            script = """
-const videoElement = document.querySelector('video');
+            with self.tracer.span("element.wait", element=name, timeout=timeout):
+                return WebDriverWait(self.driver, timeout).until(condition)
+        finally:
+            elapsed: float = time.monotonic() - started
+            self.wait_times[name] = elapsed
+            self.debug_out(f"Waited {elapsed:.2f}s for {name} (timeout {timeout}s)")
 
-if (videoElement) {
-    const sourceElement = videoElement.querySelector('source');
+    def download(self) -> Optional[Dict[str, Union[str, List[str]]]]:
+        self.wait_times = {}
+        self.timings = {}
+        self._streamed = {}
+        if not self.url:
+            raise URLNotProvidedError(self.utils)
 
-    if (sourceElement) {
-        const videoUrl = sourceElement.src;
+        self.debug_out(f"Normalized URL: {self.url}")
+        started: float = time.monotonic()
+        with self.tracer.span("url.resolve", url=self.url):
+            self.url = self.resolver.resolve(self.url)
+        self.timings["resolve"] = time.monotonic() - started
+        content_type: Optional[str] = classify_url(self.url)
+        if content_type is None:
+            if profile_username(self.url) is not None:
+                return self.download_profile()
+            raise UnsupportedURLError(self.url, self.utils)
+
+        key: Optional[str] = item_key(self.url)
+        if self.index is not None and self.sink is None:
+            cached = self.index.get(key, verify=self.verify_index)
+            if cached is not None:
+                self.debug_out(f"Found in download index: {key}")
+                return cached
+
+        started = time.monotonic()
+        info: Optional[Dict] = None
+        with self.tracer.span("extract", url=self.url, content_type=content_type) as span:
+            if self.use_http:
+                info = self.extractor.extract(self.url, content_type)
+            if span:
+                span.set(method="http" if info is not None else "driver")
+            if info is None:
+                try:
+                    info = self._extract(content_type)
+                except Exception as e:
+                    raise CONTENT_ERRORS[content_type](str(e), self.utils)
+        self.timings["extract"] = time.monotonic() - started
+
+        started = time.monotonic()
+        if self.partial_dir is None and self.sink is None:
+            self.staging_dir = tempfile.mkdtemp(prefix=".ttsave-job-", dir=self.download_dir)
+        try:
+            if content_type == "video":
+                output = self._download_video(info)
+            elif content_type == "photo":
+                output = self._download_photo(info)
+            else:
+                output = self._music(info)
+        finally:
+            if self.staging_dir is not None:
+                shutil.rmtree(self.staging_dir, ignore_errors=True)
+                self.staging_dir = None
+            self.timings["transfer"] = time.monotonic() - started
 
-        const link = document.createElement('a');
-        link.href = videoUrl;
+        if self.sink is not None:
+            return {**output, "files": [], "streamed": [self._streamed[name] for name in output["files"]]}
+        if self.index is not None:
+            self.index.put(key, self.url, output)
+        return output
 
-        link.download = 'video_file_name';
+    def fetch_metadata(self) -> Dict:
+        """Возвращает данные о контенте в том же виде, что и `download()`, не скачивая медиафайлы.
 
-        document.body.appendChild(link);
-        link.click();
+        Вместо локальных путей `files` в результате ключ `media` со ссылками на медиа
+        (см. `ttsave.results.build_metadata`). Индекс загрузок не используется и не обновляется.
 
-        document.body.removeChild(link);
-    } else {
-        console.error('Не удалось найти элемент <source> внутри элемента <video>.');
-    }
-} else {
-    console.error('Не удалось найти элемент <video> на странице.');
-}
-"""
-            script = script.replace('video_file_name', video_file_name)
-            self.driver.execute_script(script)
-            self.debug_out(f"Download script executed for file: {video_file_name}")
-
-            file_path = os.path.join(self.download_dir, video_file_name)
-            while not os.path.exists(file_path):
-                time.sleep(0.5)
-            
-            self.debug_out(f"File downloaded: {file_path}")
-        except Exception as e:
-            raise DownloadError(video_file_name, str(e))
+        Returns:
+            Dict: Данные о видео, фото или музыке.
 
-    def download(self) -> Optional[Dict[str, Union[str, List[str]]]]:
-        time.sleep(15)
+        Examples:
+            >>> metadata = TTSave(url="https://www.tiktok.com/@example/video/1234567890", ...).fetch_metadata()
+            >>> print(metadata["author_username"], metadata["media"][0]["url"])
+        """
         if not self.url:
-            raise URLNotProvidedError()
-        if not self.driver:
-            raise WebDriverNotInitializedError()
-
-        self.debug_out(f"Normalized URL: {self.url}")
-        self.url = requests.get(self.url).url
-        if re.match(r"https:\/\/www\.tiktok\.com\/@([a-zA-Z0-9_.]+)\/video\/([0-9]+)", self.url):
-            return self._download_video()
-        elif re.match(r"https:\/\/www\.tiktok\.com\/@([a-zA-Z0-9_.]+)\/photo\/([0-9]+)", self.url):
-            return self._download_photo()
-        elif re.match(r"https:\/\/www\.tiktok\.com\/music\/[a-zA-Z0-9-%]+-\d+", self.url):
-            return self._music()
-        else:
-            raise UnsupportedURLError(self.url)
-
-    def _download_video(self) -> Dict[str, Union[str, List[str]]]:
+            raise URLNotProvidedError(self.utils)
+        self.url = self.resolver.resolve(self.url)
+        content_type: Optional[str] = classify_url(self.url)
+        if content_type is None:
+            raise UnsupportedURLError(self.url, self.utils)
+
+        info: Optional[Dict] = None
+        if self.use_http:
+            info = self.extractor.extract(self.url, content_type)
         try:
-            video_element = self.wait.until(
-                EC.presence_of_element_located((By.TAG_NAME, "video"))
-            )
-            video_url: str = video_element.get_attribute("src")
-            self.debug_out(f"Video URL found: {video_url}")
-
-            video_name_element = self.driver.find_element(
-                By.XPATH, "//meta[@property='og:description']")
-            video_file_name: str = f"{self.clear_file_name(video_name_element.get_attribute('content'))}.mp4"
-            self.debug_out(f"Video file name: {video_file_name}")
+            info = info or self._extract(content_type)
+            return build_metadata(info, self.url, self.clear_file_name)
+        except Exception as e:
+            raise CONTENT_ERRORS[content_type](str(e), self.utils)
 
-            username_element = self.driver.find_element(
-                By.CLASS_NAME, "css-1c7urt-SpanUniqueId.evv7pft1")
-            self.debug_out(f"Username found: {username_element.text}")
-            username: str = username_element.text
+    def download_profile(self, workers: Optional[int] = None, limit: Optional[int] = None, checkpoint_path: Optional[str] = None) -> Dict:
+        """Скачивает все публикации профиля, пока страница прокручивается (см. `ProfileDownloader`).
 
-            music_uri_element = self.driver.find_element(
-                By.CLASS_NAME, "epjbyn1.css-v80f7r-StyledLink-StyledLink.er1vbsz0")
-            music_uri: str = music_uri_element.get_attribute("href")
-            self.debug_out(f"Music URL found: {music_uri}")
-            
+        Args:
+            workers (Optional[int], optional): Количество публикаций, которые скачиваются одновременно. По умолчанию `max_workers`.
+            limit (Optional[int], optional): Максимальное количество публикаций. По умолчанию все.
+            checkpoint_path (Optional[str], optional): Путь к файлу контрольной точки для продолжения прерванной загрузки.
+
+        Examples:
+            >>> ttsave = TTSave(url="https://www.tiktok.com/@example", ...)
+            >>> result = ttsave.download_profile(workers=8)
+            >>> print(len(result["items"]), result["errors"])
+        """
+        self.url = self.resolver.resolve(self.url)
+        username: Optional[str] = profile_username(self.url)
+        if username is None:
+            raise UnsupportedURLError(self.url, self.utils)
+        self.debug_out(f"Downloading profile: @{username}")
+        return ProfileDownloader(self, username, workers=workers or self.max_workers,
+                                 checkpoint_path=checkpoint_path, limit=limit).run()
+
+    def _spawn(self, url: str) -> "TTSave":
+        """Загрузчик для другой ссылки с теми же настройками, сессией, пулом и индексом."""
+        pool: Optional[DriverPool] = self.pool
+        if pool is not None and pool.size < 2 and self.driver is not None:
+            # Единственный драйвер пула занят текущей страницей.
+            pool = None
+        return TTSave(url=url, driver_class=self.driver_class, options=self.options,
+                      download_dir=self.download_dir, debug_mode=self.debug_mode,
+                      driver_path=self.driver_path, pool=pool, timeouts=self.timeouts,
+                      use_http=self.use_http, session=self.session, max_workers=self.max_workers,
+                      resolver=self.resolver, index=self.index, verify_index=self.verify_index,
+                      observers=self.tracer.observers, lean=self.lean, scheduler=self.scheduler,
+                      resume=self.partial_dir is not None, segments=self.segments, cache=self.cache,
+                      supervisor=self.supervisor)
+
+    def _collect(self, content_type: str) -> Dict:
+        """Читает все поля `content_type` из `SELECTORS` одним вызовом скрипта на каждую проверку ожидания."""
+        from selenium.common.exceptions import TimeoutException
+        self._ensure_driver()
+        fields: Dict = self._wait_for(
+            f"{content_type} fields", fields_ready(content_type, required_fields(content_type)), content_type)
+        if not all(fields.values()):
+            try:
+                fields = self._wait_for(
+                    f"{content_type} optional fields", fields_ready(content_type, list(fields)), "clips")
+            except TimeoutException:
+                pass
+        return fields
+
+    def _extract_video(self) -> Dict[str, str]:
+        fields: Dict = self._collect("video")
+        self.debug_out(f"Video URL found: {fields['video_url']}")
+        self.debug_out(f"Username found: {fields['author_username']}")
+        self.debug_out(f"Music URL found: {fields['music_uri']}")
+        return {
+            "type": "video",
+            "author_username": fields["author_username"],
+            "description": fields["description"],
+            "video_url": fields["video_url"],
+            "music_uri": fields["music_uri"]
+        }
+
+    def _extract(self, content_type: str) -> Dict:
+        """Извлекает данные о контенте через Web Driver."""
+        extractors = {
+            "video": self._extract_video,
+            "photo": self._extract_photo,
+            "music": self._extract_music,
+        }
+        return extractors[content_type]()
+
+    def _download_video(self, info: Optional[Dict] = None) -> Dict[str, Union[str, List[str]]]:
+        try:
+            info = info or self._extract_video()
+            [(video_url, video_file_name)] = media_jobs(info, self.clear_file_name)
+            self.debug_out(f"Video file name: {video_file_name}")
             self.debug_out(f"Downloading video: {video_file_name} from URL: {video_url}")
 
-            self.driver.get(video_url)
-            self._download_file(video_file_name)
-            output: Dict[str, Union[str, List[str]]] = {
-                "type": "video",
-                "author_username": username,
-                "files": [f"{self.download_dir}/{video_file_name}"],
-                "url": self.url,
-                "music_uri": music_uri
-            }
+            files: List[str] = self._save_many([(video_url, video_file_name)], media_cache_keys(info, self.url))
+            output: Dict[str, Union[str, List[str]]] = build_result(info, files, self.url)
             self.debug_out(f"Video download completed: {video_file_name}")
             return output
 
         except Exception as e:
-            raise VideoDownloadError(str(e))
-
-    def _download_photo(self) -> Dict[str, Union[str, List[str]]]:
+            raise VideoDownloadError(str(e), self.utils)
+
+    def _extract_photo(self) -> Dict[str, Union[str, List[str]]]:
+        fields: Dict = self._collect("photo")
+        self.debug_out(f"Username found: {fields['author_username']}")
+        self.debug_out(f"Music URL found: {fields['music_uri']}")
+
+        photo_urls: List[str] = []
+        for photo_url in fields["photo_urls"]:
+            if photo_url not in photo_urls:
+                photo_urls.append(photo_url)
+        return {
+            "type": "photo",
+            "author_username": fields["author_username"],
+            "description": fields["description"],
+            "photo_urls": photo_urls,
+            "audio_url": fields["audio_url"],
+            "music_uri": fields["music_uri"]
+        }
+
+    def _download_photo(self, info: Optional[Dict] = None) -> Dict[str, Union[str, List[str]]]:
         try:
-            self.wait.until(
-                EC.presence_of_element_located(
-                    (By.XPATH, "//meta[@property='og:description']"))
-            )
-            name_element = self.driver.find_element(
-                By.XPATH, "//meta[@property='og:description']")
-
-            self.wait.until(
-                EC.presence_of_all_elements_located(
-                    (By.CLASS_NAME, "css-brxox6-ImgPhotoSlide.e10jea832"))
-            )
-            photo_elements = self.driver.find_elements(
-                By.CLASS_NAME, "css-brxox6-ImgPhotoSlide.e10jea832")
-            
-            username_element = self.driver.find_element(
-                By.CLASS_NAME, "css-1c7urt-SpanUniqueId.evv7pft1")
-
-            username: str = username_element.text
-            self.debug_out(f"Username found: {username}")
-            music_uri_element = self.driver.find_element(
-                By.CLASS_NAME, "epjbyn1.css-v80f7r-StyledLink-StyledLink.er1vbsz0")
-            music_uri: str = music_uri_element.get_attribute("href")
-            self.debug_out(f"Music URL found: {music_uri}")
-
-            files: List[str] = []
-            seen_urls: set = set()
-
-            for photo_element in photo_elements:
-                photo_url: str = photo_element.get_attribute("src")
-                if photo_url in seen_urls:
-                    continue
-                seen_urls.add(photo_url)
-
-                index: int = len(seen_urls)
-                photo_file_name: str = f"{index}_{self.clear_file_name(name_element.get_attribute('content'))}.jpg"
-                self.debug_out(f"Downloading photo: {photo_file_name} from URL: {photo_url}")
-
-                file_path: str = self._save_content(photo_url, photo_file_name)
-                files.append(file_path)
-
-            audio_element = self.wait.until(
-                EC.presence_of_element_located((By.TAG_NAME, "audio"))
-            )
-            audio_url: str = audio_element.get_attribute("src")
-            audio_file_name: str = f"{self.clear_file_name(name_element.get_attribute('content'))}.mp3"
-            self.debug_out(f"Downloading audio: {audio_file_name} from URL: {audio_url}")
-
-            audio_file_path: str = self._save_content(audio_url, audio_file_name)
-            files.append(audio_file_path)
+            info = info or self._extract_photo()
+            jobs: List[Tuple[str, str]] = media_jobs(info, self.clear_file_name)
+            for url, file_name in jobs:
+                self.debug_out(f"Downloading {file_name} from URL: {url}")
+
+            files: List[str] = self._save_many(jobs, media_cache_keys(info, self.url))
 
             self.debug_out(f"Photo and audio download completed.")
-            output: Dict[str, Union[str, List[str]]] = {
-                "type": "photo",
-                "author_username": username,
-                "files": files,
-                "url": self.url,
-                "music_uri": music_uri
-            }
+            output: Dict[str, Union[str, List[str]]] = build_result(info, files, self.url)
             return output
 
         except Exception as e:
-            raise PhotoDownloadError(str(e))
+            raise PhotoDownloadError(str(e), self.utils)
+
+    def _extract_music(self) -> Dict:
+        fields: Dict = self._collect("music")
+        music_author: str = fields["author_name"]
+        self.debug_out(f"Music author found: {music_author}")
+        self.debug_out(f"Music author URL found: {fields['author_url']}")
+
+        music_clip_count = int(fields["clip_count"].split()[0])
+        self.debug_out(f"Music clip count found: {music_clip_count}")
+        music_clips_urls: List[str] = fields["clips"]
+        self.debug_out(f"Music clips URLs found: {len(music_clips_urls)}")
+
+        music_thumb_url = re.search(r'url\((.*?)\)', fields["thumb_style"]).group(1)
+        music_thumb_url = f"https:{music_thumb_url}".replace('"', '')
+        self.debug_out(f"Music thumb URL found: {music_thumb_url}")
+
+        music_url: str = fields["music_url"]
+        self.debug_out(f"Music URL found: {music_url}")
+        return {
+            "type": "music",
+            "author": {
+                "url": fields["author_url"],
+                "name": music_author
+            },
+            "thumb_url": music_thumb_url,
+            "clip_count": music_clip_count,
+            "clips": music_clips_urls,
+            "music_url": music_url
+        }
+
+    def iter_music_clips(self, limit: Optional[int] = None, timeout: Optional[float] = None, dedupe_window: int = 100_000) -> Iterator[str]:
+        """Постепенно прокручивает страницу музыки и отдает ссылки на клипы по мере их подгрузки.
+
+        Первые ссылки доступны сразу, не дожидаясь прокрутки всей страницы. Итерация
+        заканчивается, когда получено `limit` ссылок или `clip_count` со страницы,
+        истек `timeout` или новые клипы перестали появляться за таймаут `clips`.
 
-    def _music(self) -> Dict[str, Union[str, List[str]]]:
-        try:
+        Args:
+            limit (Optional[int], optional): Максимальное количество ссылок. По умолчанию без ограничения.
+            timeout (Optional[float], optional): Общее ограничение по времени в секундах. По умолчанию без ограничения.
+            dedupe_window (int, optional): Сколько последних ссылок помнить для удаления дублей. Ограничивает память для музыки с миллионами клипов. По умолчанию 100000.
+
+        Yields:
+            str: Ссылка на клип.
+
+        Examples:
+            >>> for clip_url in ttsave.iter_music_clips(limit=5000):
+            >>>     process(clip_url)
+        """
+        deadline: Optional[float] = time.monotonic() + timeout if timeout is not None else None
+        self.url = self.resolver.resolve(self.url)
+        if classify_url(self.url) != "music":
+            raise UnsupportedURLError(self.url, self.utils)
+        self._ensure_driver()
+        if self.driver.current_url != self.url:
             self.driver.get(self.url)
-            music_author_element = self.wait.until(
-                EC.presence_of_element_located((By.CLASS_NAME, "css-22xkqc-StyledLink.er1vbsz0"))
-            )
-            music_author = music_author_element.text
-            self.debug_out(f"Music author found: {music_author}")
-
-            music_author_url = music_author_element.get_attribute("href")
-            self.debug_out(f"Music author URL found: {music_author_url}")
-
-            music_clip_count_element = self.driver.find_element(
-                By.CSS_SELECTOR, "strong[style='font-weight: normal;']")
-            music_clip_count = int(music_clip_count_element.text.split()[0])
-            self.debug_out(f"Music clip count found: {music_clip_count}")
-            time.sleep(1)
-            music_clips_urls = self.driver.find_elements(
-                By.CLASS_NAME, "css-1wrhn5c-AMetaCaptionLine.eih2qak0")
-            music_clips_urls = [url.get_attribute("href") for url in music_clips_urls]
-            self.debug_out(f"Music clips URLs found: {len(music_clips_urls)}")
-
-            music_thumb_url_element = self.driver.find_element(
-                By.CLASS_NAME, "css-uur1tb-DivMusicCardContainer.ervjp3i1")
-            music_thumb_url = music_thumb_url_element.get_attribute("style")
-            music_thumb_url = re.search(r'url\((.*?)\)', music_thumb_url).group(1)
-            music_thumb_url = f"https:{music_thumb_url}".replace('"', '')
-            self.debug_out(f"Music thumb URL found: {music_thumb_url}")
-
-            music_url_element = self.driver.find_element(By.TAG_NAME, "video")
-            music_url = music_url_element.get_attribute("src")
-            self.debug_out(f"Music URL found: {music_url}")
-            self._save_content(music_url, f"{self.clear_file_name(music_author)}.mp3")
-            output: Dict[str, Union[str, List[str]]] = {
-                "type": "music",
-                "files": [f"{self.download_dir}/{self.clear_file_name(music_author)}.mp3"],
-                "author": {
-                    "url": music_author_url,
-                    "name": music_author
-                },
-                "thumb_url": music_thumb_url,
-                "clip_count": music_clip_count,
-                "clips": music_clips_urls,
-                "url": music_url
-            }            
+
+        clip_count: int = int(self._wait_for(
+            "clip count", fields_ready("music", ["clip_count"]), "music")["clip_count"].split()[0])
+        if limit is not None:
+            clip_count = min(clip_count, limit)
+        self.debug_out(f"Harvesting up to {clip_count} music clips")
+
+        yielded: int = 0
+        for clip_url in harvest_links(self.driver, SELECTORS["music"]["clips"]["css"], self.timeouts["clips"],
+                                      clip_count, deadline, dedupe_window):
+            yielded += 1
+            self.supervisor.renew(self.driver)
+            yield clip_url
+            self.supervisor.renew(self.driver)
+        self.debug_out(f"Clip harvesting stopped after {yielded} clips")
+
+    def _music(self, info: Optional[Dict] = None) -> Dict[str, Union[str, List[str]]]:
+        try:
+            info = info or self._extract_music()
+            files: List[str] = self._save_many(media_jobs(info, self.clear_file_name), media_cache_keys(info, self.url))
+            output: Dict[str, Union[str, List[str]]] = build_result(info, files, self.url)
             return output
         except Exception as e:
-            raise MusicDownloadError(str(e))
+            raise MusicDownloadError(str(e), self.utils)
         
-    def _save_content(self, url: str, file_name: str) -> str:
+    def _driver_request_options(self) -> Dict[str, Dict[str, str]]:
+        """Cookies и User-Agent браузера, чтобы CDN отдал медиа так же, как странице в браузере."""
+        if not self.driver:
+            return {}
+        return {
+            "headers": {
+                "User-Agent": self.driver.execute_script("return navigator.userAgent;"),
+                "Referer": self.driver.current_url,
+            },
+            "cookies": {cookie["name"]: cookie["value"] for cookie in self.driver.get_cookies()},
+        }
+
+    def _stream_content(self, url: str, file_name: str, headers: Optional[Dict[str, str]] = None, cookies: Optional[Dict[str, str]] = None) -> str:
+        """Передает медиафайл в `sink` и возвращает его имя; описание сохраняется для `streamed`."""
+        stream = self.sink.open(file_name, url)
+        progress: Dict = {}
         try:
-            response = requests.get(url)
-            file_path: str = f"{self.download_dir}/{self.clear_file_name(file_name)}"
-            if not os.path.exists(file_path):
-                with open(file_path, "wb") as f:
-                    f.write(response.content)
-                self.debug_out(f"File saved: {file_path}")
-            else:
+            with self.tracer.span("transfer", url=url, sink=self.sink.name) as span:
+                started: float = time.monotonic()
+                size: int = self.scheduler.call(url, lambda: stream_to_sink(
+                    self.session, url, stream, max_time=self.timeouts["transfer"],
+                    headers=headers, cookies=cookies, progress=progress))
+                if span:
+                    elapsed: float = time.monotonic() - started
+                    span.set(bytes=size, throughput=size / elapsed if elapsed else 0.0)
+            details: Optional[Dict] = stream.close()
+        except Exception as e:
+            stream.abort(e)
+            raise DownloadError(file_name, str(e), self.utils)
+        self._streamed[file_name] = {"file_name": file_name, "url": url, "bytes": size, "sink": self.sink.name, **(details or {})}
+        self.debug_out(f"File streamed to {self.sink.name}: {file_name} ({size} bytes)")
+        return file_name
+
+    def _file_path(self, file_name: str) -> str:
+        """Путь к файлу в `download_dir`.
+
+        Если файл с таким именем уже есть и индекс записал его за другим контентом
+        (у треков одного автора и у видео с одинаковой подписью имена совпадают),
+        к имени добавляется ID контента. Файлы, которых нет в индексе, считаются
+        скачанными, как и раньше.
+        """
+        file_path: str = f"{self.download_dir}/{self.clear_file_name(file_name)}"
+        key: Optional[str] = item_key(self.url)
+        if self.index is None or key is None or not is_downloaded(file_path):
+            return file_path
+        owner: Optional[str] = self.index.owner(file_path)
+        if owner is None or owner == key:
+            return file_path
+        stem, extension = os.path.splitext(file_path)
+        return f"{stem}_{key.split(':', 1)[1]}{extension}"
+
+    def _save_content(self, url: str, file_name: str, headers: Optional[Dict[str, str]] = None, cookies: Optional[Dict[str, str]] = None, cache_key: Optional[str] = None) -> str:
+        if self.sink is not None:
+            return self._stream_content(url, file_name, headers, cookies)
+        try:
+            file_path: str = self._file_path(file_name)
+            if is_downloaded(file_path):
                 self.debug_out(f"File already exists: {file_path}")
+                return file_path
+            if self.cache is not None and cache_key is not None:
+                method: Optional[str] = self.cache.get(cache_key, file_path)
+                if method is not None:
+                    self.debug_out(f"File taken from cache ({method}): {file_path}")
+                    return file_path
+            with self.tracer.span("transfer", url=url, file=file_path) as span:
+                started: float = time.monotonic()
+                if self.partial_dir is not None:
+                    size: int = self.scheduler.call(url, lambda: resume_to_file(
+                        self.session, url, file_path, self.partial_dir, max_time=self.timeouts["transfer"],
+                        headers=headers, cookies=cookies, segments=self.segments))
+                else:
+                    size = self.scheduler.call(url, lambda: stream_to_file(
+                        self.session, url, file_path, max_time=self.timeouts["transfer"],
+                        staging_dir=self.staging_dir, headers=headers, cookies=cookies))
+                if span:
+                    elapsed: float = time.monotonic() - started
+                    span.set(bytes=size, throughput=size / elapsed if elapsed else 0.0)
+            self.debug_out(f"File saved: {file_path} ({size} bytes)")
+            if self.cache is not None and cache_key is not None:
+                try:
+                    self.cache.put(cache_key, file_path)
+                except OSError as e:
+                    self.debug_out(f"Could not add {file_path} to cache: {e}")
             return file_path
         except Exception as e:
-            raise DownloadError(file_name, str(e))
+            raise DownloadError(file_name, str(e), self.utils)
+
+    def _save_many(self, jobs: List[Tuple[str, str]], cache_keys: Optional[List[Optional[str]]] = None) -> List[str]:
+        """Скачивает пары (url, имя файла) параллельно и возвращает пути в исходном порядке.
+
+        `cache_keys` — ключи `ContentCache` для каждой пары (см. `ttsave.results.media_cache_keys`).
+        """
+        if self.sink is not None and self.sink.single and len(jobs) > 1:
+            raise SingleFileSinkError(self.sink.name, len(jobs), self.utils)
+        options: Dict[str, Dict[str, str]] = self._driver_request_options()
+        keyed: List[Tuple[str, str, Optional[str]]] = [
+            (url, file_name, key) for (url, file_name), key in zip(jobs, cache_keys or [None] * len(jobs))]
+        if self.max_workers == 1 or len(jobs) <= 1 or (self.sink is not None and not self.sink.concurrent):
+            return [self._save_content(url, file_name, cache_key=key, **options) for url, file_name, key in keyed]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            return list(executor.map(lambda job: self._save_content(job[0], job[1], cache_key=job[2], **options), keyed))
 
     def _quit_driver(self) -> None:
         if self.driver:
-            self.driver.quit()
-            self.debug_out("WebDriver quit.")
+            if self.pool is not None:
+                self.pool.release(self.driver)
+                self.debug_out("WebDriver returned to pool.")
+            elif self.supervisor.unregister(self.driver):
+                self.debug_out("WebDriver was killed by the supervisor.")
+            else:
+                self.driver.quit()
+                self.debug_out("WebDriver quit.")
+            self.driver = None
+
+    def close(self) -> None:
+        """Освобождает веб-драйвер: возвращает его в пул или закрывает браузер."""
+        self._quit_driver()
+
+    def __enter__(self) -> "TTSave":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
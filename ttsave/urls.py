@@ -0,0 +1,42 @@
+import re
+from typing import Dict, Optional, Pattern
+
+URL_PATTERNS: Dict[str, Pattern] = {
+    "video": re.compile(r"https:\/\/www\.tiktok\.com\/@([a-zA-Z0-9_.]+)\/video\/([0-9]+)"),
+    "photo": re.compile(r"https:\/\/www\.tiktok\.com\/@([a-zA-Z0-9_.]+)\/photo\/([0-9]+)"),
+    "music": re.compile(r"https:\/\/www\.tiktok\.com\/music\/[a-zA-Z0-9-%]+-(\d+)"),
+}
+
+
+def classify_url(url: str) -> Optional[str]:
+    """Возвращает тип контента (`video`, `photo` или `music`) по каноническому URL или None."""
+    for name, pattern in URL_PATTERNS.items():
+        if pattern.match(url):
+            return name
+    return None
+
+
+def item_key(url: str) -> Optional[str]:
+    """Ключ контента вида `video:<id>`, `photo:<id>` или `music:<id>` по каноническому URL.
+
+    В отличие от имени файла, ключ не зависит от подписи к видео и не меняется между запусками.
+    """
+    for name, pattern in URL_PATTERNS.items():
+        match = pattern.match(url)
+        if match:
+            return f"{name}:{match.groups()[-1]}"
+    return None
+
+
+PROFILE_PATTERN: Pattern = re.compile(r"https:\/\/www\.tiktok\.com\/@([a-zA-Z0-9_.]+)\/?(?:\?.*)?$")
+
+
+def profile_username(url: str) -> Optional[str]:
+    """Имя пользователя, если URL указывает на страницу профиля `https://www.tiktok.com/@user`, иначе None."""
+    match = PROFILE_PATTERN.match(url)
+    return match.group(1) if match else None
+
+
+def is_canonical(url: str) -> bool:
+    """Ссылка уже каноническая: контент или профиль, редиректы раскрывать не нужно."""
+    return classify_url(url) is not None or profile_username(url) is not None
@@ -1,5 +1,4 @@
 import re
-import colorama
 from ttsave.abc import UtilsABC
 
 
@@ -9,10 +8,12 @@ class Utils(UtilsABC):
 
     def debug_out(self, message: str) -> None:
         if self.debug_mode:
+            import colorama
             print(colorama.Fore.YELLOW + "[DEBUG] TTSave: " +
                   colorama.Fore.MAGENTA + message + colorama.Fore.RESET)
 
     def error_out(self, message: str) -> None:
+        import colorama
         print(colorama.Fore.RED + "[ERROR] TTSave: " +
               colorama.Fore.LIGHTRED_EX + message + colorama.Fore.RESET)
 
@@ -0,0 +1,346 @@
+from __future__ import annotations
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+from ttsave.engine import DownloadResult
+from ttsave.exceptions import WorkerError
+from ttsave.lean import LeanProfile
+from ttsave.memory import available_memory, tree_rss
+from ttsave.supervisor import kill_tree
+from ttsave.utils import Utils
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from selenium import webdriver
+
+MB: int = 1024 * 1024
+
+
+def _worker_main(conn: Connection, config: Dict[str, Any]) -> None:
+    """Цикл процесса-исполнителя: свой `TTSaveEngine` с одним драйвером, задачи по одной через `conn`."""
+    from ttsave.cache import ContentCache
+    from ttsave.engine import TTSaveEngine
+    from ttsave.index import DownloadIndex
+    from ttsave.supervisor import DriverSupervisor
+
+    index_path: Optional[str] = config.pop("index_path")
+    index = DownloadIndex(index_path) if index_path else None
+    cache_dir: Optional[str] = config.pop("cache_dir")
+    cache_size: int = config.pop("cache_size")
+    cache = ContentCache(cache_dir, cache_size) if cache_dir else None
+    job_timeout: Optional[float] = config.pop("job_timeout")
+    supervisor = DriverSupervisor(deadline=job_timeout) if job_timeout else None
+    engine = TTSaveEngine(pool_size=1, index=index, cache=cache, supervisor=supervisor, **config)
+    try:
+        while True:
+            try:
+                task = conn.recv()
+            except EOFError:
+                break
+            if task is None:
+                break
+            url, metadata_only = task
+            try:
+                result = engine.fetch_metadata(url) if metadata_only else engine.download(url)
+                conn.send((True, result))
+            except Exception as e:
+                # Исключения TTSave требуют `utils` в конструкторе и не восстанавливаются из pickle.
+                conn.send((False, f"{type(e).__name__}: {e}"))
+    finally:
+        engine.close()
+        if index is not None:
+            index.close()
+        if cache is not None:
+            cache.close()
+        conn.close()
+
+
+class _Worker:
+    def __init__(self, context: multiprocessing.context.BaseContext, config: Dict[str, Any]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, dict(config)), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs: int = 0
+
+    def run(self, url: str, metadata_only: bool, timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """Выполняет задачу в процессе.
+
+        Raises:
+            TimeoutError: Если процесс не ответил за `timeout` секунд.
+        """
+        self.conn.send((url, metadata_only))
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"no answer in {timeout}s")
+        return self.conn.recv()
+
+    def rss(self) -> int:
+        return tree_rss(self.process.pid) if self.process.is_alive() else 0
+
+    def kill(self) -> None:
+        """Завершает зависший процесс вместе с его браузерами."""
+        if self.process.is_alive():
+            kill_tree(self.process.pid)
+        self.stop(timeout=0)
+
+    def stop(self, timeout: float = 30) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ProcessEngine:
+    def __init__(self, driver_class: Type[webdriver.Chrome], options: webdriver.ChromeOptions, download_dir: str, processes: Optional[int] = None, debug_mode: bool = False, driver_path: str = None, use_http: bool = True, max_workers: int = 4, index_path: Optional[str] = None, lean: Optional[LeanProfile] = None, jobs_per_worker: Optional[int] = 200, worker_memory_limit: Optional[int] = None, memory_limit: Optional[int] = None, min_free_memory: Optional[int] = 512, memory_poll: float = 0.5, cache_dir: Optional[str] = None, cache_size: int = 2 * 1024 ** 3, job_timeout: Optional[float] = None, task_timeout: Optional[float] = 900):
+        """Загрузчик, который распределяет ссылки по нескольким процессам.
+
+        Один `TTSave` работает последовательно, а Chrome и разбор страниц нагружают
+        процессор, поэтому в одном процессе Python занято меньше ядер, чем есть.
+        Здесь каждый процесс-исполнитель держит свой `TTSaveEngine` с одним драйвером
+        и берет следующую ссылку из общей очереди, как только освободится.
+
+        Перед выдачей задачи проверяется память: если свободной памяти меньше
+        `min_free_memory` или все исполнители вместе с браузерами заняли больше
+        `memory_limit`, задача ждет, пока другие не завершатся. Исполнитель
+        перезапускается после `jobs_per_worker` задач или если он вместе с браузером
+        занял больше `worker_memory_limit`. Память считается через `psutil`,
+        если он установлен, иначе через `/proc`.
+
+        Args:
+            driver_class (Type[webdriver.Chrome]): Класс Web Driver (например, Chrome или Firefox).
+            options (webdriver.ChromeOptions): Опции для Web Driver. Передаются в процессы через pickle.
+            download_dir (str): Папка для загрузки контента.
+            processes (Optional[int], optional): Количество процессов-исполнителей. По умолчанию равно количеству ядер.
+            debug_mode (bool, optional): Режим отладки. По умолчанию False.
+            driver_path (str, optional): Путь к исполняемому файлу Web Driver.
+            use_http (bool, optional): Сначала пытаться получить данные без браузера (см. `TTSave`). По умолчанию True.
+            max_workers (int, optional): Количество файлов одной загрузки, которые скачиваются одновременно. По умолчанию 4.
+            index_path (Optional[str], optional): Путь к индексу скачанного контента (см. `DownloadIndex`). Каждый процесс открывает его сам.
+            lean (Optional[LeanProfile], optional): Облегченный профиль браузера (см. `ttsave.lean`).
+            jobs_per_worker (Optional[int], optional): Перезапускать исполнитель после стольких задач. None — не перезапускать. По умолчанию 200.
+            worker_memory_limit (Optional[int], optional): Перезапускать исполнитель, если он вместе с браузером занял больше стольких МБ.
+            memory_limit (Optional[int], optional): Не выдавать новые задачи, пока все исполнители вместе занимают больше стольких МБ.
+            min_free_memory (Optional[int], optional): Не выдавать новые задачи, пока свободно меньше стольких МБ. По умолчанию 512.
+            memory_poll (float, optional): Как часто проверять память, пока задача ждет, в секундах. По умолчанию 0.5.
+            cache_dir (Optional[str], optional): Папка общего кеша музыки (см. `ContentCache`). Каждый процесс открывает его сам.
+            cache_size (int, optional): Размер кеша музыки в байтах. По умолчанию 2 ГБ.
+            job_timeout (Optional[float], optional): Максимальное время работы браузера над одной ссылкой в секундах; зависший драйвер завершается и заменяется (см. `DriverSupervisor`).
+            task_timeout (Optional[float], optional): Сколько секунд ждать ответа исполнителя на одну задачу. Исполнитель, который не ответил, завершается вместе с браузером и запускается заново. None — ждать без ограничения. По умолчанию 900.
+
+        Examples:
+            >>> with ProcessEngine(webdriver.Chrome, webdriver.ChromeOptions(), "/path/to/download", processes=16, memory_limit=24000) as engine:
+            >>>     for url, result, error in engine.download_many(urls):
+            >>>         print(url, result or error)
+        """
+        self.processes: int = processes or os.cpu_count() or 1
+        self.jobs_per_worker: Optional[int] = jobs_per_worker
+        self.worker_memory_limit: Optional[int] = worker_memory_limit * MB if worker_memory_limit else None
+        self.memory_limit: Optional[int] = memory_limit * MB if memory_limit else None
+        self.min_free_memory: Optional[int] = min_free_memory * MB if min_free_memory else None
+        self.memory_poll: float = memory_poll
+        self.task_timeout: Optional[float] = task_timeout
+
+        self.utils: Utils = Utils(debug_mode=debug_mode)
+        self.debug_out: callable = self.utils.debug_out
+
+        self._config: Dict[str, Any] = {
+            "driver_class": driver_class,
+            "options": options,
+            "download_dir": download_dir,
+            "debug_mode": debug_mode,
+            "driver_path": driver_path,
+            "use_http": use_http,
+            "max_workers": max_workers,
+            "index_path": index_path,
+            "cache_dir": cache_dir,
+            "cache_size": cache_size,
+            "job_timeout": job_timeout,
+            "lean": lean,
+        }
+        # spawn: дочерние процессы не наследуют потоки и соединения родителя.
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks: queue.Queue = queue.Queue()
+        self._workers: List[Optional[_Worker]] = [None] * self.processes
+        self._lock: threading.Lock = threading.Lock()
+        self._running: int = 0
+        self._closed: bool = False
+        self._counts: Dict[str, int] = {"done": 0, "failed": 0, "recycled": 0, "crashed": 0, "hung": 0, "throttled": 0}
+        self._threads: List[threading.Thread] = [
+            threading.Thread(target=self._dispatch, args=(slot,), name=f"ttsave-worker-{slot}", daemon=True)
+            for slot in range(self.processes)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _workers_rss(self) -> int:
+        return sum(worker.rss() for worker in list(self._workers) if worker is not None)
+
+    def _admit(self) -> None:
+        """Ждет, пока памяти хватит на еще один браузер. Если ничего не выполняется, задача выдается сразу."""
+        throttled = False
+        while not self._closed:
+            with self._lock:
+                if self._running == 0:
+                    break
+            free = available_memory() if self.min_free_memory else None
+            if free is not None and free < self.min_free_memory:
+                reason = f"{free // MB} MB free"
+            elif self.memory_limit and self._workers_rss() > self.memory_limit:
+                reason = f"workers use more than {self.memory_limit // MB} MB"
+            else:
+                break
+            if not throttled:
+                throttled = True
+                with self._lock:
+                    self._counts["throttled"] += 1
+                self.debug_out(f"Workers: holding a job back, {reason}.")
+            time.sleep(self.memory_poll)
+        with self._lock:
+            self._running += 1
+
+    def _recycle(self, slot: int, worker: _Worker) -> bool:
+        if self.jobs_per_worker and worker.jobs >= self.jobs_per_worker:
+            reason = f"{worker.jobs} jobs"
+        elif self.worker_memory_limit and worker.rss() > self.worker_memory_limit:
+            reason = f"more than {self.worker_memory_limit // MB} MB"
+        else:
+            return False
+        self.debug_out(f"Workers: recycling worker {slot} after {reason}.")
+        worker.stop()
+        self._workers[slot] = None
+        with self._lock:
+            self._counts["recycled"] += 1
+        return True
+
+    def _dispatch(self, slot: int) -> None:
+        while True:
+            item = self._tasks.get()
+            if item is None:
+                break
+            future, url, metadata_only = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._admit()
+            try:
+                worker = self._workers[slot]
+                if worker is not None and not worker.process.is_alive():
+                    self.debug_out(f"Workers: worker {slot} exited, starting a new one.")
+                    worker.stop(timeout=0)
+                    worker = None
+                if worker is None:
+                    worker = self._workers[slot] = _Worker(self._context, self._config)
+                try:
+                    ok, value = worker.run(url, metadata_only, self.task_timeout)
+                except TimeoutError:
+                    self.debug_out(f"Workers: worker {slot} did not answer in {self.task_timeout}s, killing it.")
+                    self._workers[slot] = None
+                    worker.kill()
+                    with self._lock:
+                        self._counts["hung"] += 1
+                    future.set_exception(WorkerError(f"процесс {slot} не ответил за {self.task_timeout} с при загрузке {url}", self.utils))
+                    continue
+                except (EOFError, OSError) as e:
+                    self._workers[slot] = None
+                    worker.stop(timeout=0)
+                    with self._lock:
+                        self._counts["crashed"] += 1
+                    future.set_exception(WorkerError(f"процесс {slot} завершился во время загрузки {url} ({e!r})", self.utils))
+                    continue
+                worker.jobs += 1
+                with self._lock:
+                    self._counts["done" if ok else "failed"] += 1
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(WorkerError(value, self.utils))
+                self._recycle(slot, worker)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._running -= 1
+        worker = self._workers[slot]
+        if worker is not None:
+            worker.stop()
+            self._workers[slot] = None
+
+    def submit(self, url: str, metadata_only: bool = False) -> Future:
+        """Ставит ссылку в общую очередь и возвращает `Future` с результатом `download()` или `fetch_metadata()`."""
+        if self._closed:
+            raise WorkerError("исполнители остановлены", self.utils)
+        future: Future = Future()
+        self._tasks.put((future, url, metadata_only))
+        return future
+
+    def download(self, url: str) -> Optional[Dict]:
+        return self.submit(url).result()
+
+    def fetch_metadata(self, url: str) -> Dict:
+        return self.submit(url, metadata_only=True).result()
+
+    def download_many(self, urls: Iterable[str], metadata_only: bool = False) -> Iterator[DownloadResult]:
+        """Загружает ссылки во всех процессах (см. `TTSaveEngine.download_many`).
+
+        В очереди одновременно не больше двух ссылок на исполнитель, поэтому `urls` может быть генератором.
+        """
+        urls = iter(urls)
+        pending: Dict[Future, str] = {}
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < self.processes * 2:
+                try:
+                    url = next(urls)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[self.submit(url, metadata_only)] = url
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    yield url, future.result(), None
+                except Exception as e:
+                    yield url, None, e
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики задач и текущая память исполнителей."""
+        with self._lock:
+            counts = dict(self._counts)
+            running = self._running
+        return {
+            "processes": self.processes,
+            "alive": sum(1 for worker in list(self._workers) if worker is not None),
+            "running": running,
+            "queued": self._tasks.qsize(),
+            "workers_rss": self._workers_rss(),
+            "available_memory": available_memory(),
+            **counts,
+        }
+
+    def close(self) -> None:
+        """Дожидается поставленных задач и останавливает процессы вместе с их браузерами."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self) -> "ProcessEngine":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,10 +1,14 @@
 import os
+import sys
+import json
+import atexit
+from contextlib import redirect_stdout
 import click
-import yaml
 from click_shell import shell
 from rich.console import Console
-from ttsave import TTSave
-from selenium import webdriver
+from ttsave import TTSaveEngine, DownloadIndex
+from ttsave.driver import import_webdriver
+from ttsave.lean import LeanProfile
 from colorama import Fore
 import time
 
@@ -25,14 +29,85 @@ _______________________________   _________   _______________
 Welcome to TTSave CLI! Type 'help' for commands.
 """
 
+_config = None
+
 def load_config():
-    config_path = "cli_config.yml"
-    if os.path.exists(config_path):
-        with open(config_path, 'r') as file:
-            return yaml.safe_load(file)
-    return {}
+    """Read cli_config.yml on first use; yaml is only imported when the file exists."""
+    global _config
+    if _config is None:
+        _config = {}
+        config_path = "cli_config.yml"
+        if os.path.exists(config_path):
+            import yaml
+            with open(config_path, 'r') as file:
+                _config = yaml.safe_load(file) or {}
+    return _config
+
+engines = {}
+
+def chrome_options():
+    webdriver = import_webdriver()
+    options = webdriver.ChromeOptions()
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    return options
+
+def lean_profile(lean):
+    return LeanProfile() if lean else None
+
+def get_engine(download_dir, debug, lean=False):
+    """Return a warm engine for the directory, reused between shell commands."""
+    key = (os.path.abspath(download_dir), debug, lean)
+    if key not in engines:
+        engines[key] = TTSaveEngine(driver_class=import_webdriver().Chrome, options=chrome_options(), download_dir=download_dir, debug_mode=debug, pool_size=1, lean=lean_profile(lean))
+    return engines[key]
+
+def driver_supervisor(job_timeout, driver_memory, debug):
+    from ttsave.supervisor import DriverSupervisor
+    return DriverSupervisor(deadline=job_timeout or None, max_rss=driver_memory, debug_mode=debug)
+
+def resolve_download_dir(download_dir):
+    if download_dir is None:
+        download_dir = load_config().get('default', {}).get('download_dir', os.getcwd())
+    if not os.path.exists(download_dir):
+        console.print(f"Directory does not exist: {download_dir}", style="bold red")
+        return None
+    return download_dir
+
+def read_urls(source):
+    """Read unique URLs from a file, skipping blank lines and # comments."""
+    urls = []
+    seen = set()
+    for line in source:
+        url = line.strip()
+        if url and not url.startswith('#') and url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls
 
-config = load_config()
+def read_succeeded(output, mode):
+    """Return URLs that already have a successful result of this mode in the JSONL output file.
+
+    Records written before the mode was stored count as downloads.
+    """
+    succeeded = set()
+    if os.path.exists(output):
+        with open(output, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('ok') and record.get('mode', 'download') == mode:
+                    succeeded.add(record['url'])
+    return succeeded
+
+@atexit.register
+def close_engines():
+    for engine in engines.values():
+        engine.close()
+    engines.clear()
 
 @shell(prompt='TTSave >  ', intro=intro)
 def cli():
@@ -42,25 +117,29 @@ def cli():
 @cli.command()
 @click.argument('url')
 @click.argument('download_dir', required=False)
+@click.option('--metadata-only', is_flag=True, help="Print metadata with media URLs as JSON without downloading files.")
+@click.option('--to', 'target', default=None, help="Write a video or music track to this file ('-' for stdout) instead of DOWNLOAD_DIR. Photo posts are rejected.")
+@click.option('--lean', is_flag=True, help="Do not load images, fonts, media and trackers in the browser.")
 @click.option('--debug', is_flag=True, help="Enable debug mode.")
-def download(url, download_dir, debug):
+def download(url, download_dir, metadata_only, target, lean, debug):
     
     """Download TikTok video or photo from the given URL."""
+    download_dir = resolve_download_dir(download_dir)
     if download_dir is None:
-        download_dir = config.get('default', {}).get('download_dir', os.getcwd())
-
-    if not os.path.exists(download_dir):
-        console.print(f"Directory does not exist: {download_dir}", style="bold red")
         return
 
-    options = webdriver.ChromeOptions()
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)    
-    ttsave = TTSave(url=url, options=options, download_dir=download_dir, debug_mode=debug or config.get('default', {}).get('debug', False), driver_class=webdriver.Chrome)
+    engine = get_engine(download_dir, debug or load_config().get('default', {}).get('debug', False), lean)
 
     try:
-        result = ttsave.download()
+        if metadata_only:
+            click.echo(json.dumps(engine.fetch_metadata(url), ensure_ascii=False, indent=2))
+            return
+
+        if target is not None:
+            stream_download(engine, url, target)
+            return
+
+        result = engine.download(url)
 
         if result:
             console.print(f"Downloaded {result['type']} files:", style="bold green")
@@ -70,8 +149,145 @@ def download(url, download_dir, debug):
             console.print("No files were downloaded.", style="yellow")
     except Exception as e:
         console.print(f"An error occurred: {e}", style="bold red")
+
+def stream_download(engine, url, target):
+    """Stream media into a file or stdout; messages go to stderr so they never mix with the media."""
+    from ttsave.sinks import FileObjectSink, StdoutSink
+    messages = Console(stderr=True)
+    try:
+        if target == '-':
+            sink = StdoutSink()
+            with redirect_stdout(sys.stderr):
+                result = engine.download(url, sink=sink)
+            sys.stdout.buffer.flush()
+        else:
+            with open(target, 'wb') as file:
+                result = engine.download(url, sink=FileObjectSink(file))
+    except Exception as e:
+        messages.print(f"An error occurred: {e}", style="bold red")
+        return
+    for item in result['streamed']:
+        messages.print(f"Streamed {item['file_name']} ({item['bytes']} bytes)", style="dim")
+
+@cli.command()
+@click.argument('source', type=click.File('r'), default='-')
+@click.argument('download_dir', required=False)
+@click.option('--workers', '-w', default=2, show_default=True, help="Number of parallel downloads (and browsers).")
+@click.option('--output', '-o', default='results.jsonl', show_default=True, help="JSON Lines file with one result per URL.")
+@click.option('--index', 'use_index', is_flag=True, help="Skip items already recorded in the download index of DOWNLOAD_DIR.")
+@click.option('--metadata-only', is_flag=True, help="Record metadata with media URLs without downloading files.")
+@click.option('--processes', '-p', type=int, help="Spread downloads over N worker processes (0 = one per CPU core) instead of threads.")
+@click.option('--max-memory', type=int, help="With --processes: hold back new jobs while workers and their browsers use more than this many MB.")
+@click.option('--cache-size', type=int, help="Keep up to this many MB of music in DOWNLOAD_DIR/.ttsave-cache and link repeated tracks instead of downloading them.")
+@click.option('--job-timeout', type=float, default=300, show_default=True, help="Kill and replace a browser that works on one URL longer than this many seconds.")
+@click.option('--driver-memory', type=int, help="Replace a browser once it uses more than this many MB.")
+@click.option('--lean', is_flag=True, help="Do not load images, fonts, media and trackers in the browser.")
+@click.option('--debug', is_flag=True, help="Enable debug mode.")
+def batch(source, download_dir, workers, output, use_index, metadata_only, processes, max_memory, cache_size, job_timeout, driver_memory, lean, debug):
+    """Download every URL from a file (or stdin when SOURCE is '-').
+
+    URLs that already have a successful line in the output file are skipped,
+    so running the same command again retries only the failed ones.
+    """
+    download_dir = resolve_download_dir(download_dir)
+    if download_dir is None:
+        return
+
+    mode = 'metadata' if metadata_only else 'download'
+    urls = read_urls(source)
+    succeeded = read_succeeded(output, mode)
+    pending = [url for url in urls if url not in succeeded]
+    if len(pending) < len(urls):
+        console.print(f"Skipping {len(urls) - len(pending)} already downloaded URLs.", style="dim")
+    if not pending:
+        console.print("Nothing to download.", style="yellow")
+        return
+
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+
+    failed = 0
+    progress = Progress(
+        TextColumn("[bold blue]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TextColumn("[red]{task.fields[failed]} failed"),
+        TimeElapsedColumn(),
+        console=console,
+    )
+    debug = debug or load_config().get('default', {}).get('debug', False)
+    cache_dir = os.path.join(download_dir, '.ttsave-cache') if cache_size else None
+    cache = None
+    if processes is not None:
+        from ttsave.workers import ProcessEngine
+
+        index = None
+        index_path = DownloadIndex.default_path(download_dir) if use_index else None
+        engine = ProcessEngine(driver_class=import_webdriver().Chrome, options=chrome_options(), download_dir=download_dir, processes=processes or None, debug_mode=debug, index_path=index_path, lean=lean_profile(lean), memory_limit=max_memory, worker_memory_limit=driver_memory, cache_dir=cache_dir, cache_size=(cache_size or 0) * 1024 * 1024, job_timeout=job_timeout)
+    else:
+        from ttsave.cache import ContentCache
+
+        index = DownloadIndex(DownloadIndex.default_path(download_dir)) if use_index else None
+        cache = ContentCache(cache_dir, max_bytes=cache_size * 1024 * 1024) if cache_dir else None
+        engine = TTSaveEngine(driver_class=import_webdriver().Chrome, options=chrome_options(), download_dir=download_dir, debug_mode=debug, pool_size=workers, index=index, lean=lean_profile(lean), cache=cache, supervisor=driver_supervisor(job_timeout, driver_memory, debug))
+    try:
+        with progress, open(output, 'a', encoding='utf-8') as results:
+            task = progress.add_task("Fetching metadata" if metadata_only else "Downloading", total=len(pending), failed=0)
+            for url, result, error in engine.download_many(pending, metadata_only=metadata_only):
+                if error is None:
+                    record = {"url": url, "ok": True, "mode": mode, "result": result}
+                else:
+                    failed += 1
+                    record = {"url": url, "ok": False, "mode": mode, "error": str(error)}
+                results.write(json.dumps(record, ensure_ascii=False) + "\n")
+                results.flush()
+                progress.update(task, advance=1, failed=failed)
+    finally:
+        engine.close()
+        if index is not None:
+            index.close()
+        if cache is not None:
+            cache.close()
+
+    console.print(f"Downloaded {len(pending) - failed}/{len(pending)} URLs, results in {output}", style="bold green")
+    if failed:
+        console.print(f"{failed} URLs failed. Run the same command again to retry them.", style="yellow")
+
+@cli.command()
+@click.argument('download_dir', required=False)
+@click.option('--host', default='127.0.0.1', show_default=True, help="Address to listen on.")
+@click.option('--port', default=8765, show_default=True, help="TCP port to listen on.")
+@click.option('--socket', 'socket_path', help="Listen on a Unix socket instead of TCP.")
+@click.option('--workers', '-w', default=2, show_default=True, help="Parallel jobs (and browsers).")
+@click.option('--queue-size', default=100, show_default=True, help="Jobs that may wait in the queue before new ones are rejected.")
+@click.option('--drain-timeout', type=float, help="Seconds to wait for accepted jobs on shutdown.")
+@click.option('--index', 'use_index', is_flag=True, help="Skip items already recorded in the download index of DOWNLOAD_DIR.")
+@click.option('--job-timeout', type=float, default=300, show_default=True, help="Kill and replace a browser that works on one job longer than this many seconds.")
+@click.option('--driver-memory', type=int, help="Replace a browser once it uses more than this many MB.")
+@click.option('--lean', is_flag=True, help="Do not load images, fonts, media and trackers in the browser.")
+@click.option('--debug', is_flag=True, help="Enable debug mode.")
+def serve(download_dir, host, port, socket_path, workers, queue_size, drain_timeout, use_index, job_timeout, driver_memory, lean, debug):
+    """Keep browsers warm and accept jobs over a local HTTP/JSON API.
+
+    POST /jobs {"url": ...} returns a job id; poll GET /jobs/<id> (add ?wait=30
+    to block until it finishes) and fetch GET /jobs/<id>/result.
+    """
+    from ttsave.server import TTSaveServer
+
+    download_dir = resolve_download_dir(download_dir)
+    if download_dir is None:
+        return
+
+    index = DownloadIndex(DownloadIndex.default_path(download_dir)) if use_index else None
+    debug = debug or load_config().get('default', {}).get('debug', False)
+    engine = TTSaveEngine(driver_class=import_webdriver().Chrome, options=chrome_options(), download_dir=download_dir, debug_mode=debug, pool_size=workers, index=index, lean=lean_profile(lean), warm=True, supervisor=driver_supervisor(job_timeout, driver_memory, debug))
+    server = TTSaveServer(engine, host=host, port=port, socket_path=socket_path, workers=workers, queue_size=queue_size)
+    console.print(f"Serving on {server.address} with {workers} workers. Press Ctrl+C to drain and stop.", style="bold green")
+    try:
+        server.serve_forever(drain_timeout=drain_timeout)
     finally:
-        ttsave.driver.quit()
+        if index is not None:
+            index.close()
+    console.print("Server stopped.", style="yellow")
 
 @cli.command()
 def version():
@@ -83,6 +299,8 @@ def help():
     """Show help information."""
     console.print("Available commands:", style="bold blue")
     console.print(" - [bold cyan]download[/bold cyan]: Download TikTok video or photo")
+    console.print(" - [bold cyan]batch[/bold cyan]: Download every URL from a file or stdin")
+    console.print(" - [bold cyan]serve[/bold cyan]: Run a local HTTP/JSON job server with warm browsers")
     console.print(" - [bold cyan]version[/bold cyan]: Show version information")
 
 if __name__ == "__main__":